@@ -0,0 +1,110 @@
+"""Замер времени обновления главной страницы: соединение на каждый запрос против Storage
+
+Запуск: python benchmarks/bench_refresh.py --logs 1000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import datagen
+from habits_core import HabitsCore
+
+# Запросы главной страницы в том виде, в каком они были до оптимизаций:
+# полный пересчет звезд, сортировка всех плохих логов и группировка всех
+# логов хороших привычек. Столбцы date и time заменены на day и minute,
+# иначе запросы не выполнятся на текущей схеме, а форма запросов та же.
+# Константы из storage не подходят - их с тех пор переписали
+BASELINE_HABITS = 'SELECT * FROM habits ORDER BY name'
+
+BASELINE_STARS = '''
+    SELECT SUM(CASE WHEN h.is_good = 1 THEN h.stars ELSE -h.stars END)
+    FROM habit_logs hl
+    JOIN habits h ON hl.habit_id = h.id
+'''
+
+BASELINE_RECENT_BAD = '''
+    SELECT h.name, hl.day, hl.minute
+    FROM habit_logs hl
+    JOIN habits h ON hl.habit_id = h.id
+    WHERE h.is_good = 0
+    ORDER BY hl.day DESC, hl.minute DESC
+    LIMIT ?
+'''
+
+BASELINE_OLDEST_GOOD = '''
+    SELECT h.name, MAX(hl.day * 1440 + hl.minute) as last_done
+    FROM habits h
+    LEFT JOIN habit_logs hl ON h.id = hl.habit_id
+    WHERE h.is_good = 1
+    GROUP BY h.id
+    ORDER BY last_done ASC NULLS FIRST
+    LIMIT ?
+'''
+
+
+def refresh_per_call(path):
+    """Обновление главной страницы так, как было раньше: новое соединение на каждый запрос"""
+    for sql, params in ((BASELINE_HABITS, ()),
+                        (BASELINE_STARS, ()),
+                        (BASELINE_RECENT_BAD, (10,)),
+                        (BASELINE_OLDEST_GOOD, (10,))):
+        conn = sqlite3.connect(path)
+        conn.execute(sql, params).fetchall()
+        conn.close()
+
+
+def refresh_core(core):
+    core.main_page(10)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--habits', type=int, default=50)
+    parser.add_argument('--logs', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'habits.db')
+        print(f'Создаем базу: {args.habits} привычек, {args.logs} логов...')
+        datagen.generate(path, args.habits, args.logs)
+
+        before = measure(lambda: refresh_per_call(path), args.repeat)
+
+        core = HabitsCore.open(path)
+        after = measure(lambda: refresh_core(core), args.repeat)
+        core.close()
+
+        # Худший случай для последних плохих привычек: все логи у хороших,
+        # а плохая привычка ни разу не отмечена
+        path = os.path.join(tmp, 'good_only.db')
+        print(f'Создаем базу только с хорошими логами: {args.logs} логов и одна пустая плохая привычка...')
+        datagen.generate(path, args.habits, args.logs, good_ratio=1.0)
+        core = HabitsCore.open(path)
+        with core.storage.conn:
+            core.storage.conn.execute('INSERT INTO habits (name, is_good, stars) VALUES (?, 0, 1)', ('Плохая',))
+        good_only = measure(lambda: refresh_core(core), args.repeat)
+        core.close()
+
+    print(f'Соединение на запрос: {before:.1f} мс на обновление')
+    print(f'Общее соединение:     {after:.1f} мс на обновление')
+    print(f'Только хорошие логи:  {good_only:.1f} мс на обновление')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Проверка планов запросов: логи должны читаться через индексы, а не полным сканированием
+
+Запуск: make check или python benchmarks/check_query_plans.py (код возврата 1,
+если найдено сканирование). Проверка идет на маленькой базе и занимает
+доли секунды, поэтому ее стоит запускать перед каждым слиянием.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import storage
+from storage import Storage
+
+# Запрос -> параметры и строка плана, которая обязана в нем быть
+EXPECTED = {
+    'SQL_MONTH_LOGS': ((738886, 738916), 'SEARCH hl USING COVERING INDEX idx_habit_logs_day'),
+    # Последние логи каждой плохой привычки по ее индексу, а не обход всех логов
+    'SQL_RECENT_BAD': ((10, 10), 'SEARCH habit_logs USING COVERING INDEX idx_habit_logs_habit'),
+    'SQL_OLDEST_GOOD': ((10,), 'SCAN s USING COVERING INDEX idx_habit_stats_last'),
+    'SQL_LOG_DAY_COUNTS': ((738886, 738916), 'SEARCH habit_logs USING COVERING INDEX idx_habit_logs_day'),
+    'SQL_LOG_DAYS': ((), 'SCAN habit_logs USING COVERING INDEX idx_habit_logs_day'),
+    'SQL_LOG_PAGE_AFTER': ((738886, 600, 5, 100, 100), 'SEARCH hl USING COVERING INDEX idx_habit_logs_day'),
+    'SQL_LOG_PAGE_FROM_DAY': ((738886, 100, 0), 'SEARCH hl USING COVERING INDEX idx_habit_logs_day'),
+    'SQL_HABIT_LOGS_ORDERED': ((1, 738886, 738916), 'SEARCH hl USING COVERING INDEX idx_habit_logs_habit'),
+}
+
+
+# Запросы главной страницы: их время не должно зависеть от числа логов,
+# поэтому даже полный обход индекса логов для них - ошибка
+BOUNDED = {'SQL_RECENT_BAD'}
+
+# Запросы, которые читаются потоком: в их плане не должно быть сортировки
+STREAMED = {'SQL_HABIT_LOGS_ORDERED', 'SQL_LOG_PAGE_AFTER', 'SQL_LOG_PAGE_FROM_DAY'}
+
+
+def query_plan(conn, sql, params):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+
+def main():
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Storage(os.path.join(tmp, 'habits.db'))
+        db.init_schema()
+        for name, (params, expected) in EXPECTED.items():
+            plan = query_plan(db.conn, getattr(storage, name), params)
+            # Полное сканирование таблицы логов - "SCAN hl" или "SCAN habit_logs" без индекса
+            full_scan = any(line.strip() in ('SCAN hl', 'SCAN habit_logs') or
+                            line.startswith(('SCAN hl USING', 'SCAN habit_logs USING')) and name in BOUNDED
+                            for line in plan)
+            # Сортировка во временном B-дереве копит все строки в памяти
+            sorted_in_temp = any('TEMP B-TREE FOR ORDER BY' in line for line in plan)
+            ok = not full_scan and any(expected in line for line in plan)
+            if name in STREAMED:
+                ok = ok and not sorted_in_temp
+            failed = failed or not ok
+            print(f"{'OK  ' if ok else 'FAIL'} {name}")
+            for line in plan:
+                print(f'     {line}')
+        db.close()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
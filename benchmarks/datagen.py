@@ -0,0 +1,70 @@
+"""Генератор синтетических баз для бенчмарков
+
+При одинаковых параметрах база получается одинаковой: случайность задается
+seed, а период отсчитывается от фиксированной даты, а не от сегодняшней.
+
+Запуск: python benchmarks/datagen.py bench.db --habits 200 --logs 1000000 --years 10
+"""
+import argparse
+import os
+import random
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import storage
+from storage import Storage
+
+END_DATE = date(2025, 12, 31)
+
+
+def generate(path, habits=50, logs=100_000, years=5, good_ratio=0.7, seed=42, end_date=END_DATE):
+    """Создать базу: habits привычек и logs логов, равномерно за years лет"""
+    rnd = random.Random(seed)
+    db = Storage(path)
+    db.init_schema(seed=False)
+    with db.conn:
+        db.conn.executemany(storage.SQL_ADD_HABIT, (
+            (f'Привычка {i}', 1 if rnd.random() < good_ratio else 0, rnd.randint(1, 5))
+            for i in range(habits)
+        ))
+    habit_ids = [row[0] for row in db.conn.execute('SELECT id FROM habits ORDER BY id')]
+
+    # Дни хранятся номерами (date.toordinal()), время - минутой суток
+    last = end_date.toordinal()
+    days = range(last - years * 365 + 1, last + 1)
+    minutes = range(storage.MINUTES_PER_DAY)
+
+    batch_size = 100_000
+    for offset in range(0, logs, batch_size):
+        count = min(batch_size, logs - offset)
+        with db.conn:
+            db.conn.executemany(storage.SQL_ADD_LOG, (
+                (rnd.choice(habit_ids), rnd.choice(days), rnd.choice(minutes))
+                for _ in range(count)
+            ))
+    db.conn.execute('ANALYZE')
+    db.close()
+
+
+def add_arguments(parser):
+    parser.add_argument('--habits', type=int, default=50)
+    parser.add_argument('--logs', type=int, default=100_000)
+    parser.add_argument('--years', type=int, default=5)
+    parser.add_argument('--good-ratio', type=float, default=0.7, help='доля хороших привычек')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path')
+    add_arguments(parser)
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        parser.error(f'{args.path} уже существует')
+    generate(args.path, args.habits, args.logs, args.years, args.good_ratio, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""Набор бенчмарков на синтетической базе
+
+Генерирует базу (или берет готовую через --db), прогоняет сценарии и пишет
+результаты в JSON, который можно сравнить с прошлым прогоном:
+
+    python benchmarks/run.py --logs 1000000 --output results.json
+    python benchmarks/run.py --logs 1000000 --compare results.json
+
+Сценарий отрисовки календаря (--tk) требует дисплея; на сервере его
+можно запустить под виртуальным: xvfb-run python benchmarks/run.py --tk
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from itertools import cycle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import datagen
+from habit_index import HabitIndex
+from habits_core import HabitsCore, month_bounds
+from month_cache import shift_month
+
+NOTE_TEXT = 'Заметка для бенчмарка. ' * 500
+# Сохранение одинакового текста ничего не пишет, поэтому тексты чередуются:
+# каждая итерация - новая версия с дельтой (или снимком) и сжатием
+NOTE_TEXTS = (
+    NOTE_TEXT,
+    NOTE_TEXT + '\nДописанная строка.',
+    'Новое начало.\n' + NOTE_TEXT,
+)
+
+
+def scenarios(core, end_date):
+    """Сценарии: название -> функция без аргументов"""
+    months = [shift_month(end_date.year, end_date.month, -i) for i in range(24)]
+    month_iter = iter(())
+    note_texts = cycle(NOTE_TEXTS)
+
+    def calendar_month():
+        nonlocal month_iter
+        month = next(month_iter, None)
+        if month is None:
+            month_iter = iter(months)
+            month = next(month_iter)
+        core.logs.month_by_day(*month)
+
+    habits = core.habits.all()
+    habit_id = habits[0][0]
+    index = HabitIndex(habits)
+    # Ввод по буквам начала названия, как в поле выбора привычки
+    typed = [habits[len(habits) // 2][1][:n] for n in range(1, 4)]
+    log_date = date.fromordinal(month_bounds(end_date.year, end_date.month)[1]).isoformat()
+
+    # История: переход к произвольной странице и листание подряд
+    pages = max(1, core.history.count() // core.history.PAGE_SIZE)
+    jumps = iter(())
+    next_page = 0
+
+    def history_jump():
+        nonlocal jumps
+        number = next(jumps, None)
+        if number is None:
+            jumps = iter(range(pages // 7, pages, max(1, pages // 7)))
+            number = next(jumps)
+        # Без ключа предыдущей страницы - через оглавление по дням
+        core.history._after.pop(number, None)
+        core.history.page(number)
+
+    def history_next():
+        nonlocal next_page
+        core.history.page(next_page)
+        next_page = (next_page + 1) % pages
+
+    return {
+        'load_stars': core.stats.total_stars,
+        'stars_full_recompute': lambda: core.storage.check_stars(),
+        'recent_bad_habits': lambda: core.stats.recent_bad(10),
+        'oldest_good_habits': lambda: core.stats.oldest_good(10),
+        'habit_stats_page': lambda: core.stats.habits(),
+        'analytics_10_years': lambda: core.analytics.overview(None, 10, 'week', end_date),
+        'calendar_month_query_and_grouping': calendar_month,
+        'history_page_jump': history_jump,
+        'history_page_next': history_next,
+        'habit_index_build': lambda: HabitIndex(habits),
+        'habit_search_typing': lambda: [index.search(text, limit=100) for text in typed],
+        'add_habit_log': lambda: core.logs.add(habit_id, log_date, '12:00'),
+        'notes_save': lambda: core.notes.save(next(note_texts)),
+        'notes_load': core.notes.latest,
+    }
+
+
+def tk_scenarios(core, end_date):
+    """Сценарии отрисовки; пустой словарь, если дисплея нет"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f'Сценарии Tk пропущены: {e}', file=sys.stderr)
+        return {}
+    from calendar_view import CalendarView
+
+    root.geometry('1100x750')
+    view = CalendarView(root)
+    view.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    months = [shift_month(end_date.year, end_date.month, -i) for i in range(12)]
+    grouped = [(y, m, core.logs.month_by_day(y, m)) for y, m in months]
+    position = 0
+
+    def calendar_render():
+        nonlocal position
+        year, month, logs_by_day = grouped[position % len(grouped)]
+        position += 1
+        view.show_month(year, month, logs_by_day)
+        root.update_idletasks()
+
+    return {'calendar_render': calendar_render}
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        'min_ms': round(timings[0], 4),
+        'runs': repeat,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Сравнить с прошлым прогоном; True, если есть регрессия"""
+    with open(baseline_path, encoding='utf-8') as file:
+        baseline = json.load(file)['results']
+    regressed = False
+    print(f'\nСравнение с {baseline_path} (порог x{threshold}):')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result['median_ms'] / baseline[name]['median_ms'] if baseline[name]['median_ms'] else 1.0
+        mark = 'РЕГРЕССИЯ' if ratio > threshold else ''
+        regressed = regressed or ratio > threshold
+        print(f'  {name:36} {baseline[name]["median_ms"]:10.3f} -> {result["median_ms"]:10.3f} мс  x{ratio:.2f} {mark}')
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', help='готовая база; по умолчанию генерируется временная')
+    datagen.add_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--only', action='append', help='запустить только этот сценарий (можно повторять)')
+    parser.add_argument('--tk', action='store_true', help='добавить сценарии отрисовки Tk')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='прошлые результаты для сравнения')
+    parser.add_argument('--threshold', type=float, default=1.2, help='допустимое замедление медианы')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db
+        if not path:
+            path = os.path.join(tmp, 'bench.db')
+            print(f'Генерация базы: {args.habits} привычек, {args.logs} логов за {args.years} лет...',
+                  file=sys.stderr)
+            started = time.perf_counter()
+            datagen.generate(path, args.habits, args.logs, args.years, args.good_ratio, args.seed)
+            print(f'  {time.perf_counter() - started:.1f} с', file=sys.stderr)
+
+        core = HabitsCore.open(path)
+        core.init_schema()
+        cases = scenarios(core, datagen.END_DATE)
+        if args.tk:
+            cases.update(tk_scenarios(core, datagen.END_DATE))
+
+        results = {}
+        for name, func in cases.items():
+            if args.only and name not in args.only:
+                continue
+            results[name] = measure(func, args.repeat)
+            print(f'{name:38} медиана {results[name]["median_ms"]:10.3f} мс   p95 {results[name]["p95_ms"]:10.3f} мс')
+        core.close()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git': git_revision(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'dataset': None if args.db else {
+                'habits': args.habits, 'logs': args.logs, 'years': args.years,
+                'good_ratio': args.good_ratio, 'seed': args.seed,
+            },
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Аналитика по длинной истории логов: тепловая карта и тренды
+
+Логи загружаются один раз в колонки одинаковой длины: день (ordinal),
+минута дня, id привычки и звезды со знаком. Дальше все агрегаты
+считаются по колонкам целиком - np.bincount и cumsum вместо цикла по
+строкам. Если NumPy не установлен, те же функции работают на array и
+циклах Python: медленнее, но с тем же результатом.
+"""
+from array import array
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# date(1970, 1, 1).toordinal(): сдвиг между ordinal и datetime64[D]
+EPOCH_ORDINAL = 719163
+
+LEVELS = 5  # Уровни яркости тепловой карты: 0 - нет логов, 4 - максимум
+PERIODS = ("week", "month")
+
+
+class LogColumns:
+    """Логи в колонках: days, minutes, habit_ids, signed"""
+
+    def __init__(self, days, minutes, habit_ids, signed):
+        self.days = days
+        self.minutes = minutes
+        self.habit_ids = habit_ids
+        self.signed = signed
+        self._span = None
+
+    def __len__(self):
+        return len(self.days)
+
+    def span(self):
+        """Первый и последний день среди логов; None, если логов нет"""
+        if self._span is None and len(self):
+            if np is not None:
+                self._span = (int(self.days.min()), int(self.days.max()))
+            else:
+                self._span = (min(self.days), max(self.days))
+        return self._span
+
+    @classmethod
+    def from_batches(cls, batches):
+        """Собрать колонки из пачек строк (день, минута, привычка, звезды со знаком)"""
+        if np is not None:
+            blocks = [np.array(batch, dtype=np.int32) for batch in batches]
+            table = np.concatenate(blocks) if blocks else np.empty((0, 4), dtype=np.int32)
+            return cls(*(np.ascontiguousarray(table[:, i]) for i in range(4)))
+
+        columns = [array("i") for _ in range(4)]
+        for batch in batches:
+            for column, values in zip(columns, zip(*batch)):
+                column.extend(values)
+        return cls(*columns)
+
+
+def select(columns, habit_id=None, start=None, end=None):
+    """Логи одной привычки и/или периода; start и end - ordinal, включительно"""
+    # Границы, которые не отсекают ни одного лога, не проверяем
+    span = columns.span()
+    if span is None:
+        return columns
+    if start is not None and start <= span[0]:
+        start = None
+    if end is not None and end >= span[1]:
+        end = None
+    if habit_id is None and start is None and end is None:
+        return columns
+
+    if np is not None:
+        mask = np.ones(len(columns), dtype=bool)
+        if habit_id is not None:
+            mask &= columns.habit_ids == habit_id
+        if start is not None:
+            mask &= columns.days >= start
+        if end is not None:
+            mask &= columns.days <= end
+        return LogColumns(columns.days[mask], columns.minutes[mask],
+                          columns.habit_ids[mask], columns.signed[mask])
+
+    start = -1 if start is None else start
+    end = float("inf") if end is None else end
+    keep = [i for i, (day, habit) in enumerate(zip(columns.days, columns.habit_ids))
+            if start <= day <= end and (habit_id is None or habit == habit_id)]
+    return LogColumns(*(array("i", (column[i] for i in keep))
+                        for column in (columns.days, columns.minutes, columns.habit_ids, columns.signed)))
+
+
+def day_counts(columns, start, end):
+    """Количество логов по дням от start до end (ordinal) включительно.
+
+    Логи должны быть уже отобраны по этому периоду через select.
+    """
+    length = end - start + 1
+    if np is not None:
+        return np.bincount(columns.days - start, minlength=length)[:length]
+
+    counts = [0] * length
+    for day in columns.days:
+        if 0 <= day - start < length:
+            counts[day - start] += 1
+    return counts
+
+
+def heat_levels(counts):
+    """Уровни яркости 0..LEVELS-1 относительно самого загруженного дня"""
+    steps = LEVELS - 1
+    if np is not None:
+        top = int(counts.max()) if len(counts) else 0
+        if not top:
+            return [0] * len(counts)
+        return np.ceil(counts * (steps / top)).astype(np.int8).tolist()
+
+    top = max(counts, default=0)
+    if not top:
+        return [0] * len(counts)
+    return [-(-count * steps // top) for count in counts]
+
+
+def period_key(ordinal, period):
+    """Номер недели (с понедельника) или месяца для дня"""
+    if period == "week":
+        # Ordinal 1 - понедельник 1 января 1 года
+        return (ordinal - 1) // 7
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+def period_start(key, period):
+    """Первый день периода"""
+    if period == "week":
+        return date.fromordinal(key * 7 + 1)
+    return date(key // 12, key % 12 + 1, 1)
+
+
+def _period_index(days, start, end, period):
+    """Номер периода каждого лога, считая от периода дня start"""
+    first = period_key(start, period)
+    if np is not None:
+        if period == "week":
+            return (days - 1) // 7 - first
+        # Таблица "день -> месяц" на весь период, затем одна выборка по ней
+        offsets = np.arange(end - start + 1)
+        months = (offsets + (start - EPOCH_ORDINAL)).astype("datetime64[D]").astype("datetime64[M]")
+        table = months.astype(np.int64) + 1970 * 12 - first
+        return table[days - start]
+
+    if period == "week":
+        return [(day - 1) // 7 - first for day in days]
+    table = [period_key(day, period) - first for day in range(start, end + 1)]
+    return [table[day - start] for day in days]
+
+
+def trends(columns, start, end, period="week"):
+    """Тренды по неделям или месяцам периода start..end (ordinal).
+
+    Возвращает словарь списков одинаковой длины: periods (первый день
+    периода), good и bad (количество логов), stars (звезды за период),
+    cumulative (нарастающий итог звезд) и ratio (доля хороших логов,
+    None для периода без логов).
+    """
+    if period not in PERIODS:
+        raise ValueError(f"unknown period: {period}")
+    first = period_key(start, period)
+    length = period_key(end, period) - first + 1
+    index = _period_index(columns.days, start, end, period)
+
+    if np is not None:
+        # Хорошие и плохие логи считаются одним bincount: пара (период, знак)
+        pairs = np.bincount(index * 2 + (columns.signed > 0), minlength=length * 2)
+        bad, good = pairs[:length * 2].reshape(length, 2).T
+        stars = np.bincount(index, weights=columns.signed, minlength=length)[:length].astype(np.int64)
+        total = good + bad
+        ratio = np.divide(good, total, out=np.full(length, np.nan), where=total > 0)
+        cumulative = np.cumsum(stars).tolist()
+        good, bad, stars = good.tolist(), bad.tolist(), stars.tolist()
+        ratio = [None if value != value else value for value in ratio.tolist()]
+    else:
+        good, bad, stars = [0] * length, [0] * length, [0] * length
+        for position, signed in zip(index, columns.signed):
+            if signed > 0:
+                good[position] += 1
+            else:
+                bad[position] += 1
+            stars[position] += signed
+        cumulative, running = [], 0
+        for value in stars:
+            running += value
+            cumulative.append(running)
+        ratio = [g / (g + b) if g + b else None for g, b in zip(good, bad)]
+
+    return {
+        "periods": [period_start(first + i, period) for i in range(length)],
+        "good": good,
+        "bad": bad,
+        "stars": stars,
+        "cumulative": cumulative,
+        "ratio": ratio,
+    }
@@ -0,0 +1,154 @@
+import tkinter as tk
+from datetime import date
+
+LEVEL_COLORS = ["#ebedf0", "#c6e48b", "#7bc96f", "#239a3b", "#196127"]
+WEEKDAYS = ["Пн", "", "Ср", "", "Пт", "", ""]
+
+MARGIN = 40
+MAX_CELL = 14
+YEAR_TITLE = 20
+CHART_HEIGHT = 130
+CHART_GAP = 40
+
+GOOD_COLOR = "#27ae60"
+BAD_COLOR = "#e74c3c"
+RATIO_COLOR = "#3498db"
+STARS_COLOR = "#f39c12"
+
+
+class AnalyticsView:
+    """Тепловая карта по годам и графики трендов на одном Canvas.
+
+    Клетки тепловой карты создаются один раз и переиспользуются: при
+    новых данных меняются только их цвет и положение. Каждый график -
+    несколько линий, по одному элементу Canvas на серию.
+    """
+
+    def __init__(self, parent):
+        self.frame = tk.Frame(parent, bg="white", bd=2, relief=tk.RAISED)
+        self.canvas = tk.Canvas(self.frame, bg="white", highlightthickness=0)
+        scrollbar = tk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # Пул клеток тепловой карты
+        self.cells = []
+        self.data = None
+        self.width = 0
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.canvas.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def show(self, data):
+        """Показать данные AnalyticsService.overview"""
+        self.data = data
+        self._draw()
+
+    def _on_resize(self, event):
+        if event.width != self.width:
+            self.width = event.width
+            self._draw()
+
+    def _draw(self):
+        self.canvas.delete("chart")
+        if self.data is None or self.width <= MARGIN * 2:
+            return
+
+        top = self._draw_heatmap(10)
+        trends = self.data["trends"]
+        periods = trends["periods"]
+        top = self._draw_chart(top, "Логи за период", periods,
+                               [(trends["good"], GOOD_COLOR), (trends["bad"], BAD_COLOR)])
+        top = self._draw_chart(top, "Доля хороших логов", periods,
+                               [(trends["ratio"], RATIO_COLOR)], low=0, high=1, label="{:.0%}")
+        top = self._draw_chart(top, "Звезды нарастающим итогом", periods,
+                               [(trends["cumulative"], STARS_COLOR)])
+        self.canvas.configure(scrollregion=(0, 0, self.width, top))
+
+    def _draw_heatmap(self, top):
+        """Годы сверху вниз, от нового к старому; возвращает нижнюю границу"""
+        start, end, levels = self.data["start"], self.data["end"], self.data["levels"]
+        cell = min(MAX_CELL, (self.width - MARGIN - 10) / 53)
+        used = 0
+
+        for year in range(date.fromordinal(end).year, date.fromordinal(start).year - 1, -1):
+            self.canvas.create_text(MARGIN, top, text=str(year), anchor="nw",
+                                    font=("Arial", 10, "bold"), fill="#2c3e50", tags="chart")
+            top += YEAR_TITLE
+            for row, label in enumerate(WEEKDAYS):
+                if label:
+                    self.canvas.create_text(MARGIN - 6, top + row * cell + cell / 2, text=label, anchor="e",
+                                            font=("Arial", 7), fill="#7f8c8d", tags="chart")
+
+            first = max(date(year, 1, 1).toordinal(), start)
+            last = min(date(year, 12, 31).toordinal(), end)
+            # Первый столбец - неделя, в которую попадает 1 января
+            monday = date(year, 1, 1).toordinal() - date(year, 1, 1).weekday()
+            for day in range(first, last + 1):
+                column, row = divmod(day - monday, 7)
+                x0 = MARGIN + column * cell
+                y0 = top + row * cell
+                self._place_cell(used, x0, y0, x0 + cell - 1, y0 + cell - 1, LEVEL_COLORS[levels[day - start]])
+                used += 1
+            top += 7 * cell + 10
+
+        # Лишние клетки пула прячем
+        for rect in self.cells[used:]:
+            self.canvas.itemconfigure(rect, state="hidden")
+        return top
+
+    def _place_cell(self, index, x0, y0, x1, y1, color):
+        if index == len(self.cells):
+            self.cells.append(self.canvas.create_rectangle(0, 0, 0, 0, outline=""))
+        rect = self.cells[index]
+        self.canvas.coords(rect, x0, y0, x1, y1)
+        self.canvas.itemconfigure(rect, fill=color, state="normal")
+
+    def _draw_chart(self, top, title, periods, series, low=None, high=None, label="{:g}"):
+        """График линий; None в значениях - разрыв линии. Возвращает нижнюю границу"""
+        top += CHART_GAP
+        left, right = MARGIN, self.width - 20
+        bottom = top + CHART_HEIGHT
+        self.canvas.create_text(left, top - 8, text=title, anchor="sw",
+                                font=("Arial", 10, "bold"), fill="#2c3e50", tags="chart")
+        self.canvas.create_rectangle(left, top, right, bottom, outline="#dddddd", tags="chart")
+
+        values = [v for values, _ in series for v in values if v is not None]
+        if not periods or not values:
+            return bottom
+        low = min(values) if low is None else low
+        high = max(values) if high is None else high
+        span = (high - low) or 1
+        step = (right - left) / max(1, len(periods) - 1)
+
+        for values, color in series:
+            points = []
+            for i, value in enumerate(values):
+                if value is None:
+                    self._draw_line(points, color)
+                    points = []
+                    continue
+                points.extend((left + i * step, bottom - (value - low) / span * CHART_HEIGHT))
+            self._draw_line(points, color)
+
+        # Подписи осей: границы значений и первый/последний период
+        for value, y in ((high, top), (low, bottom)):
+            self.canvas.create_text(left - 4, y, text=label.format(value), anchor="e",
+                                    font=("Arial", 7), fill="#7f8c8d", tags="chart")
+        for period, x, anchor in ((periods[0], left, "nw"), (periods[-1], right, "ne")):
+            self.canvas.create_text(x, bottom + 3, text=period.strftime("%d.%m.%Y"), anchor=anchor,
+                                    font=("Arial", 7), fill="#7f8c8d", tags="chart")
+        return bottom + 12
+
+    def _draw_line(self, points, color):
+        if len(points) >= 4:
+            self.canvas.create_line(*points, fill=color, width=2, tags="chart")
+        elif len(points) == 2:
+            x, y = points
+            self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill=color, outline="", tags="chart")
@@ -0,0 +1,182 @@
+import tkinter as tk
+import calendar
+from datetime import date
+
+WEEKDAYS = ["ПОНЕДЕЛЬНИК", "ВТОРНИК", "СРЕДА", "ЧЕТВЕРГ", "ПЯТНИЦА", "СУББОТА", "ВОСКРЕСЕНЬЕ"]
+
+WEEKS = 6  # Максимум 6 недель в месяце
+CELLS = WEEKS * 7
+HEADER_HEIGHT = 36
+DAY_HEIGHT = 25
+ROW_HEIGHT = 18
+CHAR_WIDTH = 6  # Примерная ширина символа шрифта Arial 8
+
+GOOD_BG, GOOD_FG = "#d5f4e6", "#27ae60"
+BAD_BG, BAD_FG = "#fadbd8", "#e74c3c"
+MISSED_BG, MISSED_FG = "#f2f3f4", "#95a5a6"  # Пропуск по расписанию
+
+
+class _Cell:
+    """Элементы Canvas одной ячейки дня"""
+
+    def __init__(self, canvas):
+        self.bg = canvas.create_rectangle(0, 0, 0, 0, fill="#f9f9f9", outline="#cccccc")
+        self.header = canvas.create_rectangle(0, 0, 0, 0, fill="white", outline="")
+        self.day = canvas.create_text(0, 0, text="", font=("Arial", 10, "bold"), fill="#2c3e50")
+        self.more = canvas.create_text(0, 0, text="", anchor="e", font=("Arial", 7), fill="#7f8c8d")
+        # Строки с привычками: пары (прямоугольник, текст)
+        self.slots = []
+
+
+class CalendarView:
+    """Календарь месяца на одном Canvas.
+
+    Все ячейки и записи - элементы одного холста, созданные один раз.
+    При смене месяца меняются только текст и цвета, поэтому время
+    перерисовки не зависит от количества логов. В каждой ячейке видно
+    столько записей, сколько помещается; остальные листаются колесом мыши.
+    """
+
+    def __init__(self, parent, today_bg="#e8f4fd"):
+        self.today_bg = today_bg
+        self.canvas = tk.Canvas(parent, bg="white", highlightthickness=0, bd=2, relief=tk.RAISED)
+
+        self.headers = []
+        for day in WEEKDAYS:
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, fill="#e0e0e0", outline="#bbbbbb")
+            text = self.canvas.create_text(0, 0, text=day, font=("Arial", 9, "bold"), fill="#333333")
+            self.headers.append((rect, text))
+
+        self.cells = [_Cell(self.canvas) for _ in range(CELLS)]
+
+        # Содержимое и положение прокрутки каждой ячейки
+        self.days = [None] * CELLS
+        self.entries = [[] for _ in range(CELLS)]
+        self.offsets = [0] * CELLS
+        self.today = None
+
+        self.cell_w = 0
+        self.cell_h = 0
+        self.rows = 0
+
+        self.canvas.bind("<Configure>", self._on_resize)
+        self.canvas.bind("<MouseWheel>", self._on_wheel)
+        self.canvas.bind("<Button-4>", lambda e: self._scroll_at(e.x, e.y, -1))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll_at(e.x, e.y, 1))
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def show_month(self, year, month, logs_by_day, today=None):
+        """Показать месяц; logs_by_day: день -> список (текст, is_good; None - пропуск)"""
+        self.today = today or date.today()
+        first_day_weekday = date(year, month, 1).weekday()
+        days_in_month = calendar.monthrange(year, month)[1]
+
+        for index in range(CELLS):
+            day = index - first_day_weekday + 1
+            if 1 <= day <= days_in_month:
+                self.days[index] = date(year, month, day)
+                self.entries[index] = logs_by_day.get(day, [])
+            else:
+                self.days[index] = None
+                self.entries[index] = []
+            self.offsets[index] = 0
+            self._draw_cell(index)
+
+    def _on_resize(self, event):
+        width, height = event.width, event.height
+        self.cell_w = width / 7
+        self.cell_h = max(0, (height - HEADER_HEIGHT) / WEEKS)
+        self.rows = max(0, int((self.cell_h - DAY_HEIGHT - 4) // ROW_HEIGHT))
+
+        for col, (rect, text) in enumerate(self.headers):
+            x0 = col * self.cell_w
+            self.canvas.coords(rect, x0 + 1, 1, x0 + self.cell_w - 1, HEADER_HEIGHT - 1)
+            self.canvas.coords(text, x0 + self.cell_w / 2, HEADER_HEIGHT / 2)
+
+        for index, cell in enumerate(self.cells):
+            # Пул строк растет только при увеличении окна
+            while len(cell.slots) < self.rows:
+                cell.slots.append((
+                    self.canvas.create_rectangle(0, 0, 0, 0, state="hidden"),
+                    self.canvas.create_text(0, 0, text="", anchor="w", font=("Arial", 8), state="hidden")
+                ))
+            self._place_cell(index)
+            self._draw_cell(index)
+
+    def _place_cell(self, index):
+        cell = self.cells[index]
+        x0 = (index % 7) * self.cell_w
+        y0 = HEADER_HEIGHT + (index // 7) * self.cell_h
+        x1 = x0 + self.cell_w
+        self.canvas.coords(cell.bg, x0 + 1, y0 + 1, x1 - 1, y0 + self.cell_h - 1)
+        self.canvas.coords(cell.header, x0 + 2, y0 + 2, x1 - 2, y0 + DAY_HEIGHT)
+        self.canvas.coords(cell.day, x0 + self.cell_w / 2, y0 + DAY_HEIGHT / 2 + 1)
+        self.canvas.coords(cell.more, x1 - 4, y0 + DAY_HEIGHT / 2 + 1)
+        for row, (rect, text) in enumerate(cell.slots):
+            top = y0 + DAY_HEIGHT + 2 + row * ROW_HEIGHT
+            self.canvas.coords(rect, x0 + 3, top, x1 - 3, top + ROW_HEIGHT - 2)
+            self.canvas.coords(text, x0 + 7, top + (ROW_HEIGHT - 2) / 2)
+
+    def _draw_cell(self, index):
+        cell = self.cells[index]
+        day = self.days[index]
+        config = self.canvas.itemconfigure
+
+        if day is None:
+            # Пустая ячейка
+            config(cell.bg, fill="#f9f9f9")
+            config(cell.header, state="hidden")
+            config(cell.day, text="")
+            config(cell.more, text="")
+            for rect, text in cell.slots:
+                config(rect, state="hidden")
+                config(text, state="hidden")
+            return
+
+        day_bg = self.today_bg if day == self.today else "white"
+        config(cell.bg, fill="white")
+        config(cell.header, fill=day_bg, state="normal")
+        config(cell.day, text=str(day.day))
+
+        entries = self.entries[index]
+        offset = self.offsets[index]
+        visible = entries[offset:offset + self.rows]
+        max_chars = max(1, int((self.cell_w - 12) // CHAR_WIDTH))
+
+        for row, (rect, text) in enumerate(cell.slots):
+            if row < len(visible):
+                label, is_good = visible[row]
+                if is_good is None:
+                    bg, fg = MISSED_BG, MISSED_FG
+                else:
+                    bg, fg = (GOOD_BG, GOOD_FG) if is_good == 1 else (BAD_BG, BAD_FG)
+                config(rect, fill=bg, outline=fg, state="normal")
+                config(text, text=label[:max_chars], fill=fg, state="normal")
+            else:
+                config(rect, state="hidden")
+                config(text, state="hidden")
+
+        # Индикатор прокрутки, если записи не помещаются
+        if len(entries) > len(visible):
+            config(cell.more, text=f"{offset + 1}-{offset + len(visible)}/{len(entries)}")
+        else:
+            config(cell.more, text="")
+
+    def _on_wheel(self, event):
+        self._scroll_at(event.x, event.y, -1 if event.delta > 0 else 1)
+
+    def _scroll_at(self, x, y, step):
+        if not self.cell_w or not self.cell_h or y < HEADER_HEIGHT:
+            return
+        col = int(x // self.cell_w)
+        row = int((y - HEADER_HEIGHT) // self.cell_h)
+        if not (0 <= col < 7 and 0 <= row < WEEKS):
+            return
+        index = row * 7 + col
+        max_offset = max(0, len(self.entries[index]) - self.rows)
+        offset = min(max(self.offsets[index] + step, 0), max_offset)
+        if offset != self.offsets[index]:
+            self.offsets[index] = offset
+            self._draw_cell(index)
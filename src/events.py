@@ -0,0 +1,117 @@
+"""События об изменениях в базе для страниц интерфейса
+
+Код, который записал что-то в базу, публикует событие о том, что именно
+изменилось. Страницы подписываются на шину и по событиям сбрасывают
+только затронутые кэши и виджеты. События, опубликованные подряд,
+доставляются одной пачкой в after_idle: сколько бы записей ни пришло за
+один проход цикла Tk, каждая страница перерисуется один раз.
+"""
+import traceback
+
+
+class LogAdded:
+    """Добавлен лог привычки habit_id за дату 'YYYY-MM-DD'"""
+
+    def __init__(self, habit_id, date):
+        self.habit_id = habit_id
+        self.date = date
+
+
+class LogsAdded:
+    """Пакет логов: каждая привычка из habit_ids за каждую дату из dates"""
+
+    def __init__(self, habit_ids, dates):
+        self.habit_ids = habit_ids
+        self.dates = dates
+
+
+class LogsRemoved:
+    """Удалены логи привычек habit_ids за даты dates (отмена добавления)"""
+
+    def __init__(self, habit_ids, dates):
+        self.habit_ids = habit_ids
+        self.dates = dates
+
+
+class HabitCreated:
+    def __init__(self, habit_id, name, is_good, stars):
+        self.habit_id = habit_id
+        self.name = name
+        self.is_good = is_good
+        self.stars = stars
+
+
+class HabitDeleted:
+    """Удалена привычка вместе с логами; months - месяцы ('YYYY-MM') ее логов"""
+
+    def __init__(self, habit_id, months):
+        self.habit_id = habit_id
+        self.months = months
+
+
+class StarsChanged:
+    def __init__(self, habit_id, stars):
+        self.habit_id = habit_id
+        self.stars = stars
+
+
+class ScheduleChanged:
+    """Задано или убрано расписание привычки"""
+
+    def __init__(self, habit_id):
+        self.habit_id = habit_id
+
+
+class NotesChanged:
+    """Текст заметок изменился не из поля ввода (отмена или повтор правки)"""
+
+
+class LogsImported:
+    """Импорт логов: мог затронуть любые месяцы, created_habits - новых привычек"""
+
+    def __init__(self, created_habits=0):
+        self.created_habits = created_habits
+
+
+def habits_touched(events):
+    """Изменился ли набор привычек или их свойства"""
+    return any(isinstance(e, (HabitCreated, HabitDeleted, StarsChanged))
+               or isinstance(e, LogsImported) and e.created_habits
+               for e in events)
+
+
+def logs_touched(events):
+    """Изменились ли логи"""
+    return any(isinstance(e, (LogAdded, LogsAdded, LogsRemoved, HabitDeleted, LogsImported)) for e in events)
+
+
+class EventBus:
+    """Шина событий в главном потоке Tk.
+
+    publish копит события, а подписчики handler(events) вызываются один
+    раз на пачку в порядке подписки. Ошибка одного подписчика печатается
+    и не мешает остальным получить ту же пачку.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.handlers = []
+        self.pending = []
+        self.job = None
+
+    def subscribe(self, handler):
+        self.handlers.append(handler)
+
+    def publish(self, event):
+        self.pending.append(event)
+        if self.job is None:
+            self.job = self.root.after_idle(self._deliver)
+
+    def _deliver(self):
+        self.job = None
+        events, self.pending = self.pending, []
+        for handler in self.handlers:
+            try:
+                handler(events)
+            except Exception:
+                traceback.print_exc()
@@ -0,0 +1,106 @@
+import queue
+import threading
+import traceback
+
+
+class Ticket:
+    """Заявка на выполнение работы с базой"""
+
+    def __init__(self, func, callback, errback, tag, generation):
+        self.func = func
+        self.callback = callback
+        self.errback = errback
+        self.tag = tag
+        self.generation = generation
+
+
+class QueryExecutor:
+    """Выполняет всю работу с базой в отдельном потоке.
+
+    Контекст (например HabitsCore со своим соединением) создается фабрикой
+    open_context прямо в рабочем потоке. func(context) вызывается в этом
+    потоке, а callback(result) или errback(error) - в главном потоке Tk: результаты
+    забираются из очереди опросом через root.after, пока есть незавершенные
+    заявки. Заявки выполняются строго по порядку подачи.
+
+    Заявки страницы помечаются тегом; cancel(tag) отбрасывает все еще не
+    доставленные результаты с этим тегом, например когда пользователь
+    ушел со страницы.
+    """
+
+    POLL_MS = 15
+
+    def __init__(self, root, open_context, on_error=None):
+        self.root = root
+        self.on_error = on_error
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._generations = {}
+        self._pending = 0
+        self._polling = False
+        self._thread = threading.Thread(target=self._run, args=(open_context,), daemon=True)
+        self._thread.start()
+
+    def submit(self, func, callback=None, errback=None, tag=None):
+        ticket = Ticket(func, callback, errback, tag, self._generations.get(tag, 0))
+        self._pending += 1
+        self._requests.put(ticket)
+        self._schedule_poll()
+        return ticket
+
+    def cancel(self, tag):
+        """Отбросить результаты всех поданных ранее заявок с тегом"""
+        self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def close(self):
+        """Дождаться выполнения поданных заявок и закрыть соединение"""
+        self._requests.put(None)
+        self._thread.join()
+
+    def _run(self, open_context):
+        context = open_context()
+        try:
+            while True:
+                ticket = self._requests.get()
+                if ticket is None:
+                    break
+                try:
+                    result = ticket.func(context)
+                except Exception as e:
+                    self._results.put((ticket, False, e))
+                else:
+                    self._results.put((ticket, True, result))
+        finally:
+            context.close()
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                ticket, ok, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if ticket.generation != self._generations.get(ticket.tag, 0):
+                continue
+            # Ошибка в одном обработчике не должна останавливать опрос:
+            # иначе остальные результаты так и не будут доставлены
+            try:
+                if ok:
+                    if ticket.callback:
+                        ticket.callback(value)
+                elif ticket.errback:
+                    ticket.errback(value)
+                elif self.on_error:
+                    self.on_error(value)
+                else:
+                    traceback.print_exception(value)
+            except Exception:
+                traceback.print_exc()
+        if self._pending:
+            self._schedule_poll()
@@ -0,0 +1,158 @@
+"""Потоковый экспорт логов, привычек и заметок
+
+Логи читаются из базы пачками через fetchmany и сразу пишутся в файл,
+поэтому память не зависит от размера базы. Модуль не использует tkinter
+и запускается без графического интерфейса, например из cron:
+
+    python src/manage.py export logs.csv --from 2024-01-01 --to 2024-12-31
+"""
+import csv
+import json
+import struct
+import sys
+import zlib
+from array import array
+from datetime import date
+
+FORMATS = ("csv", "jsonl", "columnar")
+
+LOG_FIELDS = ("date", "time", "habit", "is_good", "stars")
+HABIT_FIELDS = ("id", "name", "is_good", "stars", "created_at")
+NOTE_FIELDS = ("version", "created_at", "content")
+
+# Колоночный формат: заголовок с метаданными в JSON, затем блоки по
+# пачке строк; каждая колонка блока - сжатый zlib массив little-endian
+COLUMNAR_MAGIC = b"HABITLOG1\n"
+COLUMNS = (("habit_id", "i"), ("day", "i"), ("minute", "h"))
+
+
+def detect_format(path):
+    if path.endswith(".jsonl"):
+        return "jsonl"
+    if path.endswith(".hlog"):
+        return "columnar"
+    return "csv"
+
+
+def _write_rows(file, fmt, fields, batches):
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        for batch in batches:
+            writer.writerows(batch)
+            count += len(batch)
+    else:
+        for batch in batches:
+            for row in batch:
+                file.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False))
+                file.write("\n")
+            count += len(batch)
+    return count
+
+
+# Строка времени для каждой минуты суток
+TIMES = [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)]
+
+
+def _log_rows(batches):
+    """Пачки логов в виде строк экспорта"""
+    dates = {}
+    for batch in batches:
+        rows = []
+        for _, habit_id, name, is_good, stars, day, minute in batch:
+            log_date = dates.get(day)
+            if log_date is None:
+                log_date = dates[day] = date.fromordinal(day).isoformat()
+            rows.append((log_date, TIMES[minute], name, is_good, stars))
+        yield rows
+        # Кэш дат ограничен, чтобы память не росла на многолетних базах
+        if len(dates) > 10000:
+            dates.clear()
+
+
+def resolve_habits(storage, habits):
+    """id привычек по названиям; ValueError с названиями неизвестных привычек"""
+    names = storage.habit_ids_by_name()
+    unknown = [name for name in habits if name not in names]
+    if unknown:
+        raise ValueError("неизвестные привычки: " + ", ".join(unknown))
+    return [names[name] for name in habits]
+
+
+def export_logs(storage, file, fmt="csv", start=None, end=None, habits=None):
+    """Выгрузить логи в открытый файл; возвращает количество строк.
+
+    start и end - даты 'YYYY-MM-DD' (включительно), habits - названия привычек
+    (ValueError, если какой-то нет). Для колоночного формата файл должен
+    быть открыт в двоичном режиме.
+    """
+    habit_ids = resolve_habits(storage, habits) if habits else None
+    batches = storage.iter_logs(start, end, habit_ids)
+    if fmt == "columnar":
+        return _write_columnar(storage, file, batches)
+    return _write_rows(file, fmt, LOG_FIELDS, _log_rows(batches))
+
+
+def export_table(storage, file, fmt, table):
+    """Выгрузить привычки или историю версий заметок в CSV или JSON Lines"""
+    if table == "notes":
+        return _write_rows(file, fmt, NOTE_FIELDS, storage.notes.iter_history())
+    return _write_rows(file, fmt, HABIT_FIELDS, storage.iter_table(table, HABIT_FIELDS))
+
+
+def _column_bytes(values, typecode):
+    column = array(typecode, values)
+    if sys.byteorder == "big":
+        column.byteswap()
+    return zlib.compress(column.tobytes())
+
+
+def _write_columnar(storage, file, batches):
+    habits = [list(h[:4]) for h in storage.load_habits()]
+    header = json.dumps({
+        "columns": [name for name, _ in COLUMNS],
+        "habits": habits,
+    }, ensure_ascii=False).encode("utf-8")
+    file.write(COLUMNAR_MAGIC)
+    file.write(struct.pack("<I", len(header)))
+    file.write(header)
+
+    count = 0
+    for batch in batches:
+        # В базе день и минута уже числа: колонки берутся как есть
+        _, habit_ids, _, _, _, days, minutes = zip(*batch)
+        chunks = [_column_bytes(values, typecode)
+                  for values, (_, typecode) in zip((habit_ids, days, minutes), COLUMNS)]
+        file.write(struct.pack("<I", len(batch)))
+        for chunk in chunks:
+            file.write(struct.pack("<I", len(chunk)))
+            file.write(chunk)
+        count += len(batch)
+    file.write(struct.pack("<I", 0))
+    return count
+
+
+def read_columnar(file):
+    """Прочитать колоночный файл: (метаданные, итератор блоков {колонка: array})"""
+    if file.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+        raise ValueError("не файл экспорта логов")
+    (header_len,) = struct.unpack("<I", file.read(4))
+    meta = json.loads(file.read(header_len).decode("utf-8"))
+
+    def blocks():
+        while True:
+            (rows,) = struct.unpack("<I", file.read(4))
+            if rows == 0:
+                return
+            block = {}
+            for name, typecode in COLUMNS:
+                (size,) = struct.unpack("<I", file.read(4))
+                column = array(typecode)
+                column.frombytes(zlib.decompress(file.read(size)))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                block[name] = column
+            yield block
+
+    return meta, blocks()
@@ -0,0 +1,87 @@
+"""Поиск привычек по названию для больших списков привычек
+
+Модуль не импортирует tkinter. Индекс строится один раз на каждый новый
+список привычек (строки habits: id, name, is_good, stars, created_at).
+Поиск по началу названия - bisect по отсортированным ключам без
+перебора; по подстроке и нечеткий поиск - один проход по ключам с
+проверками на C (оператор in и str.find).
+"""
+from bisect import bisect_left
+from itertools import islice
+
+
+def fuzzy_score(text, key):
+    """Насколько key похож на text: символы text идут в key по порядку.
+
+    Возвращает количество лишних символов между ними (меньше - лучше)
+    или None, если text не является подпоследовательностью key.
+    """
+    start = position = key.find(text[0])
+    if start < 0:
+        return None
+    for char in text[1:]:
+        position = key.find(char, position + 1)
+        if position < 0:
+            return None
+    return position - start + 1 - len(text)
+
+
+class HabitIndex:
+    """Привычки по id и по названию.
+
+    by_id и by_name - словари для поиска за O(1). keys - пары (название
+    в нижнем регистре, название), отсортированные по ключу: названия с
+    одним началом в нем идут подряд.
+    """
+
+    def __init__(self, habits=()):
+        self.habits = list(habits)
+        self.by_id = {habit[0]: habit for habit in self.habits}
+        self.by_name = {habit[1]: habit for habit in self.habits}
+        self.keys = sorted((habit[1].casefold(), habit[1]) for habit in self.habits)
+
+    def __len__(self):
+        return len(self.habits)
+
+    def names(self, limit=None):
+        """Названия в алфавитном порядке без учета регистра"""
+        return [name for _, name in islice(self.keys, limit)]
+
+    def prefix(self, text):
+        """Названия, начинающиеся с text (без учета регистра)"""
+        key = text.casefold()
+        i = bisect_left(self.keys, (key,))
+        while i < len(self.keys) and self.keys[i][0].startswith(key):
+            yield self.keys[i][1]
+            i += 1
+
+    def search(self, text, limit=None, fuzzy=True):
+        """Названия, подходящие к text, не больше limit.
+
+        Сначала совпадения по началу, затем по подстроке, затем (если
+        fuzzy) названия, где символы text идут по порядку с пропусками -
+        от самых плотных совпадений. Пустой text - все названия.
+        """
+        key = text.strip().casefold()
+        if not key:
+            return self.names(limit)
+
+        found = list(islice(self.prefix(key), limit))
+        if limit is None or len(found) < limit:
+            found += self._containing(key, set(found))
+        if fuzzy and (limit is None or len(found) < limit):
+            found += self._fuzzy(key, set(found))
+        return found[:limit]
+
+    def _containing(self, key, seen):
+        return [name for k, name in self.keys if key in k and name not in seen]
+
+    def _fuzzy(self, key, seen):
+        scored = []
+        for k, name in self.keys:
+            if name not in seen:
+                score = fuzzy_score(key, k)
+                if score is not None:
+                    scored.append((score, k, name))
+        scored.sort()
+        return [name for _, _, name in scored]
@@ -0,0 +1,55 @@
+import tkinter as tk
+
+
+class HabitListView:
+    """Список строк главной страницы на пуле меток.
+
+    Строки создаются по мере надобности и больше не уничтожаются. При
+    новых данных show сравнивает их со старыми: меняется текст только
+    изменившихся строк, лишние строки прячутся, а если ничего не
+    изменилось, виджеты не трогаются вовсе.
+    """
+
+    def __init__(self, parent, bg, fg):
+        self.parent = parent
+        self.bg = bg
+        self.fg = fg
+        # Пул строк: пары (рамка, метка); видны первые len(self.texts)
+        self.rows = []
+        self.texts = []
+
+    def show(self, texts):
+        """Показать строки texts; возвращает False, если показывать нечего нового"""
+        if texts == self.texts:
+            return False
+
+        for i, text in enumerate(texts):
+            if i == len(self.rows):
+                self.rows.append(self._create_row())
+            frame, label = self.rows[i]
+            if i >= len(self.texts):
+                # Спрятанные строки стоят в конце, поэтому порядок сохраняется
+                frame.pack(fill=tk.X, pady=2, padx=2)
+                label.config(text=text)
+            elif self.texts[i] != text:
+                label.config(text=text)
+
+        for frame, _ in self.rows[len(texts):len(self.texts)]:
+            frame.pack_forget()
+
+        self.texts = list(texts)
+        return True
+
+    def _create_row(self):
+        frame = tk.Frame(self.parent, bg=self.bg)
+        label = tk.Label(
+            frame,
+            font=("Arial", 9),
+            bg=self.bg,
+            fg=self.fg,
+            anchor="w",
+            padx=5,
+            pady=3
+        )
+        label.pack(fill=tk.X)
+        return frame, label
@@ -0,0 +1,415 @@
+"""Логика трекера привычек без графического интерфейса
+
+Модуль не импортирует tkinter: его можно использовать в пакетных задачах,
+бенчмарках и командной строке. HabitsApp обращается к базе только через
+HabitsCore, который выполняется в рабочем потоке QueryExecutor.
+"""
+import calendar
+from bisect import bisect_right
+from datetime import date
+
+from schedule import Schedule, week_start
+from storage import DB_PATH, MINUTES_PER_DAY, Storage
+
+
+def month_bounds(year, month):
+    """Первый и последний день месяца номерами дней (date.toordinal())"""
+    first = date(year, month, 1).toordinal()
+    return first, first + calendar.monthrange(year, month)[1] - 1
+
+
+def to_day(date_str):
+    """'YYYY-MM-DD' -> номер дня; ValueError, если дата неверная"""
+    return date.fromisoformat(date_str).toordinal()
+
+
+def to_minute(time_str):
+    """'HH:MM' -> минута суток"""
+    return int(time_str[:2]) * 60 + int(time_str[3:5])
+
+
+def recurrence_days(start, end, weekdays=None):
+    """Дни от start до end включительно (ordinal), попадающие на дни недели
+    weekdays (0 - понедельник); None - каждый день"""
+    # Ordinal 1 - понедельник, поэтому день недели - (day - 1) % 7
+    return [day for day in range(start, end + 1) if weekdays is None or (day - 1) % 7 in weekdays]
+
+
+def format_day(day):
+    """Номер дня -> 'DD.MM.YYYY'"""
+    value = date.fromordinal(day)
+    return f"{value.day:02d}.{value.month:02d}.{value.year:04d}"
+
+
+def format_minute(minute):
+    """Минута суток -> 'HH:MM'"""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def format_datetime(value):
+    """day * 1440 + minute -> 'DD.MM.YYYY HH:MM'; None остается None"""
+    if value is None:
+        return None
+    day, minute = divmod(value, MINUTES_PER_DAY)
+    return f"{format_day(day)} {format_minute(minute)}"
+
+
+def parse_time(hour, minute):
+    """Время из часов и минут в виде 'HH:MM'; ValueError, если оно неверное"""
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        raise ValueError(f"invalid time {hour}:{minute}")
+    return f"{hour:02d}:{minute:02d}"
+
+
+class HabitStore:
+    """Справочник привычек"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def all(self):
+        """Все привычки, отсортированные по названию"""
+        return self.storage.load_habits()
+
+    def create(self, name, is_good, stars):
+        """Создать привычку; sqlite3.IntegrityError, если имя занято"""
+        return self.storage.create_habit(name, is_good, stars)
+
+    def set_stars(self, habit_id, stars):
+        self.storage.update_habit_stars(habit_id, stars)
+
+    def delete(self, habit_id):
+        """Удалить привычку; возвращает месяцы ('YYYY-MM'), где были ее логи"""
+        months = self.storage.habit_log_months(habit_id)
+        self.storage.delete_habit(habit_id)
+        return months
+
+
+class LogService:
+    """Логи выполненных привычек"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def add(self, habit_id, date_str, time_str):
+        """Добавить лог; дата 'YYYY-MM-DD', время 'HH:MM'"""
+        self.storage.add_log(habit_id, to_day(date_str), to_minute(time_str))
+
+    def add_batch(self, habit_ids, days, time_str):
+        """Добавить логи каждой привычки в каждый из дней (ordinal) одной
+        транзакцией; возвращает количество логов"""
+        minute = to_minute(time_str)
+        rows = [(habit_id, day, minute) for day in days for habit_id in habit_ids]
+        self.storage.add_logs(rows, label=f"Пакетный ввод: {len(rows)} логов")
+        return len(rows)
+
+    def month_by_day(self, year, month):
+        """Логи месяца, сгруппированные по дням: день -> список (текст, is_good)"""
+        first, last = month_bounds(year, month)
+        logs_by_day = {}
+        for day, minute, habit_name, is_good in self.storage.month_logs(first, last):
+            logs_by_day.setdefault(day - first + 1, []).append((f"{format_minute(minute)} - {habit_name}", is_good))
+        return logs_by_day
+
+
+class StatsService:
+    """Звезды, списки главной страницы и статистика привычек"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def total_stars(self):
+        return self.storage.total_stars()
+
+    def recent_bad(self, limit=10):
+        """Последние плохие привычки: (название, дата 'DD.MM.YYYY', время)"""
+        return [(name, format_day(day), format_minute(minute))
+                for name, day, minute in self.storage.recent_bad_logs(limit)]
+
+    def oldest_good(self, limit=10):
+        """Давно не выполнявшиеся хорошие привычки: (название, 'DD.MM.YYYY HH:MM' или None)"""
+        return [(name, format_datetime(last_datetime))
+                for name, last_datetime in self.storage.oldest_good_habits(limit)]
+
+    def habits(self, today=None):
+        """Статистика каждой привычки для страницы статистики.
+
+        Строки: (название, is_good, последний раз 'DD.MM.YYYY HH:MM' или None,
+        серия, лучшая серия, за 7 дней, за 30, за 365, звезды)
+        """
+        return [(name, is_good, format_datetime(last_done), *numbers)
+                for _, name, is_good, last_done, *numbers in self.storage.habit_stats(today)]
+
+
+class AnalyticsService:
+    """Тепловая карта и тренды по всей истории логов"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._columns = None
+        self._key = None
+
+    def columns(self):
+        """Логи в колонках; перечитываются только после изменений логов или звезд"""
+        key = self.storage.log_version()
+        if self._columns is None or key != self._key:
+            # analytics тянет NumPy: импортируем при первом обращении, а не на старте
+            import analytics
+            self._columns = analytics.LogColumns.from_batches(self.storage.iter_log_columns())
+            self._key = key
+        return self._columns
+
+    def overview(self, habit_id=None, years=1, period="week", today=None):
+        """Данные страницы аналитики за years последних календарных лет.
+
+        Возвращает словарь: start и end (ordinal), levels (уровень тепловой
+        карты на каждый день), total (логов за период) и trends (см. analytics.trends).
+        """
+        import analytics
+
+        today = today or date.today()
+        start = date(today.year - years + 1, 1, 1).toordinal()
+        end = today.toordinal()
+        columns = analytics.select(self.columns(), habit_id, start, end)
+        counts = analytics.day_counts(columns, start, end)
+        return {
+            "start": start,
+            "end": end,
+            "levels": list(analytics.heat_levels(counts)),
+            "total": len(columns),
+            "trends": analytics.trends(columns, start, end, period),
+        }
+
+
+class ScheduleService:
+    """Расписания привычек: что нужно сделать сегодня и что пропущено.
+
+    Повторения расписаний сверяются с логами только внутри окна дней:
+    логи окна читаются одним запросом по индексу дней, поэтому работа
+    зависит от длины окна и числа расписаний, а не от всей истории.
+    """
+
+    # За сколько прошлых дней показывать просроченные привычки
+    OVERDUE_DAYS = 7
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def _load(self):
+        return [(habit_id, name, Schedule(kind, weekdays, per_week, rule, minute, start_day))
+                for habit_id, name, kind, weekdays, per_week, rule, minute, start_day in self.storage.schedules()]
+
+    def get(self, habit_id):
+        """Расписание привычки или None"""
+        return next((schedule for schedule_habit, _, schedule in self._load() if schedule_habit == habit_id), None)
+
+    def set(self, habit_id, schedule):
+        """Задать расписание привычки; None - убрать расписание"""
+        if schedule is None:
+            self.storage.delete_schedule(habit_id)
+        else:
+            self.storage.set_schedule(habit_id, schedule.kind, schedule.weekdays, schedule.per_week,
+                                      schedule.rule, schedule.minute, schedule.start)
+
+    def _counts(self, schedules, start, end):
+        """Логов по (habit_id, день) в окне; недели weekly захватываются целиком"""
+        if any(schedule.kind == "weekly" for _, _, schedule in schedules):
+            start = week_start(start)
+        return {(habit_id, day): count for habit_id, day, count in self.storage.log_day_counts_between(start, end)}
+
+    def _missed(self, schedules, counts, start, end):
+        """Пропуски с start по end: (habit_id, название, день).
+
+        Для weekly пропуск - воскресенье недели, за которую не набралось
+        per_week логов; недели, которые кончаются после end, не проверяются.
+        """
+        for habit_id, name, schedule in schedules:
+            for day in schedule.occurrences(start, end):
+                if schedule.kind == "weekly":
+                    last = day + 6
+                    if last <= end and sum(counts.get((habit_id, d), 0)
+                                           for d in range(day, last + 1)) < schedule.per_week:
+                        yield habit_id, name, last
+                elif (habit_id, day) not in counts:
+                    yield habit_id, name, day
+
+    def missed(self, start, end, today=None):
+        """Пропуски в днях с start по end (ordinal), не считая сегодняшнего и будущих"""
+        end = min(end, (today or date.today()).toordinal() - 1)
+        schedules = self._load()
+        if start > end or not schedules:
+            return []
+        return list(self._missed(schedules, self._counts(schedules, start, end), start, end))
+
+    def agenda(self, today=None):
+        """Списки главной страницы: (просроченные, на сегодня).
+
+        Просроченные - (название, пропусков за OVERDUE_DAYS дней, последний
+        пропуск 'DD.MM.YYYY'), больше пропусков - выше. На сегодня - (название,
+        время 'HH:MM' или None, сколько раз осталось) по времени.
+        """
+        day = (today or date.today()).toordinal()
+        schedules = self._load()
+        if not schedules:
+            return [], []
+        counts = self._counts(schedules, day - self.OVERDUE_DAYS, day)
+
+        missed = {}
+        for habit_id, name, missed_day in self._missed(schedules, counts, day - self.OVERDUE_DAYS, day - 1):
+            times, last = missed.get(habit_id, (0, 0))
+            missed[habit_id] = (times + 1, max(last, missed_day))
+        overdue = sorted(((name, *missed[habit_id]) for habit_id, name, _ in schedules if habit_id in missed),
+                         key=lambda row: (-row[1], row[2]))
+
+        due = []
+        for habit_id, name, schedule in schedules:
+            if day < schedule.start:
+                continue
+            if schedule.kind == "weekly":
+                done = sum(counts.get((habit_id, d), 0) for d in range(week_start(day), day + 1))
+                left = schedule.per_week - done
+            else:
+                left = 1 if schedule.matches(day) and (habit_id, day) not in counts else 0
+            if left > 0:
+                due.append((name, schedule.minute, left))
+        due.sort(key=lambda row: (row[1] is None, row[1] or 0, row[0]))
+
+        return ([(name, times, format_day(last)) for name, times, last in overdue],
+                [(name, None if minute is None else format_minute(minute), left) for name, minute, left in due])
+
+
+class LogHistoryService:
+    """Вся история логов от новых к старым, страницами по PAGE_SIZE строк.
+
+    Страница с любым номером читается без OFFSET по всей таблице:
+    оглавление по дням (сколько логов в каждом дне) дает день, с которого
+    начинается страница, и сколько логов пропустить внутри него. Если
+    предыдущая страница уже читалась, следующая берется по ее последнему
+    ключу. Оглавление и ключи сбрасываются после любой записи в базу.
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._key = None
+        self._days = []
+        # Номер первого лога каждого дня оглавления
+        self._starts = []
+        self._total = 0
+        # Номер страницы -> ключ последнего лога предыдущей страницы
+        self._after = {}
+
+    def _refresh(self):
+        key = self.storage.log_version()
+        if key == self._key:
+            return
+        self._key = key
+        self._days, self._starts, self._total = [], [], 0
+        for day, count in self.storage.log_day_counts():
+            self._days.append(day)
+            self._starts.append(self._total)
+            self._total += count
+        self._after = {}
+
+    def count(self):
+        """Количество логов"""
+        self._refresh()
+        return self._total
+
+    def page(self, number):
+        """Строки страницы: (дата 'DD.MM.YYYY', время, название, тип, звезды)"""
+        self._refresh()
+        start = number * self.PAGE_SIZE
+        if not 0 <= start < self._total:
+            return []
+
+        after = self._after.get(number)
+        if after is not None:
+            rows = self.storage.log_page_after(after, self.PAGE_SIZE)
+        else:
+            i = bisect_right(self._starts, start) - 1
+            rows = self.storage.log_page_from_day(self._days[i], start - self._starts[i], self.PAGE_SIZE)
+        if rows:
+            self._after[number + 1] = rows[-1][:4]
+
+        return [(format_day(day), format_minute(minute), name,
+                 "Хорошая" if is_good == 1 else "Плохая", f"+{stars}" if is_good == 1 else f"-{stars}")
+                for day, minute, habit_id, log_id, name, is_good, stars in rows]
+
+
+class NotesService:
+    """Заметки с историей версий"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.store = storage.notes
+
+    def latest(self):
+        return self.store.current()[0]
+
+    def save(self, content):
+        """Сохранить текст; возвращает номер версии"""
+        return self.storage.save_notes(content)
+
+    def history(self):
+        """Версии без содержимого: (версия, дата, длина текста), новые первыми"""
+        return self.store.history()
+
+    def version(self, version):
+        return self.store.version_content(version)
+
+
+class HabitsCore:
+    """Точка входа: хранилище и сервисы поверх одного соединения"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.habits = HabitStore(storage)
+        self.logs = LogService(storage)
+        self.stats = StatsService(storage)
+        self.notes = NotesService(storage)
+        self.analytics = AnalyticsService(storage)
+        self.history = LogHistoryService(storage)
+        self.schedules = ScheduleService(storage)
+
+    @classmethod
+    def open(cls, path=DB_PATH):
+        return cls(Storage(path))
+
+    def init_schema(self, progress=None):
+        """Применить недостающие миграции; возвращает примененные"""
+        return self.storage.init_schema(progress=progress)
+
+    def main_page(self, limit=10):
+        """Все данные главной страницы за один заход в базу"""
+        return (
+            self.habits.all(),
+            self.stats.total_stars(),
+            self.stats.recent_bad(limit),
+            self.stats.oldest_good(limit),
+            self.schedules.agenda()
+        )
+
+    def calendar_month(self, year, month, today=None):
+        """Логи месяца по дням вместе с пропусками по расписаниям.
+
+        Пропуск - строка ('пропуск - название', None) в конце дня.
+        """
+        logs_by_day = self.logs.month_by_day(year, month)
+        first, last = month_bounds(year, month)
+        for _, name, day in self.schedules.missed(first, last, today):
+            logs_by_day.setdefault(day - first + 1, []).append((f"пропуск - {name}", None))
+        return logs_by_day
+
+    def undo(self):
+        """Отменить последнее изменение: (название, последствия) или None - см. journal"""
+        return self.storage.journal.undo()
+
+    def redo(self):
+        """Повторить последнее отмененное изменение: (название, последствия) или None"""
+        return self.storage.journal.redo()
+
+    def close(self):
+        self.storage.close()
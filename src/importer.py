@@ -0,0 +1,137 @@
+"""Импорт логов привычек из CSV или JSON Lines
+
+Каждая строка файла - один лог с полями habit (название привычки),
+date ('YYYY-MM-DD') и time ('HH:MM'). Файл читается потоком и пишется
+пачками через executemany, поэтому память не зависит от размера файла.
+"""
+import csv
+import json
+import time
+from datetime import date
+
+BATCH_SIZE = 50000
+MAX_SAMPLES = 10
+
+# Все допустимые значения времени и их минуты суток: проверка и перевод - поиск в словаре
+TIME_MINUTES = {f"{h:02d}:{m:02d}": h * 60 + m for h in range(24) for m in range(60)}
+
+
+class ImportReport:
+    """Итоги импорта"""
+
+    def __init__(self):
+        self.imported = 0
+        self.rejected = 0
+        self.created_habits = 0
+        self.samples = []  # Первые отклоненные строки: (номер строки, причина)
+        self.seconds = 0.0
+
+    def reject(self, line_no, reason):
+        self.rejected += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append((line_no, reason))
+
+    @property
+    def rate(self):
+        return self.imported / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        lines = [
+            f"Импортировано: {self.imported}",
+            f"Отклонено: {self.rejected}",
+            f"Время: {self.seconds:.1f} с ({self.rate:.0f} строк/с)",
+        ]
+        if self.created_habits:
+            lines.append(f"Создано привычек: {self.created_habits}")
+        for line_no, reason in self.samples:
+            lines.append(f"  строка {line_no}: {reason}")
+        return "\n".join(lines)
+
+
+def detect_format(path):
+    return "jsonl" if path.lower().endswith((".jsonl", ".json", ".ndjson")) else "csv"
+
+
+def read_rows(file, fmt):
+    """Строки файла: (номер строки, словарь полей или None, если строка не разобрана)"""
+    if fmt == "csv":
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_no, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_no, row if isinstance(row, dict) else None
+
+
+def normalize_time(value):
+    value = str(value).strip()
+    if len(value) == 4:
+        value = "0" + value
+    return value if value in TIME_MINUTES else None
+
+
+def import_logs(storage, path, fmt=None, create_habits=False, batch_size=BATCH_SIZE, progress=None):
+    """Импортировать логи из файла; progress(report) вызывается после каждой пачки"""
+    fmt = fmt or detect_format(path)
+    report = ImportReport()
+    started = time.perf_counter()
+
+    # Название -> id; с create_habits недостающие привычки создаются по ходу
+    habit_ids = storage.habit_ids_by_name()
+    # Проверенные даты и их номера дней
+    days = {}
+    batch = []
+
+    with open(path, newline="", encoding="utf-8") as file:
+        for line_no, row in read_rows(file, fmt):
+            if row is None:
+                report.reject(line_no, "не удалось разобрать строку")
+                continue
+
+            name = str(row.get("habit") or "").strip()
+            date_str = str(row.get("date") or "").strip()
+            time_str = normalize_time(row.get("time") or "")
+
+            day = days.get(date_str)
+            if day is None:
+                try:
+                    if len(date_str) != 10:
+                        raise ValueError
+                    day = days[date_str] = date.fromisoformat(date_str).toordinal()
+                except ValueError:
+                    report.reject(line_no, f"неверная дата '{date_str}'")
+                    continue
+
+            if time_str is None:
+                report.reject(line_no, f"неверное время '{row.get('time')}'")
+                continue
+
+            habit_id = habit_ids.get(name)
+            if habit_id is None and name and create_habits:
+                habit_id = storage.create_habit(name, 1, 1)
+                habit_ids[name] = habit_id
+                report.created_habits += 1
+            if habit_id is None:
+                report.reject(line_no, f"неизвестная привычка '{name}'")
+                continue
+
+            batch.append((habit_id, day, TIME_MINUTES[time_str]))
+            if len(batch) >= batch_size:
+                storage.add_logs(batch)
+                report.imported += len(batch)
+                batch.clear()
+                report.seconds = time.perf_counter() - started
+                if progress:
+                    progress(report)
+
+    if batch:
+        storage.add_logs(batch)
+        report.imported += len(batch)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,229 @@
+"""Журнал отмены и повтора изменений
+
+Каждое изменение логов, привычек и заметок в той же транзакции, что и
+само изменение, записывает в таблицу undo_log одну строку: название
+действия и обратную операцию в JSON. Отмена выполняет обратную операцию
+одной транзакцией и записывает на ее место операцию повтора, поэтому
+отмена и повтор многоуровневые и переживают перезапуск программы.
+
+Операции компактные: добавленные логи - диапазоны id, звездочки и
+заметки - прежнее значение или номер версии. Полный снимок хранится
+только для удаления, где данные иначе потеряны. Журнал ограничен
+UNDO_LIMIT записями и UNDO_MAX_BYTES байтами операций: старые записи
+удаляются при каждой новой, последняя остается всегда. Новое изменение
+стирает записи для повтора, как в любом редакторе.
+
+Операции:
+
+    ["delete_logs", [[первый_id, последний_id], ...]]
+    ["insert_logs", ids, habit_ids, days, minutes, created]
+    ["delete_habit", habit_id]
+    ["insert_habit", [id, name, is_good, stars, created_at], расписание или null,
+     [ids, days, minutes, created]]
+    ["set_stars", habit_id, stars]
+    ["set_notes", версия]
+
+Отмена возвращает название действия и последствия для интерфейса:
+
+    ("logs_added" | "logs_removed", habit_ids, days)
+    ("habit_created", habit_id, name, is_good, stars)
+    ("habit_deleted", habit_id, days)
+    ("schedule", habit_id)
+    ("stars", habit_id, stars)
+    ("notes",)
+"""
+import json
+import sqlite3
+import time
+
+UNDO_LIMIT = 100
+UNDO_MAX_BYTES = 16 * 1024 * 1024
+
+# Сохранения заметок с паузой меньше этой сливаются в одну запись:
+# отмена возвращает текст до начала правки, а не до последней паузы
+MERGE_SECONDS = 60
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS undo_log (
+        id INTEGER PRIMARY KEY,
+        label TEXT NOT NULL,
+        op TEXT NOT NULL,
+        undone INTEGER NOT NULL DEFAULT 0,
+        at REAL NOT NULL
+    )
+'''
+
+SQL_LOG_ROWS = 'SELECT id, habit_id, day, minute, created_at FROM habit_logs WHERE id BETWEEN ? AND ? ORDER BY id'
+SQL_DELETE_LOGS = 'DELETE FROM habit_logs WHERE id BETWEEN ? AND ?'
+SQL_INSERT_LOG = 'INSERT INTO habit_logs (id, habit_id, day, minute, created_at) VALUES (?, ?, ?, ?, ?)'
+SQL_HABIT_ROW = 'SELECT id, name, is_good, stars, created_at FROM habits WHERE id = ?'
+SQL_HABIT_LOGS = 'SELECT id, day, minute, created_at FROM habit_logs WHERE habit_id = ? ORDER BY id'
+SQL_HABIT_SCHEDULE = '''
+    SELECT kind, weekdays, per_week, rule, minute, start_day FROM habit_schedules WHERE habit_id = ?
+'''
+SQL_INSERT_HABIT = 'INSERT INTO habits (id, name, is_good, stars, created_at) VALUES (?, ?, ?, ?, ?)'
+SQL_INSERT_SCHEDULE = '''
+    INSERT INTO habit_schedules (habit_id, kind, weekdays, per_week, rule, minute, start_day)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def id_ranges(ids):
+    """Отсортированные id одним списком диапазонов [первый, последний]"""
+    ranges = []
+    for log_id in ids:
+        if ranges and ranges[-1][1] == log_id - 1:
+            ranges[-1][1] = log_id
+        else:
+            ranges.append([log_id, log_id])
+    return ranges
+
+
+class UndoJournal:
+    """Журнал отмены поверх соединения sqlite3; notes - NotesStore того же соединения"""
+
+    def __init__(self, conn, notes, limit=UNDO_LIMIT, max_bytes=UNDO_MAX_BYTES):
+        self.conn = conn
+        self.notes = notes
+        self.limit = limit
+        self.max_bytes = max_bytes
+
+    def create_schema(self, cursor):
+        cursor.execute(SCHEMA)
+
+    # --- Запись ---
+
+    def record(self, cursor, label, op, merge=False):
+        """Записать обратную операцию в текущей транзакции.
+
+        merge - не добавлять запись, если последняя запись того же вида
+        сделана меньше MERGE_SECONDS назад: она уже возвращает более
+        раннее состояние, поэтому достаточно продлить ее.
+        """
+        now = time.time()
+        cursor.execute('DELETE FROM undo_log WHERE undone = 1')
+        if merge:
+            last = cursor.execute('SELECT id, op, at FROM undo_log ORDER BY id DESC LIMIT 1').fetchone()
+            if last and json.loads(last[1])[0] == op[0] and now - last[2] < MERGE_SECONDS:
+                cursor.execute('UPDATE undo_log SET at = ? WHERE id = ?', (now, last[0]))
+                return
+        cursor.execute(
+            'INSERT INTO undo_log (label, op, at) VALUES (?, ?, ?)',
+            (label, json.dumps(op, ensure_ascii=False, separators=(',', ':')), now)
+        )
+        self._compact(cursor)
+
+    def _compact(self, cursor):
+        cursor.execute(
+            'DELETE FROM undo_log WHERE id <= (SELECT id FROM undo_log ORDER BY id DESC LIMIT 1 OFFSET ?)',
+            (self.limit,)
+        )
+        total = cursor.execute('SELECT SUM(length(op)) FROM undo_log').fetchone()[0] or 0
+        if total <= self.max_bytes:
+            return
+        # От старых к новым, пока не влезем; последнюю запись не трогаем
+        rows = cursor.execute('SELECT id, length(op) FROM undo_log ORDER BY id').fetchall()
+        for entry_id, size in rows[:-1]:
+            if total <= self.max_bytes:
+                break
+            cursor.execute('DELETE FROM undo_log WHERE id = ?', (entry_id,))
+            total -= size
+
+    def habit_snapshot(self, cursor, habit_id):
+        """Операция, восстанавливающая привычку с расписанием и логами (до ее удаления)"""
+        habit = cursor.execute(SQL_HABIT_ROW, (habit_id,)).fetchone()
+        if habit is None:
+            return None
+        schedule = cursor.execute(SQL_HABIT_SCHEDULE, (habit_id,)).fetchone()
+        logs = cursor.execute(SQL_HABIT_LOGS, (habit_id,)).fetchall()
+        return ['insert_habit', list(habit), list(schedule) if schedule else None,
+                [list(column) for column in zip(*logs)] if logs else [[], [], [], []]]
+
+    # --- Отмена и повтор ---
+
+    def undo(self):
+        """Отменить последнее действие; (название, последствия) или None, если отменять нечего"""
+        return self._step('SELECT id, label, op FROM undo_log WHERE undone = 0 ORDER BY id DESC LIMIT 1', 1)
+
+    def redo(self):
+        """Повторить последнее отмененное действие; (название, последствия) или None"""
+        return self._step('SELECT id, label, op FROM undo_log WHERE undone = 1 ORDER BY id LIMIT 1', 0)
+
+    def _step(self, sql, undone):
+        entry = self.conn.execute(sql).fetchone()
+        if entry is None:
+            return None
+        entry_id, label, op = entry
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                inverse, effects = self._apply(cursor, json.loads(op))
+                cursor.execute(
+                    'UPDATE undo_log SET op = ?, undone = ? WHERE id = ?',
+                    (json.dumps(inverse, ensure_ascii=False, separators=(',', ':')), undone, entry_id)
+                )
+        except (sqlite3.IntegrityError, KeyError) as error:
+            # Данные уже не позволяют выполнить операцию (например, имя
+            # привычки заняли заново): запись бесполезна, убираем ее
+            with self.conn:
+                self.conn.execute('DELETE FROM undo_log WHERE id = ?', (entry_id,))
+            raise ValueError(f"{label}: {error}") from error
+        return label, effects
+
+    def _apply(self, cursor, op):
+        """Выполнить операцию; возвращает обратную операцию и последствия"""
+        kind = op[0]
+        if kind == 'delete_logs':
+            rows = []
+            for first, last in op[1]:
+                rows += cursor.execute(SQL_LOG_ROWS, (first, last)).fetchall()
+                cursor.execute(SQL_DELETE_LOGS, (first, last))
+            columns = [list(column) for column in zip(*rows)] or [[], [], [], [], []]
+            return ['insert_logs'] + columns, [('logs_removed', columns[1], columns[2])]
+
+        if kind == 'insert_logs':
+            ids, habit_ids, days, minutes, created = op[1:]
+            cursor.executemany(SQL_INSERT_LOG, zip(ids, habit_ids, days, minutes, created))
+            return ['delete_logs', id_ranges(ids)], [('logs_added', habit_ids, days)]
+
+        if kind == 'delete_habit':
+            inverse = self.habit_snapshot(cursor, op[1])
+            if inverse is None:
+                raise KeyError(op[1])
+            cursor.execute('DELETE FROM habits WHERE id = ?', (op[1],))
+            effects = [('habit_deleted', op[1], inverse[3][1])]
+            if inverse[2]:
+                effects.append(('schedule', op[1]))
+            return inverse, effects
+
+        if kind == 'insert_habit':
+            habit, schedule, (ids, days, minutes, created) = op[1:]
+            habit_id, name, is_good, stars, _ = habit
+            cursor.execute(SQL_INSERT_HABIT, habit)
+            if schedule:
+                cursor.execute(SQL_INSERT_SCHEDULE, [habit_id] + schedule)
+            cursor.executemany(SQL_INSERT_LOG, ((log_id, habit_id, day, minute, created_at)
+                                                for log_id, day, minute, created_at in zip(ids, days, minutes, created)))
+            effects = [('habit_created', habit_id, name, is_good, stars)]
+            if days:
+                effects.append(('logs_added', [habit_id], days))
+            if schedule:
+                effects.append(('schedule', habit_id))
+            return ['delete_habit', habit_id], effects
+
+        if kind == 'set_stars':
+            _, habit_id, stars = op
+            old = cursor.execute('SELECT stars FROM habits WHERE id = ?', (habit_id,)).fetchone()
+            if old is None:
+                raise KeyError(habit_id)
+            cursor.execute('UPDATE habits SET stars = ? WHERE id = ?', (stars, habit_id))
+            return ['set_stars', habit_id, old[0]], [('stars', habit_id, stars)]
+
+        if kind == 'set_notes':
+            version = cursor.execute('SELECT version FROM note_document WHERE id = 1').fetchone()[0]
+            # Версия 0 - пустая заметка до первого сохранения
+            content = self.notes._version_content(cursor, op[1]) if op[1] else ''
+            self.notes._save(cursor, content)
+            return ['set_notes', version], [('notes',)]
+
+        raise KeyError(kind)
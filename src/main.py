@@ -1,37 +1,140 @@
+import time
+STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import hashlib
 import sqlite3
-from datetime import datetime, date, timedelta
-import calendar
-from tkcalendar import DateEntry
-import tktimepicker
+import sys
+from datetime import date, timedelta
+
+import events
+from events import EventBus
+from executor import QueryExecutor
+from habit_index import HabitIndex
+from habit_list_view import HabitListView
+from habits_core import HabitsCore, LogHistoryService, format_day, parse_time, recurrence_days, to_minute
+from schedule import Schedule
+from month_cache import MonthCache, shift_month
+from startup import StartupTimer
+from virtual_table import VirtualTable
+
+# tkcalendar, модули страниц и импорта загружаются при первом обращении:
+# на холодном старте до первой отрисовки импортируется только необходимое
 
 class HabitsApp:
-    def __init__(self, root):
+    # Пауза в наборе, после которой заметки сохраняются автоматически
+    NOTES_AUTOSAVE_MS = 1000
+    
+    # Варианты фильтров страницы аналитики
+    ANALYTICS_YEARS = {"1 год": 1, "3 года": 3, "10 лет": 10}
+    ANALYTICS_PERIODS = {"Недели": "week", "Месяцы": "month"}
+    
+    # Сколько подходящих привычек показывать в выпадающем списке
+    COMBO_LIMIT = 100
+    
+    # Пакетный ввод: сколько строк показывать в предпросмотре и с какого
+    # размера пакета спрашивать подтверждение
+    BATCH_PREVIEW_ROWS = 200
+    BATCH_CONFIRM_LOGS = 1000
+    BATCH_WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+    
+    # Сколько строк каждого списка по расписанию показывать на главной
+    AGENDA_ROWS = 5
+    
+    # Виды расписания в редакторе: подпись -> kind (см. schedule.py)
+    SCHEDULE_KINDS = {
+        "Без расписания": None,
+        "Каждый день": "daily",
+        "По дням недели": "weekdays",
+        "N раз в неделю": "weekly",
+        "Правило cron": "cron",
+    }
+    
+    # Сортировка таблицы привычек по щелчку на заголовке столбца
+    HABITS_SORT_KEYS = {
+        "ID": lambda h: h[0],
+        "Название": lambda h: h[1].casefold(),
+        "Тип": lambda h: (h[2], h[1].casefold()),
+        "Звездочек": lambda h: h[3] if h[2] == 1 else -h[3],
+    }
+    
+    def __init__(self, root, timer=None):
         self.root = root
+        self.timer = timer or StartupTimer()
         self.root.title("Habits Tracker")
         self.root.geometry("1100x750")
         
         # Инициализация базы данных
         self.init_db()
+        self.timer.mark("запуск потока базы")
         
-        # Загрузка данных
-        self.load_habits()
-        self.load_stars()
+        # Данные загружаются в фоне, до их прихода страницы показывают заглушки
+        self.habits = []
+        self.habit_index = HabitIndex()
+        self.total_stars = None
+        self.notes_loaded = False
+        
+        # Состояние автосохранения заметок
+        self.notes_autosave_job = None
+        self.notes_saved_hash = None
+        self.notes_saving = False
+        self.notes_resave = False
         
         # Стиль
         self.setup_styles()
         
         # Переменные для управления видимостью
         self.current_page = None
+        self.first_data_shown = False
+        
+        # Главная страница перечитывается, только если после последней
+        # загрузки в базу что-то записали: data_version растет с каждой
+        # записью, main_version - версия данных, которые сейчас на экране
+        self.data_version = 0
+        self.main_version = None
+        
+        # Статистика и аналитика зависят от сегодняшней даты: здесь день,
+        # за который посчитаны данные на экране; None - данные устарели
+        self.stats_day = None
+        self.analytics_day = None
+        self.history_stale = True
+        
+        # Записи публикуют события, страницы сбрасывают по ним только то,
+        # что затронуто. Привычки обновляются первыми: остальные
+        # обработчики читают уже актуальный self.habits
+        self.bus = EventBus(self.root)
+        self.bus.subscribe(self._habits_on_change)
+        self.bus.subscribe(self._main_on_change)
+        self.bus.subscribe(self._calendar_on_change)
+        self.bus.subscribe(self._stats_on_change)
+        self.bus.subscribe(self._analytics_on_change)
+        self.bus.subscribe(self._history_on_change)
+        self.bus.subscribe(self._notes_on_change)
+        
+        # Страницы строятся при первом показе: имя -> фрейм
+        self.pages = {}
         
         # Создание интерфейса
         self.create_header()
         self.create_sidebar()
         self.create_main_content()
         
+        # Закрытие крестиком уничтожает виджеты: заметки сохраняем до этого
+        self.root.protocol("WM_DELETE_WINDOW", self.close_window)
+        
+        # Отмена и повтор изменений в базе; в полях ввода эти клавиши свои
+        self.root.bind("<Control-z>", self.undo)
+        self.root.bind("<Control-y>", self.redo)
+        self.root.bind("<Control-Z>", self.redo)
+        self.timer.mark("каркас окна")
+        
         # Показываем главную страницу по умолчанию
         self.show_main()
+        self.timer.mark("главная страница")
+        
+        # Первая отрисовка случится, когда цикл событий обработает очередь
+        self.root.after_idle(self._first_paint)
     
     def setup_styles(self):
         style = ttk.Style()
@@ -59,6 +162,16 @@ class HabitsApp:
             fg="white"
         )
         title.pack(pady=15)
+        
+        # Что сделала последняя отмена или повтор
+        self.undo_status_label = tk.Label(
+            header,
+            text="",
+            font=("Arial", 10),
+            bg=self.header_color,
+            fg="#bdc3c7"
+        )
+        self.undo_status_label.place(relx=1.0, rely=0.5, x=-15, anchor="e")
     
     def create_sidebar(self):
         sidebar = tk.Frame(self.root, bg=self.sidebar_color, width=200)
@@ -68,7 +181,13 @@ class HabitsApp:
             ("Главная", self.show_main),
             ("Список привычек", self.show_habits_list),
             ("Календарь привычек", self.show_calendar),
-            ("Заметки", self.show_notes)
+            ("Заметки", self.show_notes),
+            ("Статистика", self.show_stats),
+            ("Аналитика", self.show_analytics),
+            ("История логов", self.show_history),
+            ("Импорт логов", self.import_logs),
+            ("Отменить", self.undo),
+            ("Повторить", self.redo)
         ]
         
         for text, command in menu_items:
@@ -107,26 +226,29 @@ class HabitsApp:
             pady=15,
             anchor="w",
             width=15,
-            command=self.root.quit
+            command=self.close_window
         )
         exit_btn.pack(side=tk.BOTTOM, fill=tk.X)
     
     def create_main_content(self):
-        # Основной контейнер
+        # Основной контейнер; страницы создаются в ensure_page
         self.main_container = tk.Frame(self.root, bg=self.bg_color)
         self.main_container.pack(fill=tk.BOTH, expand=True, side=tk.RIGHT)
-        
-        # Создаем все страницы заранее
-        self.create_main_page()
-        self.create_habits_list_page()
-        self.create_calendar_page()
-        self.create_notes_page()
-        
-        # Скрываем все страницы кроме главной
-        self.hide_all_pages()
+    
+    def ensure_page(self, name):
+        """Фрейм страницы; при первом обращении страница строится"""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.pages[name] = getattr(self, f"create_{name}_page")()
+        return page
+    
+    def _first_paint(self):
+        self.timer.mark("первая отрисовка")
+        # Поле выбора даты тянет tkcalendar и babel: создаем его уже после отрисовки
+        self.root.after(0, self.create_date_entry)
     
     def create_main_page(self):
-        """Создаем главную страницу заранее"""
+        """Создаем главную страницу"""
         self.main_page = tk.Frame(self.main_container, bg=self.bg_color)
         
         # Основной контейнер с двумя колонками
@@ -147,7 +269,7 @@ class HabitsApp:
         
         self.stars_label = tk.Label(
             stars_frame,
-            text=f"★ {self.total_stars}",
+            text="★ …",
             font=("Arial", 48, "bold"),
             bg="white",
             fg="#f1c40f"
@@ -171,24 +293,19 @@ class HabitsApp:
         self.habit_var = tk.StringVar()
         self.habit_combo = ttk.Combobox(self.form_frame, textvariable=self.habit_var, font=("Arial", 11))
         self.habit_combo.pack(fill=tk.X, pady=5)
+        # Ввод в поле сужает выпадающий список до подходящих привычек
+        self.habit_combo.bind("<KeyRelease>", self.filter_habits_combo)
         
         # Выбор даты и времени
         time_frame = tk.Frame(self.form_frame, bg="white")
         time_frame.pack(fill=tk.X, pady=10)
         
-        # Дата
+        # Дата; само поле создается в create_date_entry после первой отрисовки
         tk.Label(time_frame, text="Дата:", bg="white").pack(side=tk.LEFT, padx=(0, 10))
         
-        self.date_entry = DateEntry(
-            time_frame,
-            width=12,
-            background='darkblue',
-            foreground='white',
-            borderwidth=2,
-            date_pattern='yyyy-mm-dd',
-            font=("Arial", 10)
-        )
-        self.date_entry.pack(side=tk.LEFT, padx=(0, 20))
+        self.date_entry = None
+        self.date_entry_frame = tk.Frame(time_frame, bg="white")
+        self.date_entry_frame.pack(side=tk.LEFT, padx=(0, 20))
         
         # Время
         tk.Label(time_frame, text="Время:", bg="white").pack(side=tk.LEFT, padx=(0, 10))
@@ -234,7 +351,40 @@ class HabitsApp:
             height=2,
             command=self.add_habit_log
         )
-        add_btn.pack(pady=20, fill=tk.X)
+        add_btn.pack(pady=(20, 5), fill=tk.X)
+        
+        tk.Button(
+            self.form_frame,
+            text="Пакетный ввод...",
+            bg=self.accent_color,
+            fg="white",
+            font=("Arial", 10),
+            command=self.show_batch_entry
+        ).pack(pady=(0, 20), fill=tk.X)
+        
+        # Привычки по расписанию: просроченные и на сегодня
+        agenda_frame = tk.Frame(left_frame, bg="white", bd=2, relief=tk.RAISED, padx=15, pady=10)
+        agenda_frame.pack(fill=tk.X, pady=(20, 0))
+        
+        tk.Label(
+            agenda_frame,
+            text="По расписанию",
+            font=("Arial", 12, "bold"),
+            bg="white",
+            fg=self.accent_color
+        ).pack(anchor="w")
+        
+        self.agenda_empty_label = tk.Label(agenda_frame, text="Нет привычек с расписанием", bg="white", fg="#7f8c8d")
+        self.agenda_empty_label.pack(anchor="w")
+        
+        # У каждого списка своя рамка: строки добавляются в конец родителя,
+        # и в общей рамке просроченные оказались бы под сегодняшними
+        overdue_frame = tk.Frame(agenda_frame, bg="white")
+        overdue_frame.pack(fill=tk.X)
+        due_frame = tk.Frame(agenda_frame, bg="white")
+        due_frame.pack(fill=tk.X)
+        self.overdue_list = HabitListView(overdue_frame, "#fdebd0", "#d35400")
+        self.due_list = HabitListView(due_frame, "#e8f4fd", self.accent_color)
         
         # Правая колонка: списки привычек
         # Плохие привычки
@@ -265,6 +415,8 @@ class HabitsApp:
         self.bad_canvas.pack(side="left", fill="both", expand=True)
         self.bad_scrollbar.pack(side="right", fill="y")
         
+        self.bad_list = HabitListView(self.bad_scrollable_frame, "#fadbd8", "#e74c3c")
+        
         # Хорошие привычки
         self.good_frame = tk.Frame(right_frame, bg="white", bd=2, relief=tk.RAISED, padx=15, pady=15)
         self.good_frame.pack(fill=tk.BOTH, expand=True)
@@ -292,6 +444,28 @@ class HabitsApp:
         
         self.good_canvas.pack(side="left", fill="both", expand=True)
         self.good_scrollbar.pack(side="right", fill="y")
+        
+        self.good_list = HabitListView(self.good_scrollable_frame, "#d5f4e6", "#27ae60")
+        
+        return self.main_page
+    
+    def create_date_entry(self):
+        """Поле выбора даты на главной странице"""
+        if self.date_entry is not None:
+            return
+        from tkcalendar import DateEntry
+        
+        self.date_entry = DateEntry(
+            self.date_entry_frame,
+            width=12,
+            background='darkblue',
+            foreground='white',
+            borderwidth=2,
+            date_pattern='yyyy-mm-dd',
+            font=("Arial", 10)
+        )
+        self.date_entry.pack()
+        self.timer.mark("поле даты (tkcalendar)")
     
     def create_habits_list_page(self):
         """Создаем страницу списка привычек"""
@@ -363,23 +537,58 @@ class HabitsApp:
             bg=self.bg_color
         ).pack(pady=(0, 10))
         
+        # Поиск по названию: в таблице остаются только подходящие привычки
+        search_frame = tk.Frame(list_frame, bg=self.bg_color)
+        search_frame.pack(fill=tk.X, pady=(0, 5))
+        tk.Label(search_frame, text="Поиск:", bg=self.bg_color).pack(side=tk.LEFT, padx=(0, 10))
+        self.habits_filter_var = tk.StringVar()
+        self.habits_filter_var.trace_add("write", lambda *args: self.update_habits_table())
+        tk.Entry(search_frame, textvariable=self.habits_filter_var, font=("Arial", 11)).pack(
+            side=tk.LEFT, fill=tk.X, expand=True)
+        
         # Таблица привычек с кнопками удаления
         columns = ("ID", "Название", "Тип", "Звездочек", "Действия")
-        self.habits_tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=15)
+        # В таблице только видимые строки; выделение держится по id привычки
+        self.habits_table = VirtualTable(list_frame, columns, key=lambda values: values[0], height=15)
+        self.habits_tree = self.habits_table.tree
+        # Столбец сортировки и обратный ли порядок
+        self.habits_sort = ("Название", False)
         
         for col in columns:
-            self.habits_tree.heading(col, text=col)
+            if col in self.HABITS_SORT_KEYS:
+                self.habits_tree.heading(col, text=col, command=lambda col=col: self.sort_habits_table(col))
+            else:
+                self.habits_tree.heading(col, text=col)
             self.habits_tree.column(col, width=80)
         
         self.habits_tree.column("Название", width=200)
         self.habits_tree.column("Действия", width=100)
         
-        # Скроллбар
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.habits_tree.yview)
-        self.habits_tree.configure(yscroll=scrollbar.set)
+        self.habits_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        self.habits_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # Кнопка изменения звездочек выбранной привычки
+        stars_btn = tk.Button(
+            list_frame,
+            text="Установить звездочки из формы",
+            bg=self.accent_color,
+            fg="white",
+            font=("Arial", 12, "bold"),
+            height=2,
+            command=self.update_selected_habit_stars
+        )
+        stars_btn.pack(pady=(10, 0), fill=tk.X)
+        
+        # Кнопка расписания выбранной привычки
+        schedule_btn = tk.Button(
+            list_frame,
+            text="Расписание выбранной привычки...",
+            bg=self.accent_color,
+            fg="white",
+            font=("Arial", 12, "bold"),
+            height=2,
+            command=self.show_schedule_editor
+        )
+        schedule_btn.pack(pady=(10, 0), fill=tk.X)
         
         # Кнопка удаления выбранной привычки
         delete_btn = tk.Button(
@@ -392,9 +601,13 @@ class HabitsApp:
             command=self.delete_selected_habit
         )
         delete_btn.pack(pady=10, fill=tk.X)
+        
+        return self.habits_list_page
     
     def create_calendar_page(self):
         """Создаем страницу календаря"""
+        from calendar_view import CalendarView
+        
         self.calendar_page = tk.Frame(self.main_container, bg=self.bg_color)
         
         frame = tk.Frame(self.calendar_page, bg=self.bg_color)
@@ -451,201 +664,51 @@ class HabitsApp:
         self.cal_frame_container = tk.Frame(frame, bg=self.bg_color)
         self.cal_frame_container.pack(fill=tk.BOTH, expand=True)
         
-        # Создаем календарь
-        self.create_calendar_grid()
+        # Календарь рисуется на одном Canvas, ячейки создаются один раз
+        self.calendar_view = CalendarView(self.cal_frame_container)
+        self.calendar_view.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        return self.calendar_page
     
     def create_calendar_grid(self):
-        """Создаем сетку календаря"""
-        # Очищаем старую сетку
-        for widget in self.cal_frame_container.winfo_children():
-            widget.destroy()
-        
-        # Создаем основной контейнер для календаря
-        calendar_container = tk.Frame(self.cal_frame_container, bg="white", bd=2, relief=tk.RAISED)
-        calendar_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-        
-        # Заголовки дней недели
-        days = ["ПОНЕДЕЛЬНИК", "ВТОРНИК", "СРЕДА", "ЧЕТВЕРГ", "ПЯТНИЦА", "СУББОТА", "ВОСКРЕСЕНЬЕ"]
-        
-        # Создаем сетку 7x8 (7 дней недели + заголовки)
-        for col in range(7):
-            calendar_container.columnconfigure(col, weight=1, uniform="calendar_col")
-        
-        for row in range(8):  # 0 - заголовки, 1-7 - недели
-            calendar_container.rowconfigure(row, weight=1, uniform="calendar_row")
-        
-        # Заголовки дней недели
-        for i, day in enumerate(days):
-            day_label = tk.Label(
-                calendar_container,
-                text=day,
-                font=("Arial", 9, "bold"),
-                bg="#e0e0e0",
-                fg="#333333",
-                height=2,
-                relief=tk.RAISED,
-                bd=1
-            )
-            day_label.grid(row=0, column=i, sticky="nsew", padx=1, pady=1)
-        
-        # Получаем первый и последний день месяца
+        """Заполняем сетку календаря логами текущего месяца"""
         year = self.current_date.year
         month = self.current_date.month
         
-        # Первый день месяца
-        first_day = date(year, month, 1)
-        # День недели первого дня (0 = понедельник, 6 = воскресенье)
-        first_day_weekday = first_day.weekday()
-        
-        # Количество дней в месяце
-        days_in_month = calendar.monthrange(year, month)[1]
-        
-        # Загружаем привычки за месяц с временем
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        
-        # Получаем все логи за месяц
-        start_date = date(year, month, 1)
-        end_date = date(year, month, days_in_month)
-        
-        cursor.execute('''
-            SELECT hl.date, hl.time, h.name, h.is_good
-            FROM habit_logs hl
-            JOIN habits h ON hl.habit_id = h.id
-            WHERE date(hl.date) BETWEEN date(?) AND date(?)
-            ORDER BY hl.date, hl.time DESC
-        ''', (start_date, end_date))
-        
-        month_logs = cursor.fetchall()
-        conn.close()
-        
-        # Группируем логи по дням
-        logs_by_day = {}
-        for log in month_logs:
-            log_date = datetime.strptime(log[0], '%Y-%m-%d').date()
-            day = log_date.day
-            if day not in logs_by_day:
-                logs_by_day[day] = []
-            logs_by_day[day].append(log)
-        
-        # Заполняем календарь
-        day_num = 1
-        start_row = 1  # Начинаем с первой строки после заголовков
-        max_weeks = 6  # Максимум 6 недель в месяце
-        
-        for week in range(max_weeks):
-            for weekday in range(7):
-                current_row = start_row + week
-                
-                if current_row >= 8:  # Не превышаем количество строк
-                    break
-                    
-                if (week == 0 and weekday < first_day_weekday) or day_num > days_in_month:
-                    # Пустая ячейка
-                    cell = tk.Frame(
-                        calendar_container,
-                        bg="#f9f9f9",
-                        relief=tk.SUNKEN,
-                        bd=1
-                    )
-                    cell.grid(row=current_row, column=weekday, sticky="nsew", padx=1, pady=1)
-                else:
-                    # Ячейка с днем
-                    cell = tk.Frame(
-                        calendar_container,
-                        bg="white",
-                        relief=tk.RAISED,
-                        bd=1
-                    )
-                    cell.grid(row=current_row, column=weekday, sticky="nsew", padx=1, pady=1)
-                    
-                    # Настраиваем сетку внутри ячейки
-                    cell.rowconfigure(0, weight=0)  # Для номера дня
-                    cell.rowconfigure(1, weight=1)  # Для списка привычек
-                    
-                    # Номер дня
-                    day_bg = "#e8f4fd" if day_num == date.today().day and month == date.today().month and year == date.today().year else "white"
-                    
-                    day_header = tk.Frame(cell, bg=day_bg, height=25)
-                    day_header.grid(row=0, column=0, sticky="ew")
-                    day_header.grid_propagate(False)
-                    
-                    day_label = tk.Label(
-                        day_header,
-                        text=str(day_num),
-                        font=("Arial", 10, "bold"),
-                        bg=day_bg,
-                        fg="#2c3e50"
-                    )
-                    day_label.pack(pady=3)
-                    
-                    # Привычки за этот день
-                    if day_num in logs_by_day:
-                        # Создаем кадр для привычек с прокруткой
-                        habits_frame = tk.Frame(cell, bg="white")
-                        habits_frame.grid(row=1, column=0, sticky="nsew")
-                        
-                        # Кастомный список с прокруткой
-                        habits_canvas = tk.Canvas(habits_frame, bg="white", highlightthickness=0, height=100)
-                        habits_scrollbar = tk.Scrollbar(habits_frame, orient="vertical", command=habits_canvas.yview)
-                        habits_scrollable_frame = tk.Frame(habits_canvas, bg="white")
-                        
-                        habits_scrollable_frame.bind(
-                            "<Configure>",
-                            lambda e, canvas=habits_canvas: canvas.configure(scrollregion=canvas.bbox("all"))
-                        )
-                        
-                        habits_canvas.create_window((0, 0), window=habits_scrollable_frame, anchor="nw")
-                        habits_canvas.configure(yscrollcommand=habits_scrollbar.set)
-                        
-                        habits_canvas.pack(side="left", fill="both", expand=True)
-                        habits_scrollbar.pack(side="right", fill="y")
-                        
-                        # Добавляем привычки (сортировка по времени, позже - выше)
-                        logs = logs_by_day[day_num]
-                        for log in logs:
-                            log_date, log_time, habit_name, is_good = log
-                            
-                            # Форматируем время
-                            try:
-                                time_obj = datetime.strptime(log_time, '%H:%M')
-                                time_str = time_obj.strftime('%H:%M')
-                            except:
-                                time_str = log_time
-                            
-                            habit_frame = tk.Frame(habits_scrollable_frame, bg="white")
-                            habit_frame.pack(fill=tk.X, pady=2)
-                            
-                            # Цвет в зависимости от типа привычки
-                            habit_bg = "#d5f4e6" if is_good == 1 else "#fadbd8"
-                            habit_fg = "#27ae60" if is_good == 1 else "#e74c3c"
-                            
-                            habit_label = tk.Label(
-                                habit_frame,
-                                text=f"{time_str} - {habit_name}",
-                                font=("Arial", 8),
-                                bg=habit_bg,
-                                fg=habit_fg,
-                                anchor="w",
-                                padx=5,
-                                pady=2,
-                                relief=tk.RAISED,
-                                bd=1
-                            )
-                            habit_label.pack(fill=tk.X)
-                    
-                    day_num += 1
-        
-        # Если остались пустые строки, заполняем их
-        for row in range(current_row + 1, 8):
-            for col in range(7):
-                empty_cell = tk.Frame(
-                    calendar_container,
-                    bg="#f9f9f9",
-                    relief=tk.SUNKEN,
-                    bd=1
-                )
-                empty_cell.grid(row=row, column=col, sticky="nsew", padx=1, pady=1)
+        logs_by_day = self.month_cache.get(year, month)
+        if logs_by_day is None:
+            # Пока месяц грузится, показываем пустую сетку
+            self.calendar_view.show_month(year, month, {})
+            version = self.month_cache.version(year, month)
+            self.executor.submit(
+                lambda core: core.calendar_month(year, month),
+                lambda logs: self._calendar_month_loaded(year, month, version, logs),
+                tag="calendar"
+            )
+        else:
+            self.calendar_view.show_month(year, month, logs_by_day)
+        
+        # Соседние месяцы подгружаем заранее, чтобы листание не ждало базу
+        self.prefetch_months(year, month)
+    
+    def _calendar_month_loaded(self, year, month, version, logs_by_day):
+        self.month_cache.put(year, month, version, logs_by_day)
+        self.calendar_view.show_month(year, month, logs_by_day)
+    
+    def prefetch_months(self, year, month):
+        """Подгрузить в кэш предыдущий и следующий месяцы"""
+        for delta in (-1, 1):
+            key = shift_month(year, month, delta)
+            if key in self.month_cache or key in self.prefetching:
+                continue
+            self.prefetching.add(key)
+            version = self.month_cache.version(*key)
+            
+            def loaded(logs, key=key, version=version):
+                self.prefetching.discard(key)
+                self.month_cache.put(*key, version, logs)
+            
+            self.executor.submit(lambda core, key=key: core.calendar_month(*key), loaded)
     
     def create_notes_page(self):
         """Создаем страницу заметок"""
@@ -659,11 +722,23 @@ class HabitsApp:
             text="Заметки",
             font=("Arial", 18, "bold"),
             bg=self.bg_color
-        ).pack(pady=(0, 20))
+        ).pack(pady=(0, 5))
+        
+        # Индикатор автосохранения
+        self.notes_status_label = tk.Label(
+            frame,
+            text="",
+            font=("Arial", 10),
+            bg=self.bg_color,
+            fg="#7f8c8d"
+        )
+        self.notes_status_label.pack(anchor="e", pady=(0, 5))
         
         # Текстовое поле для заметок
-        self.notes_text = tk.Text(frame, height=20, font=("Arial", 12))
+        # Своя история правок: Ctrl+Z в поле отменяет набор, а не запись в базу
+        self.notes_text = tk.Text(frame, height=20, font=("Arial", 12), undo=True)
         self.notes_text.pack(fill=tk.BOTH, expand=True)
+        self.notes_text.bind("<<Modified>>", self.on_notes_modified)
         
         # Кнопка сохранения
         self.save_notes_btn = tk.Button(
@@ -676,299 +751,570 @@ class HabitsApp:
             command=self.save_notes
         )
         self.save_notes_btn.pack(pady=10, fill=tk.X)
+        
+        # Кнопка истории версий
+        history_btn = tk.Button(
+            frame,
+            text="История версий",
+            bg=self.accent_color,
+            fg="white",
+            font=("Arial", 11),
+            command=self.show_notes_history
+        )
+        history_btn.pack(fill=tk.X)
+        
+        return self.notes_page
+    
+    def create_stats_page(self):
+        """Создаем страницу статистики"""
+        self.stats_page = tk.Frame(self.main_container, bg=self.bg_color)
+        
+        frame = tk.Frame(self.stats_page, bg=self.bg_color)
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        tk.Label(
+            frame,
+            text="Статистика привычек",
+            font=("Arial", 18, "bold"),
+            bg=self.bg_color
+        ).pack(pady=(0, 20))
+        
+        columns = ("Название", "Последний раз", "Серия", "Лучшая серия",
+                   "7 дней", "30 дней", "365 дней", "Звезды")
+        self.stats_tree = ttk.Treeview(frame, columns=columns, show="headings", height=20)
+        
+        for col in columns:
+            self.stats_tree.heading(col, text=col)
+            self.stats_tree.column(col, width=80, anchor="center")
+        
+        self.stats_tree.column("Название", width=200, anchor="w")
+        self.stats_tree.column("Последний раз", width=140)
+        self.stats_tree.tag_configure("good", foreground="#27ae60")
+        self.stats_tree.tag_configure("bad", foreground="#c0392b")
+        
+        scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self.stats_tree.yview)
+        self.stats_tree.configure(yscroll=scrollbar.set)
+        
+        self.stats_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        return self.stats_page
+    
+    def create_history_page(self):
+        """Создаем страницу истории логов"""
+        self.history_page = tk.Frame(self.main_container, bg=self.bg_color)
+        
+        frame = tk.Frame(self.history_page, bg=self.bg_color)
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        tk.Label(
+            frame,
+            text="История логов",
+            font=("Arial", 18, "bold"),
+            bg=self.bg_color
+        ).pack(pady=(0, 10))
+        
+        self.history_total_label = tk.Label(frame, text="", font=("Arial", 11), bg=self.bg_color)
+        self.history_total_label.pack(anchor="w", pady=(0, 5))
+        
+        # Строки подгружаются страницами по мере прокрутки
+        columns = ("Дата", "Время", "Привычка", "Тип", "Звезды")
+        self.history_table = VirtualTable(frame, columns, height=20)
+        for col in columns:
+            self.history_table.tree.heading(col, text=col)
+            self.history_table.tree.column(col, width=100, anchor="center")
+        self.history_table.tree.column("Привычка", width=250, anchor="w")
+        self.history_table.pack(fill=tk.BOTH, expand=True)
+        
+        return self.history_page
+    
+    def create_analytics_page(self):
+        """Создаем страницу аналитики"""
+        from analytics_view import AnalyticsView
+        
+        self.analytics_page = tk.Frame(self.main_container, bg=self.bg_color)
+        
+        frame = tk.Frame(self.analytics_page, bg=self.bg_color)
+        frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
+        
+        tk.Label(
+            frame,
+            text="Аналитика",
+            font=("Arial", 18, "bold"),
+            bg=self.bg_color
+        ).pack(pady=(0, 10))
+        
+        # Фильтры: привычка, глубина истории и шаг трендов
+        controls = tk.Frame(frame, bg=self.bg_color)
+        controls.pack(fill=tk.X, pady=(0, 10))
+        
+        self.analytics_habit_combo = ttk.Combobox(controls, state="readonly", width=30)
+        self.analytics_habit_combo.pack(side=tk.LEFT)
+        
+        self.analytics_years_combo = ttk.Combobox(controls, state="readonly", width=10,
+                                                  values=list(self.ANALYTICS_YEARS))
+        self.analytics_years_combo.current(0)
+        self.analytics_years_combo.pack(side=tk.LEFT, padx=10)
+        
+        self.analytics_period_combo = ttk.Combobox(controls, state="readonly", width=10,
+                                                   values=list(self.ANALYTICS_PERIODS))
+        self.analytics_period_combo.current(0)
+        self.analytics_period_combo.pack(side=tk.LEFT)
+        
+        for combo in (self.analytics_habit_combo, self.analytics_years_combo, self.analytics_period_combo):
+            combo.bind("<<ComboboxSelected>>", lambda e: self.update_analytics())
+        
+        self.analytics_total_label = tk.Label(controls, text="", font=("Arial", 11), bg=self.bg_color)
+        self.analytics_total_label.pack(side=tk.RIGHT)
+        
+        self.analytics_view = AnalyticsView(frame)
+        self.analytics_view.pack(fill=tk.BOTH, expand=True)
+        
+        return self.analytics_page
     
     def hide_all_pages(self):
         """Скрывает все страницы"""
-        if hasattr(self, 'main_page'):
-            self.main_page.pack_forget()
-        if hasattr(self, 'habits_list_page'):
-            self.habits_list_page.pack_forget()
-        if hasattr(self, 'calendar_page'):
-            self.calendar_page.pack_forget()
-        if hasattr(self, 'notes_page'):
-            self.notes_page.pack_forget()
+        # Результаты запросов страницы, с которой уходим, больше не нужны
+        if self.current_page:
+            self.executor.cancel(self.current_page)
+        
+        # Несохраненные заметки записываем сразу, не дожидаясь паузы в наборе
+        if self.current_page == "notes":
+            self.flush_notes_autosave()
+        
+        for page in self.pages.values():
+            page.pack_forget()
     
     def show_main(self):
         """Показать главную страницу"""
         self.hide_all_pages()
         self.current_page = "main"
-        self.main_page.pack(fill=tk.BOTH, expand=True)
+        self.ensure_page("main").pack(fill=tk.BOTH, expand=True)
         self.update_main_page()
     
     def show_habits_list(self):
         """Показать страницу списка привычек"""
         self.hide_all_pages()
         self.current_page = "habits_list"
-        self.habits_list_page.pack(fill=tk.BOTH, expand=True)
+        self.ensure_page("habits_list").pack(fill=tk.BOTH, expand=True)
+        # self.habits поддерживается в актуальном виде событиями
         self.update_habits_table()
     
     def show_calendar(self):
         """Показать страницу календаря"""
         self.hide_all_pages()
         self.current_page = "calendar"
-        self.calendar_page.pack(fill=tk.BOTH, expand=True)
+        self.ensure_page("calendar").pack(fill=tk.BOTH, expand=True)
         self.update_calendar()
     
     def show_notes(self):
         """Показать страницу заметок"""
         self.hide_all_pages()
         self.current_page = "notes"
-        self.notes_page.pack(fill=tk.BOTH, expand=True)
+        self.ensure_page("notes").pack(fill=tk.BOTH, expand=True)
         self.load_notes()
     
+    def show_stats(self):
+        """Показать страницу статистики"""
+        self.hide_all_pages()
+        self.current_page = "stats"
+        self.ensure_page("stats").pack(fill=tk.BOTH, expand=True)
+        if self.stats_day != date.today():
+            self.update_stats()
+    
+    def update_stats(self):
+        """Пересчитать статистику привычек в фоне"""
+        today = date.today()
+        
+        def loaded(stats):
+            self.stats_day = today
+            self.update_stats_table(stats)
+        
+        self.executor.submit(lambda core: core.stats.habits(today), loaded, tag="stats")
+    
+    def show_analytics(self):
+        """Показать страницу аналитики"""
+        self.hide_all_pages()
+        self.current_page = "analytics"
+        self.ensure_page("analytics").pack(fill=tk.BOTH, expand=True)
+        self.update_analytics_habits()
+        if self.analytics_day != date.today():
+            self.update_analytics()
+    
+    def show_history(self):
+        """Показать страницу истории логов"""
+        self.hide_all_pages()
+        self.current_page = "history"
+        self.ensure_page("history").pack(fill=tk.BOTH, expand=True)
+        if self.history_stale:
+            self.update_history()
+    
+    def update_history(self):
+        """Перечитать количество логов и начать историю заново"""
+        def counted(count):
+            self.history_stale = False
+            self.history_total_label.config(text=f"Всего логов: {count}")
+            self.history_table.show_paged(count, self.fetch_history_page, LogHistoryService.PAGE_SIZE)
+        
+        self.executor.submit(lambda core: core.history.count(), counted, tag="history")
+    
+    def fetch_history_page(self, number, callback):
+        # Без тега: страница нужна таблице, даже если пользователь ушел со страницы
+        self.executor.submit(lambda core: core.history.page(number), callback)
+    
+    def update_analytics_habits(self):
+        """Обновить список привычек в фильтре аналитики"""
+        selected = self.analytics_habit_combo.get()
+        names = ["Все привычки"] + [h[1] for h in self.habits]
+        self.analytics_habit_combo['values'] = names
+        if selected not in names:
+            # Выбранную привычку удалили: графики нужно перестроить
+            self.analytics_habit_combo.set(names[0])
+            self.analytics_day = None
+    
+    def update_analytics(self):
+        """Пересчитать тепловую карту и тренды в фоне"""
+        habit = self.habit_index.by_name.get(self.analytics_habit_combo.get())
+        habit_id = habit[0] if habit else None
+        years = self.ANALYTICS_YEARS[self.analytics_years_combo.get()]
+        period = self.ANALYTICS_PERIODS[self.analytics_period_combo.get()]
+        
+        today = date.today()
+        
+        self.executor.cancel("analytics")
+        self.executor.submit(
+            lambda core: core.analytics.overview(habit_id, years, period, today),
+            lambda data: self._fill_analytics(data, today),
+            tag="analytics"
+        )
+    
+    def _fill_analytics(self, data, today):
+        self.analytics_day = today
+        self.analytics_total_label.config(text=f"Логов за период: {data['total']}")
+        self.analytics_view.show(data)
+    
+    def _habits_on_change(self, changes):
+        """Поддерживать self.habits и виджеты со списком привычек"""
+        if not events.habits_touched(changes):
+            return
+        
+        # Новую привычку проще перечитать целиком: у нее есть дата создания
+        if any(isinstance(e, (events.HabitCreated, events.LogsImported)) for e in changes):
+            self.load_habits(self._habits_changed)
+            return
+        
+        for e in changes:
+            if isinstance(e, events.HabitDeleted):
+                self.habits = [h for h in self.habits if h[0] != e.habit_id]
+            elif isinstance(e, events.StarsChanged):
+                self.habits = [h[:3] + (e.stars,) + h[4:] if h[0] == e.habit_id else h
+                               for h in self.habits]
+        self._habits_changed()
+    
+    def _main_on_change(self, changes):
+        # Любая запись меняет звезды или списки главной страницы
+        self.data_version += 1
+        if self.current_page == "main":
+            self.update_main_page()
+    
+    def _calendar_on_change(self, changes):
+        """Сбросить месяцы с измененными логами и перерисовать текущий, если он среди них"""
+        # Кэш месяцев и текущий месяц появляются вместе со страницей календаря
+        if "calendar" not in self.pages:
+            return
+        shown = (self.current_date.year, self.current_date.month)
+        redraw = False
+        for e in changes:
+            if isinstance(e, events.LogAdded):
+                months = [e.date]
+            elif isinstance(e, (events.LogsAdded, events.LogsRemoved)):
+                months = e.dates
+            elif isinstance(e, events.HabitDeleted):
+                months = e.months
+            elif isinstance(e, (events.LogsImported, events.ScheduleChanged)):
+                self.month_cache.invalidate_all()
+                redraw = True
+                continue
+            else:
+                continue
+            self.month_cache.invalidate_dates(months)
+            redraw = redraw or shown in {(int(m[:4]), int(m[5:7])) for m in months}
+        
+        if redraw and self.current_page == "calendar":
+            self.update_calendar()
+    
+    def _stats_on_change(self, changes):
+        if not events.logs_touched(changes) and not events.habits_touched(changes):
+            return
+        self.stats_day = None
+        if self.current_page == "stats":
+            self.update_stats()
+    
+    def _history_on_change(self, changes):
+        if not events.logs_touched(changes) and not events.habits_touched(changes):
+            return
+        # Новый лог сдвигает номера всех строк истории, поэтому она читается заново
+        self.history_stale = True
+        if self.current_page == "history":
+            self.update_history()
+    
+    def _analytics_on_change(self, changes):
+        if any(not isinstance(e, (events.HabitCreated, events.ScheduleChanged, events.NotesChanged)) for e in changes):
+            self.analytics_day = None
+        if self.current_page == "analytics" and self.analytics_day is None:
+            self.update_analytics()
+    
+    def _notes_on_change(self, changes):
+        # Страница заметок перечитывается при каждом показе, поэтому
+        # обновлять ее нужно, только если она на экране
+        if self.current_page == "notes" and any(isinstance(e, events.NotesChanged) for e in changes):
+            self.load_notes()
+    
     def update_main_page(self):
-        """Обновить главную страницу"""
-        # Обновляем комбобокс с привычками
-        self.update_habits_combo()
+        """Обновить главную страницу, если данные могли измениться"""
+        # Списки по расписанию зависят от сегодняшней даты
+        version = (self.data_version, date.today())
+        if self.main_version == version:
+            return
+        
+        self.executor.submit(
+            HabitsCore.main_page,
+            lambda data: self._fill_main_page(data, version),
+            tag="main"
+        )
+    
+    def _fill_main_page(self, data, version):
+        self.main_version = version
+        self.habits, self.total_stars, bad_habits, good_habits, (overdue, due) = data
+        
+        # Обновляем виджеты со списком привычек, в том числе комбобокс
+        self._habits_changed()
         
         # Обновляем звездочки
-        self.load_stars()
         self.stars_label.config(text=f"★ {self.total_stars}")
         
         # Обновляем списки привычек
-        self.update_habit_lists()
+        self.update_habit_lists(bad_habits, good_habits)
+        self.update_agenda(overdue, due)
+        
+        if not self.first_data_shown:
+            self.first_data_shown = True
+            self.timer.mark("данные главной страницы")
+            if "--startup-report" in sys.argv:
+                self.timer.report()
     
     def init_db(self):
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        
-        # Таблица привычек
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS habits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL UNIQUE,
-                is_good INTEGER DEFAULT 1,
-                stars INTEGER DEFAULT 1,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Таблица логов привычек (выполненные привычки)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS habit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_id INTEGER,
-                date TEXT NOT NULL,
-                time TEXT NOT NULL,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Таблица заметок
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                content TEXT,
-                created_at TEXT DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Добавляем тестовые данные, если таблица привычек пуста
-        cursor.execute('SELECT COUNT(*) FROM habits')
-        if cursor.fetchone()[0] == 0:
-            test_habits = [
-                ('Утренняя зарядка', 1, 2),
-                ('Чтение книги', 1, 1),
-                ('Медитация', 1, 1),
-                ('Курение', 0, 3),
-                ('Поздний отход ко сну', 0, 2),
-                ('Пить воду 2л', 1, 1)
-            ]
-            cursor.executemany('INSERT INTO habits (name, is_good, stars) VALUES (?, ?, ?)', test_habits)
-            
-            # Добавляем тестовые логи с временем
-            from datetime import date as dt_date, time as dt_time
-            today = dt_date.today()
-            
-            test_logs = [
-                (1, today.isoformat(), '08:30', 'утренняя зарядка'),
-                (2, today.isoformat(), '20:00', 'чтение перед сном'),
-                (3, (today - timedelta(days=1)).isoformat(), '09:15', 'медитация утром'),
-                (4, (today - timedelta(days=2)).isoformat(), '14:30', 'перекур'),
-                (6, (today - timedelta(days=3)).isoformat(), '12:00', 'выпил воду'),
-                (1, (today - timedelta(days=4)).isoformat(), '07:45', 'зарядка'),
-                (2, (today - timedelta(days=5)).isoformat(), '19:30', 'чтение'),
-                (3, (today - timedelta(days=6)).isoformat(), '21:00', 'вечерняя медитация'),
-                (4, (today - timedelta(days=7)).isoformat(), '11:00', 'сигарета'),
-                (5, (today - timedelta(days=8)).isoformat(), '01:30', 'поздно лег'),
-                (6, (today - timedelta(days=9)).isoformat(), '15:00', 'вода после обеда')
-            ]
-            
-            # Удаляем последний элемент комментария из тестовых данных
-            test_logs = [(log[0], log[1], log[2]) for log in test_logs]
-            
-            cursor.executemany('INSERT INTO habit_logs (habit_id, date, time) VALUES (?, ?, ?)', test_logs)
-            
-            # Добавляем тестовую заметку
-            cursor.execute('INSERT INTO notes (date, content) VALUES (?, ?)', 
-                         (today.isoformat(), 'Первая заметка. Стараюсь вести здоровый образ жизни.'))
-        
-        conn.commit()
-        conn.close()
-    
-    def load_habits(self):
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM habits ORDER BY name')
-        self.habits = cursor.fetchall()
-        conn.close()
-    
-    def load_stars(self):
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        
-        # Рассчитываем общее количество звезд
-        cursor.execute('''
-            SELECT SUM(CASE WHEN h.is_good = 1 THEN h.stars ELSE -h.stars END)
-            FROM habit_logs hl
-            JOIN habits h ON hl.habit_id = h.id
-        ''')
-        
-        result = cursor.fetchone()
-        self.total_stars = result[0] if result[0] is not None else 0
-        conn.close()
-    
-    def update_habits_combo(self):
+        # Вся работа с базой идет в отдельном потоке; схема создается
+        # первой заявкой, поэтому остальные запросы выполнятся после нее
+        self.executor = QueryExecutor(self.root, HabitsCore.open, on_error=self.show_db_error)
+        self.executor.submit(HabitsCore.init_schema)
+        self.month_cache = MonthCache()
+        self.calendar_today = date.today()
+        self.prefetching = set()
+    
+    def show_db_error(self, error):
+        messagebox.showerror("Ошибка", f"Ошибка базы данных: {error}")
+    
+    def load_habits(self, callback=None, tag=None):
+        """Загрузить привычки в фоне и затем вызвать callback"""
+        def loaded(habits):
+            self.habits = habits
+            if callback:
+                callback()
+        
+        self.executor.submit(lambda core: core.habits.all(), loaded, tag=tag)
+    
+    def update_habits_combo(self, old_index=None):
         """Обновить список в комбобоксе привычек"""
-        self.load_habits()
-        habit_names = [h[1] for h in self.habits]
-        self.habit_combo['values'] = habit_names
-        if habit_names:
-            self.habit_combo.current(0)
+        selected = self.habit_var.get()
+        by_name = self.habit_index.by_name
+        # Выбранную привычку сохраняем, если она еще существует; недописанный
+        # текст поиска не трогаем, сбрасываем только удаленную привычку
+        if selected not in by_name and (not selected or old_index is None or selected in old_index.by_name):
+            self.habit_var.set(self.habit_index.keys[0][1] if by_name else "")
+        self.filter_habits_combo()
+    
+    def filter_habits_combo(self, event=None):
+        """Оставить в выпадающем списке привычки, подходящие к введенному тексту"""
+        text = self.habit_var.get()
+        if text in self.habit_index.by_name:
+            # Выбрана привычка целиком: показываем весь список
+            text = ""
+        names = self.habit_index.search(text, limit=self.COMBO_LIMIT)
+        if list(self.habit_combo['values']) != names:
+            self.habit_combo['values'] = names
+    
+    def sort_habits_table(self, column):
+        """Сортировать таблицу привычек по столбцу; повторный щелчок меняет порядок"""
+        current, reverse = self.habits_sort
+        self.habits_sort = (column, not reverse if column == current else False)
+        for col in self.HABITS_SORT_KEYS:
+            arrow = ""
+            if col == column:
+                arrow = " ▼" if self.habits_sort[1] else " ▲"
+            self.habits_tree.heading(col, text=col + arrow)
+        self.update_habits_table()
     
     def update_habits_table(self):
-        """Обновить таблицу привычек на странице списка"""
-        if hasattr(self, 'habits_tree'):
-            # Очищаем таблицу
-            for item in self.habits_tree.get_children():
-                self.habits_tree.delete(item)
-            
-            # Заполняем таблицу
-            for habit in self.habits:
-                habit_id, name, is_good, stars, created_at = habit
-                habit_type = "Хорошая" if is_good == 1 else "Плохая"
-                stars_display = f"+{stars}" if is_good == 1 else f"-{stars}"
-                self.habits_tree.insert("", tk.END, values=(habit_id, name, habit_type, stars_display, "Удалить"))
-    
-    def update_habit_lists(self):
-        """Обновить списки привычек на главной странице"""
-        if not hasattr(self, 'bad_scrollable_frame') or not hasattr(self, 'good_scrollable_frame'):
+        """Показать в таблице привычки, подходящие к строке поиска, в порядке
+        выбранной сортировки"""
+        if "habits_list" not in self.pages:
             return
         
-        # Очищаем списки
-        for widget in self.bad_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        for widget in self.good_scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        
-        # Последние плохие привычки (сортировка по дате и времени)
-        cursor.execute('''
-            SELECT h.name, hl.date, hl.time
-            FROM habit_logs hl
-            JOIN habits h ON hl.habit_id = h.id
-            WHERE h.is_good = 0
-            ORDER BY hl.date DESC, hl.time DESC
-            LIMIT 10
-        ''')
-        
-        bad_habits = cursor.fetchall()
-        for habit in bad_habits:
-            name, habit_date, habit_time = habit
-            
-            # Форматируем дату и время
-            try:
-                date_obj = datetime.strptime(habit_date, '%Y-%m-%d')
-                date_str = date_obj.strftime('%d.%m.%Y')
-            except:
-                date_str = habit_date
-            
-            habit_frame = tk.Frame(self.bad_scrollable_frame, bg="#fadbd8")
-            habit_frame.pack(fill=tk.X, pady=2, padx=2)
-            
-            habit_label = tk.Label(
-                habit_frame,
-                text=f"{date_str} {habit_time} - {name}",
-                font=("Arial", 9),
-                bg="#fadbd8",
-                fg="#e74c3c",
-                anchor="w",
-                padx=5,
-                pady=3
+        habits = self.habits
+        text = self.habits_filter_var.get()
+        if text.strip():
+            by_name = self.habit_index.by_name
+            habits = [by_name[name] for name in self.habit_index.search(text, fuzzy=False)]
+        column, reverse = self.habits_sort
+        habits = sorted(habits, key=self.HABITS_SORT_KEYS[column], reverse=reverse)
+        
+        rows = []
+        for habit_id, name, is_good, stars, created_at in habits:
+            habit_type = "Хорошая" if is_good == 1 else "Плохая"
+            stars_display = f"+{stars}" if is_good == 1 else f"-{stars}"
+            rows.append((habit_id, name, habit_type, stars_display, "Удалить"))
+        self.habits_table.show_rows(rows)
+    
+    def update_stats_table(self, stats):
+        """Заполнить таблицу статистики"""
+        for item in self.stats_tree.get_children():
+            self.stats_tree.delete(item)
+        
+        for name, is_good, last_done, current, longest, week, month, year, stars in stats:
+            self.stats_tree.insert(
+                "", tk.END,
+                values=(name, last_done or "никогда", current, longest, week, month, year, f"{stars:+d}"),
+                tags=("good" if is_good == 1 else "bad",)
             )
-            habit_label.pack(fill=tk.X)
+    
+    def update_habit_lists(self, bad_habits, good_habits):
+        """Обновить списки привычек на главной странице"""
+        # Последние плохие привычки (сортировка по дате и времени)
+        self.bad_list.show([f"{date_str} {habit_time} - {name}" for name, date_str, habit_time in bad_habits])
         
         # Самые старые хорошие привычки (которые давно не делались)
-        cursor.execute('''
-            SELECT h.name, MAX(hl.date || ' ' || hl.time) as last_datetime
-            FROM habits h
-            LEFT JOIN habit_logs hl ON h.id = hl.habit_id
-            WHERE h.is_good = 1
-            GROUP BY h.id
-            ORDER BY last_datetime ASC NULLS FIRST
-            LIMIT 10
-        ''')
-        
-        good_habits = cursor.fetchall()
-        for habit in good_habits:
-            name, last_datetime = habit
-            
-            if last_datetime:
-                try:
-                    # Разделяем дату и время
-                    if ' ' in last_datetime:
-                        date_part, time_part = last_datetime.split(' ', 1)
-                        date_obj = datetime.strptime(date_part, '%Y-%m-%d')
-                        date_str = date_obj.strftime('%d.%m.%Y')
-                        datetime_str = f"{date_str} {time_part}"
-                    else:
-                        datetime_str = last_datetime
-                except:
-                    datetime_str = last_datetime
-            else:
-                datetime_str = "Никогда"
-            
-            habit_frame = tk.Frame(self.good_scrollable_frame, bg="#d5f4e6")
-            habit_frame.pack(fill=tk.X, pady=2, padx=2)
-            
-            habit_label = tk.Label(
-                habit_frame,
-                text=f"{name}\nПоследний раз: {datetime_str}",
-                font=("Arial", 9),
-                bg="#d5f4e6",
-                fg="#27ae60",
-                anchor="w",
-                padx=5,
-                pady=3
-            )
-            habit_label.pack(fill=tk.X)
-        
-        conn.close()
-        
-        # Обновляем прокрутку
-        self.bad_canvas.configure(scrollregion=self.bad_canvas.bbox("all"))
-        self.good_canvas.configure(scrollregion=self.good_canvas.bbox("all"))
+        self.good_list.show([f"{name}\nПоследний раз: {last_datetime or 'Никогда'}"
+                             for name, last_datetime in good_habits])
+    
+    def update_agenda(self, overdue, due):
+        """Обновить списки привычек по расписанию на главной странице"""
+        limit = self.AGENDA_ROWS
+        self.overdue_list.show([f"Пропущено {times} раз, последний {last_date} - {name}"
+                                for name, times, last_date in overdue[:limit]])
+        self.due_list.show([f"Сегодня{' в ' + time_str if time_str else ''}"
+                            f"{f' (еще {left} раз за неделю)' if left > 1 else ''} - {name}"
+                            for name, time_str, left in due[:limit]])
+        if overdue or due:
+            self.agenda_empty_label.pack_forget()
+        else:
+            self.agenda_empty_label.pack(anchor="w")
     
     def update_calendar(self):
         """Обновить календарь"""
         self.month_year_label.config(text=self.current_date.strftime("%B %Y").upper())
+        # Пропуски в кэше посчитаны до вчерашнего дня на момент загрузки
+        if self.calendar_today != date.today():
+            self.calendar_today = date.today()
+            self.month_cache.invalidate_all()
+        # Месяц, который еще грузится, уже не нужен
+        self.executor.cancel("calendar")
         self.create_calendar_grid()
     
     def load_notes(self):
         """Загрузить заметки из базы данных"""
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT content FROM notes ORDER BY id DESC LIMIT 1')
-        result = cursor.fetchone()
+        # Пока заметка грузится, поле недоступно для редактирования
+        self.notes_loaded = False
+        self.notes_text.config(state=tk.NORMAL)
+        self.notes_text.delete("1.0", tk.END)
+        self.notes_text.insert("1.0", "Загрузка...")
+        self.notes_text.config(state=tk.DISABLED)
+        self.executor.submit(lambda core: core.notes.latest(), self._fill_notes, tag="notes")
+    
+    def _fill_notes(self, content):
+        self.notes_text.config(state=tk.NORMAL)
         self.notes_text.delete("1.0", tk.END)
-        if result:
-            self.notes_text.insert("1.0", result[0])
-        conn.close()
+        if content:
+            self.notes_text.insert("1.0", content)
+        self.notes_saved_hash = self.notes_hash(content or "")
+        # Загруженный текст - начало истории правок, а не правка
+        self.notes_text.edit_reset()
+        self.notes_text.edit_modified(False)
+        self.notes_loaded = True
+        self.notes_status_label.config(text="Сохранено")
+    
+    @staticmethod
+    def notes_hash(content):
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).digest()
+    
+    def on_notes_modified(self, event=None):
+        """Изменение текста: откладываем сохранение до паузы в наборе"""
+        # Сброс флага тоже порождает <<Modified>>, такие события пропускаем
+        if not self.notes_text.edit_modified():
+            return
+        self.notes_text.edit_modified(False)
+        if not self.notes_loaded:
+            return
+        
+        # На каждое нажатие - только перезапуск таймера, без чтения текста
+        if self.notes_autosave_job is not None:
+            self.root.after_cancel(self.notes_autosave_job)
+        self.notes_autosave_job = self.root.after(self.NOTES_AUTOSAVE_MS, self.autosave_notes)
+        self.notes_status_label.config(text="Изменено")
+    
+    def flush_notes_autosave(self):
+        """Сохранить заметки сейчас, если есть отложенное сохранение"""
+        if self.notes_autosave_job is not None:
+            self.root.after_cancel(self.notes_autosave_job)
+            self.autosave_notes()
+    
+    def close_window(self):
+        """Сохранить недописанные заметки и закрыть окно"""
+        # Результат записи уже не нужен: заявку выполнит executor.close
+        # после выхода из mainloop, даже если идет предыдущая запись
+        if self.notes_loaded and (self.notes_autosave_job is not None or self.notes_resave):
+            if self.notes_autosave_job is not None:
+                self.root.after_cancel(self.notes_autosave_job)
+                self.notes_autosave_job = None
+            content = self.notes_text.get("1.0", tk.END).strip()
+            if self.notes_hash(content) != self.notes_saved_hash or self.notes_saving:
+                self.executor.submit(lambda core: core.notes.save(content))
+        self.root.destroy()
+    
+    def autosave_notes(self):
+        """Записать заметки в фоне, если текст изменился"""
+        self.notes_autosave_job = None
+        if not self.notes_loaded:
+            return
+        
+        # Пока идет запись, следующую ставим в очередь после нее
+        if self.notes_saving:
+            self.notes_resave = True
+            return
+        
+        content = self.notes_text.get("1.0", tk.END).strip()
+        content_hash = self.notes_hash(content)
+        if content_hash == self.notes_saved_hash:
+            self.notes_status_label.config(text="Сохранено")
+            return
+        
+        def saved(_):
+            self.notes_saving = False
+            self.notes_saved_hash = content_hash
+            if self.notes_resave:
+                self.notes_resave = False
+                self.autosave_notes()
+            else:
+                self.notes_status_label.config(text="Сохранено")
+        
+        def failed(error):
+            self.notes_saving = False
+            self.notes_status_label.config(text="Ошибка сохранения")
+            self.show_db_error(error)
+        
+        self.notes_saving = True
+        self.notes_status_label.config(text="Сохранение...")
+        self.executor.submit(lambda core: core.notes.save(content), saved, failed)
     
     def add_habit_log(self):
         """Добавить выполненную привычку"""
@@ -978,46 +1324,168 @@ class HabitsApp:
             messagebox.showwarning("Ошибка", "Выберите привычку!")
             return
         
-        # Получаем дату и время
-        selected_date = self.date_entry.get_date()
+        # Получаем дату и время; пока поле даты не создано - сегодня
+        selected_date = self.date_entry.get_date() if self.date_entry else date.today()
         date_str = selected_date.strftime('%Y-%m-%d')
         
-        hour = self.hour_var.get().zfill(2)
-        minute = self.minute_var.get().zfill(2)
-        time_str = f"{hour}:{minute}"
-        
         # Валидация времени
         try:
-            datetime.strptime(time_str, '%H:%M')
+            time_str = parse_time(self.hour_var.get(), self.minute_var.get())
         except ValueError:
             messagebox.showwarning("Ошибка", "Неверный формат времени!")
             return
         
         # Находим ID привычки
-        habit_id = None
-        for habit in self.habits:
-            if habit[1] == habit_name:
-                habit_id = habit[0]
-                break
-        
-        if habit_id is None:
+        habit = self.habit_index.by_name.get(habit_name)
+        if habit is None:
             messagebox.showwarning("Ошибка", "Привычка не найдена!")
             return
+        habit_id = habit[0]
         
-        # Сохраняем в базу
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO habit_logs (habit_id, date, time)
-            VALUES (?, ?, ?)
-        ''', (habit_id, date_str, time_str))
-        conn.commit()
-        conn.close()
-        
-        # Обновляем данные
-        self.update_main_page()
+        # Сохраняем в базу. Кэш месяца сбросит событие: результаты заявок
+        # приходят по порядку, поэтому подгрузка месяца, поданная до записи,
+        # придет раньше события и будет сразу же сброшена
+        def added(_):
+            self.bus.publish(events.LogAdded(habit_id, date_str))
+            messagebox.showinfo("Успех", "Привычка добавлена!")
         
-        messagebox.showinfo("Успех", "Привычка добавлена!")
+        self.executor.submit(lambda core: core.logs.add(habit_id, date_str, time_str), added)
+    
+    def show_batch_entry(self):
+        """Окно пакетного ввода: несколько привычек за период по дням недели"""
+        from tkcalendar import DateEntry
+        
+        window = tk.Toplevel(self.root)
+        window.title("Пакетный ввод логов")
+        window.geometry("850x520")
+        
+        # Слева - привычки, можно выбрать несколько
+        left_frame = tk.Frame(window)
+        left_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        tk.Label(left_frame, text="Привычки:").pack(anchor="w")
+        
+        names = self.habit_index.names()
+        habits_list = tk.Listbox(left_frame, width=30, selectmode=tk.EXTENDED, exportselection=False,
+                                 font=("Arial", 10))
+        habits_scrollbar = tk.Scrollbar(left_frame, orient="vertical", command=habits_list.yview)
+        habits_list.configure(yscrollcommand=habits_scrollbar.set)
+        habits_list.insert(tk.END, *names)
+        habits_list.pack(side=tk.LEFT, fill=tk.Y)
+        habits_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        
+        right_frame = tk.Frame(window)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10), pady=10)
+        
+        # Период, дни недели и время
+        period_frame = tk.Frame(right_frame)
+        period_frame.pack(fill=tk.X)
+        today = date.today()
+        tk.Label(period_frame, text="С:").pack(side=tk.LEFT)
+        start_entry = DateEntry(period_frame, width=12, date_pattern='yyyy-mm-dd')
+        start_entry.set_date(today - timedelta(days=30))
+        start_entry.pack(side=tk.LEFT, padx=(5, 15))
+        tk.Label(period_frame, text="По:").pack(side=tk.LEFT)
+        end_entry = DateEntry(period_frame, width=12, date_pattern='yyyy-mm-dd')
+        end_entry.set_date(today)
+        end_entry.pack(side=tk.LEFT, padx=(5, 15))
+        
+        tk.Label(period_frame, text="Время:").pack(side=tk.LEFT)
+        hour_var = tk.StringVar(value=self.hour_var.get())
+        minute_var = tk.StringVar(value=self.minute_var.get())
+        tk.Spinbox(period_frame, from_=0, to=23, width=3, textvariable=hour_var,
+                   format="%02.0f").pack(side=tk.LEFT, padx=(5, 2))
+        tk.Label(period_frame, text=":").pack(side=tk.LEFT)
+        tk.Spinbox(period_frame, from_=0, to=59, width=3, textvariable=minute_var,
+                   format="%02.0f").pack(side=tk.LEFT, padx=2)
+        
+        weekdays_frame = tk.Frame(right_frame)
+        weekdays_frame.pack(fill=tk.X, pady=10)
+        weekday_vars = []
+        for label in self.BATCH_WEEKDAYS:
+            var = tk.IntVar(value=1)
+            tk.Checkbutton(weekdays_frame, text=label, variable=var).pack(side=tk.LEFT)
+            weekday_vars.append(var)
+        
+        def set_weekdays(days):
+            for i, var in enumerate(weekday_vars):
+                var.set(1 if i in days else 0)
+        
+        tk.Button(weekdays_frame, text="Будни", command=lambda: set_weekdays(range(5))).pack(side=tk.LEFT, padx=(10, 2))
+        tk.Button(weekdays_frame, text="Каждый день", command=lambda: set_weekdays(range(7))).pack(side=tk.LEFT)
+        
+        preview = tk.Text(right_frame, font=("Arial", 10), state=tk.DISABLED, height=15)
+        preview.pack(fill=tk.BOTH, expand=True)
+        
+        status_label = tk.Label(right_frame, text="", anchor="w")
+        status_label.pack(fill=tk.X, pady=5)
+        
+        def collect():
+            """Выбранные привычки, дни (ordinal) и время или None с предупреждением"""
+            selected = [names[i] for i in habits_list.curselection()]
+            if not selected:
+                messagebox.showwarning("Ошибка", "Выберите привычки!", parent=window)
+                return None
+            try:
+                time_str = parse_time(hour_var.get(), minute_var.get())
+            except ValueError:
+                messagebox.showwarning("Ошибка", "Неверный формат времени!", parent=window)
+                return None
+            start, end = start_entry.get_date().toordinal(), end_entry.get_date().toordinal()
+            weekdays = {i for i, var in enumerate(weekday_vars) if var.get()}
+            days = recurrence_days(start, end, weekdays)
+            if not days:
+                messagebox.showwarning("Ошибка", "В периоде нет подходящих дней!", parent=window)
+                return None
+            return selected, days, time_str
+        
+        def show_preview():
+            batch = collect()
+            if batch is None:
+                return
+            selected, days, time_str = batch
+            total = len(selected) * len(days)
+            lines = [f"{format_day(day)} {time_str} - {name}" for day in days for name in selected]
+            text = f"Логов: {total} ({len(days)} дн. × {len(selected)} прив.)\n\n" + "\n".join(lines[:self.BATCH_PREVIEW_ROWS])
+            if total > self.BATCH_PREVIEW_ROWS:
+                text += f"\n... и еще {total - self.BATCH_PREVIEW_ROWS}"
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            preview.insert("1.0", text)
+            preview.config(state=tk.DISABLED)
+        
+        def add_batch():
+            batch = collect()
+            if batch is None:
+                return
+            selected, days, time_str = batch
+            total = len(selected) * len(days)
+            if total >= self.BATCH_CONFIRM_LOGS and not messagebox.askyesno(
+                    "Подтверждение", f"Добавить {total} логов?", parent=window):
+                return
+            
+            # Привычку могли удалить, пока окно открыто
+            habit_ids = [self.habit_index.by_name[name][0] for name in selected if name in self.habit_index.by_name]
+            dates = [date.fromordinal(day).isoformat() for day in days]
+            
+            def added(count):
+                # Одно событие на весь пакет - одна перерисовка страниц
+                self.bus.publish(events.LogsAdded(habit_ids, dates))
+                if window.winfo_exists():
+                    status_label.config(text=f"Добавлено логов: {count}")
+            
+            status_label.config(text="Сохранение...")
+            self.executor.submit(lambda core: core.logs.add_batch(habit_ids, days, time_str), added)
+        
+        buttons = tk.Frame(right_frame)
+        buttons.pack(fill=tk.X)
+        tk.Button(buttons, text="Предпросмотр", command=show_preview).pack(side=tk.LEFT)
+        tk.Button(
+            buttons,
+            text="Добавить",
+            bg=self.good_color,
+            fg="white",
+            command=add_batch
+        ).pack(side=tk.RIGHT)
     
     def create_habit(self):
         """Создать новую привычку"""
@@ -1029,82 +1497,329 @@ class HabitsApp:
             messagebox.showwarning("Ошибка", "Введите название привычки!")
             return
         
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                INSERT INTO habits (name, is_good, stars)
-                VALUES (?, ?, ?)
-            ''', (name, is_good, stars))
-            conn.commit()
-        except sqlite3.IntegrityError:
-            messagebox.showwarning("Ошибка", "Привычка с таким названием уже существует!")
-            conn.close()
-            return
-        
-        conn.close()
-        
-        # Обновляем данные
-        self.load_habits()
+        def created(habit_id):
+            # Очищаем поле
+            self.new_habit_name.delete(0, tk.END)
+            
+            self.bus.publish(events.HabitCreated(habit_id, name, is_good, stars))
+            messagebox.showinfo("Успех", "Привычка создана!")
         
-        # Очищаем поле
-        self.new_habit_name.delete(0, tk.END)
+        def failed(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                messagebox.showwarning("Ошибка", "Привычка с таким названием уже существует!")
+            else:
+                self.show_db_error(error)
         
-        # Обновляем комбобокс на главной странице
-        if self.current_page == "main":
-            self.update_habits_combo()
+        self.executor.submit(
+            lambda core: core.habits.create(name, is_good, stars),
+            created,
+            failed
+        )
+    
+    def _habits_changed(self):
+        """Перестроить индекс и построенные виджеты, показывающие список привычек.
+
+        Данные уже в self.habits, запросов к базе здесь нет.
+        """
+        old_index, self.habit_index = self.habit_index, HabitIndex(self.habits)
+        self.update_habits_table()
         
-        messagebox.showinfo("Успех", "Привычка создана!")
+        if "main" in self.pages:
+            self.update_habits_combo(old_index)
+        if "analytics" in self.pages:
+            self.update_analytics_habits()
     
     def delete_selected_habit(self):
         """Удалить выбранную привычку"""
-        if not hasattr(self, 'habits_tree'):
+        if "habits_list" not in self.pages:
             return
         
-        selection = self.habits_tree.selection()
-        if not selection:
+        values = self.habits_table.selected()
+        if not values:
             messagebox.showwarning("Ошибка", "Выберите привычку для удаления!")
             return
         
-        item = self.habits_tree.item(selection[0])
-        habit_id = item['values'][0]
-        habit_name = item['values'][1]
+        habit_id, habit_name = values[0], values[1]
         
         # Подтверждение удаления
         if not messagebox.askyesno("Подтверждение", f"Удалить привычку '{habit_name}'?"):
             return
         
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
+        def deleted(months):
+            # Месяцы с логами привычки календарь сбросит по событию
+            self.bus.publish(events.HabitDeleted(habit_id, months))
+            messagebox.showinfo("Успех", "Привычка удалена!")
+        
+        def failed(error):
+            messagebox.showerror("Ошибка", f"Не удалось удалить привычку: {str(error)}")
+        
+        self.executor.submit(lambda core: core.habits.delete(habit_id), deleted, failed)
+    
+    def update_selected_habit_stars(self):
+        """Изменить количество звездочек выбранной привычки"""
+        values = self.habits_table.selected()
+        if not values:
+            messagebox.showwarning("Ошибка", "Выберите привычку!")
+            return
         
+        habit_id = values[0]
         try:
-            cursor.execute('DELETE FROM habits WHERE id = ?', (habit_id,))
-            conn.commit()
-            messagebox.showinfo("Успех", "Привычка удалена!")
-        except Exception as e:
-            messagebox.showerror("Ошибка", f"Не удалось удалить привычку: {str(e)}")
-        finally:
-            conn.close()
+            stars = int(self.stars_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showwarning("Ошибка", "Неверное количество звездочек!")
+            return
         
-        # Обновляем данные
-        self.load_habits()
-        self.update_habits_table()
+        def updated(_):
+            self.bus.publish(events.StarsChanged(habit_id, stars))
         
-        # Обновляем комбобокс на главной странице
-        if self.current_page == "main":
-            self.update_habits_combo()
+        # Баланс звезд пересчитывается триггером в базе
+        self.executor.submit(lambda core: core.habits.set_stars(habit_id, stars), updated)
+    
+    def show_schedule_editor(self):
+        """Окно расписания выбранной привычки"""
+        values = self.habits_table.selected()
+        if not values:
+            messagebox.showwarning("Ошибка", "Выберите привычку!")
+            return
+        habit_id, habit_name = values[0], values[1]
+        
+        window = tk.Toplevel(self.root)
+        window.title(f"Расписание: {habit_name}")
+        window.geometry("420x350")
+        
+        frame = tk.Frame(window, padx=15, pady=15)
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        current_label = tk.Label(frame, text="Сейчас: без расписания", anchor="w")
+        current_label.pack(fill=tk.X, pady=(0, 10))
+        
+        kind_var = tk.StringVar(value="Без расписания")
+        ttk.Combobox(frame, textvariable=kind_var, state="readonly",
+                     values=list(self.SCHEDULE_KINDS)).pack(fill=tk.X)
+        
+        # Дни недели - для "По дням недели"
+        weekdays_frame = tk.Frame(frame)
+        weekdays_frame.pack(fill=tk.X, pady=(10, 0))
+        weekday_vars = []
+        for label in self.BATCH_WEEKDAYS:
+            var = tk.IntVar(value=0)
+            tk.Checkbutton(weekdays_frame, text=label, variable=var).pack(side=tk.LEFT)
+            weekday_vars.append(var)
+        
+        # Сколько раз в неделю и правило cron
+        per_week_frame = tk.Frame(frame)
+        per_week_frame.pack(fill=tk.X, pady=(10, 0))
+        tk.Label(per_week_frame, text="Раз в неделю:").pack(side=tk.LEFT)
+        per_week_var = tk.StringVar(value="3")
+        tk.Spinbox(per_week_frame, from_=1, to=7, width=3, textvariable=per_week_var).pack(side=tk.LEFT, padx=5)
+        
+        rule_frame = tk.Frame(frame)
+        rule_frame.pack(fill=tk.X, pady=(10, 0))
+        tk.Label(rule_frame, text="Правило (день месяц день_недели):").pack(anchor="w")
+        rule_var = tk.StringVar(value="* * 1-5")
+        tk.Entry(rule_frame, textvariable=rule_var).pack(fill=tk.X)
+        
+        # Время необязательно: пустое - в любое время дня
+        time_frame = tk.Frame(frame)
+        time_frame.pack(fill=tk.X, pady=(10, 0))
+        tk.Label(time_frame, text="Время (необязательно):").pack(side=tk.LEFT)
+        hour_var = tk.StringVar(value="")
+        minute_var = tk.StringVar(value="")
+        tk.Entry(time_frame, textvariable=hour_var, width=3).pack(side=tk.LEFT, padx=(5, 2))
+        tk.Label(time_frame, text=":").pack(side=tk.LEFT)
+        tk.Entry(time_frame, textvariable=minute_var, width=3).pack(side=tk.LEFT, padx=2)
+        
+        current = []
+        
+        def loaded(schedule):
+            if not window.winfo_exists() or schedule is None:
+                return
+            current.append(schedule)
+            current_label.config(text=f"Сейчас: {schedule.describe()}")
+            kind_var.set(next(label for label, kind in self.SCHEDULE_KINDS.items() if kind == schedule.kind))
+            for i, var in enumerate(weekday_vars):
+                var.set(schedule.weekdays >> i & 1)
+            per_week_var.set(str(schedule.per_week))
+            if schedule.rule:
+                rule_var.set(schedule.rule)
+            if schedule.minute is not None:
+                hour_var.set(f"{schedule.minute // 60:02d}")
+                minute_var.set(f"{schedule.minute % 60:02d}")
+        
+        def save():
+            kind = self.SCHEDULE_KINDS[kind_var.get()]
+            schedule = None
+            if kind is not None:
+                try:
+                    minute = None
+                    if hour_var.get().strip() or minute_var.get().strip():
+                        minute = to_minute(parse_time(hour_var.get(), minute_var.get()))
+                    weekdays = sum(1 << i for i, var in enumerate(weekday_vars) if var.get())
+                    # Пропуски считаются с момента, когда расписание задано впервые
+                    start = current[0].start if current else date.today().toordinal()
+                    schedule = Schedule(kind, weekdays, int(per_week_var.get()),
+                                        rule_var.get().strip() if kind == "cron" else None, minute, start)
+                except ValueError as error:
+                    messagebox.showwarning("Ошибка", f"Неверное расписание: {error}", parent=window)
+                    return
+            
+            def saved(_):
+                self.bus.publish(events.ScheduleChanged(habit_id))
+                window.destroy()
+            
+            self.executor.submit(lambda core: core.schedules.set(habit_id, schedule), saved)
+        
+        tk.Button(frame, text="Сохранить", bg=self.good_color, fg="white", command=save).pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.executor.submit(lambda core: core.schedules.get(habit_id), loaded)
     
     def save_notes(self):
         """Сохранить заметки"""
-        content = self.notes_text.get("1.0", tk.END).strip()
-        conn = sqlite3.connect('habits.db')
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO notes (date, content) VALUES (?, ?)', 
-                     (datetime.now().date().isoformat(), content))
-        conn.commit()
-        conn.close()
-        messagebox.showinfo("Успех", "Заметки сохранены!")
+        if self.notes_autosave_job is not None:
+            self.root.after_cancel(self.notes_autosave_job)
+        self.autosave_notes()
+    
+    def show_notes_history(self):
+        """Окно с историей версий заметок"""
+        window = tk.Toplevel(self.root)
+        window.title("История версий заметок")
+        window.geometry("800x500")
+        
+        list_frame = tk.Frame(window)
+        list_frame.pack(side=tk.LEFT, fill=tk.Y, padx=10, pady=10)
+        
+        versions_list = tk.Listbox(list_frame, width=32, font=("Arial", 10))
+        versions_scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=versions_list.yview)
+        versions_list.configure(yscrollcommand=versions_scrollbar.set)
+        versions_list.pack(side=tk.LEFT, fill=tk.Y)
+        versions_scrollbar.pack(side=tk.LEFT, fill=tk.Y)
+        
+        right_frame = tk.Frame(window)
+        right_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(0, 10), pady=10)
+        
+        preview = tk.Text(right_frame, font=("Arial", 11), state=tk.DISABLED)
+        preview.pack(fill=tk.BOTH, expand=True)
+        
+        versions = []
+        
+        def show_versions(history):
+            if not window.winfo_exists():
+                return
+            versions[:] = history
+            for version, created_at, size in history:
+                versions_list.insert(tk.END, f"#{version}  {created_at}  ({size} симв.)")
+        
+        def show_preview(content):
+            if not window.winfo_exists():
+                return
+            preview.config(state=tk.NORMAL)
+            preview.delete("1.0", tk.END)
+            preview.insert("1.0", content)
+            preview.config(state=tk.DISABLED)
+        
+        def on_select(event):
+            selection = versions_list.curselection()
+            if not selection:
+                return
+            version = versions[selection[0]][0]
+            # Текст версии восстанавливается из снимка и дельт только по запросу
+            self.executor.cancel("notes_history")
+            self.executor.submit(lambda core: core.notes.version(version), show_preview, tag="notes_history")
+        
+        def restore():
+            if not self.notes_loaded:
+                return
+            content = preview.get("1.0", tk.END).rstrip("\n")
+            self.notes_text.delete("1.0", tk.END)
+            self.notes_text.insert("1.0", content)
+            window.destroy()
+        
+        versions_list.bind("<<ListboxSelect>>", on_select)
+        
+        tk.Button(
+            right_frame,
+            text="Вернуть эту версию в редактор",
+            bg=self.good_color,
+            fg="white",
+            font=("Arial", 11, "bold"),
+            command=restore
+        ).pack(fill=tk.X, pady=(10, 0))
+        
+        self.executor.submit(lambda core: core.notes.history(), show_versions)
+    
+    def import_logs(self):
+        """Импортировать логи из CSV или JSON Lines"""
+        path = filedialog.askopenfilename(
+            title="Импорт логов",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Все файлы", "*.*")]
+        )
+        if not path:
+            return
+        
+        import importer
+        
+        def imported(report):
+            # Импорт мог затронуть любые месяцы и привычки
+            self.bus.publish(events.LogsImported(report.created_habits))
+            messagebox.showinfo("Импорт завершен", report.summary())
+        
+        self.executor.submit(lambda core: importer.import_logs(core.storage, path), imported)
+    
+    def undo(self, event=None):
+        """Отменить последнее изменение в базе"""
+        return self._journal_step(event, HabitsCore.undo, "Отменено", "Нечего отменять")
+    
+    def redo(self, event=None):
+        """Повторить последнее отмененное изменение"""
+        return self._journal_step(event, HabitsCore.redo, "Повторено", "Нечего повторять")
+    
+    def _journal_step(self, event, step, done_text, empty_text):
+        # В полях ввода Ctrl+Z и Ctrl+Y относятся к тексту, а не к базе.
+        # ttk.Entry, ttk.Combobox, ttk.Spinbox и DateEntry - наследники tk.Entry
+        if event is not None and isinstance(event.widget, (tk.Entry, tk.Text, tk.Spinbox)):
+            return None
+        
+        # Отложенное сохранение заметок должно попасть в журнал раньше отмены
+        self.flush_notes_autosave()
+        
+        def finished(result):
+            if result is None:
+                self.undo_status_label.config(text=empty_text)
+                return
+            label, effects = result
+            # Страницы обновятся по событиям, как после обычной записи
+            for effect in effects:
+                self.bus.publish(self.journal_event(effect))
+            self.undo_status_label.config(text=f"{done_text}: {label}")
+        
+        def failed(error):
+            if isinstance(error, ValueError):
+                messagebox.showwarning("Ошибка", f"Не удалось выполнить действие из журнала.\n{error}")
+            else:
+                self.show_db_error(error)
+        
+        self.executor.submit(step, finished, failed)
+        return "break"
+    
+    @staticmethod
+    def journal_event(effect):
+        """Событие шины для последствия отмены или повтора (см. journal.py)"""
+        kind, args = effect[0], effect[1:]
+        if kind in ("logs_added", "logs_removed"):
+            habit_ids, days = args
+            dates = sorted({date.fromordinal(day).isoformat() for day in days})
+            event_type = events.LogsAdded if kind == "logs_added" else events.LogsRemoved
+            return event_type(sorted(set(habit_ids)), dates)
+        if kind == "habit_created":
+            return events.HabitCreated(*args)
+        if kind == "habit_deleted":
+            habit_id, days = args
+            return events.HabitDeleted(habit_id, sorted({date.fromordinal(day).strftime("%Y-%m") for day in days}))
+        if kind == "schedule":
+            return events.ScheduleChanged(*args)
+        if kind == "stars":
+            return events.StarsChanged(*args)
+        return events.NotesChanged()
     
     def prev_month(self):
         """Перейти к предыдущему месяцу"""
@@ -1124,9 +1839,15 @@ class HabitsApp:
         self.update_calendar()
 
 def main():
+    timer = StartupTimer(STARTED)
+    timer.mark("импорт модулей")
     root = tk.Tk()
-    app = HabitsApp(root)
-    root.mainloop()
+    timer.mark("создание окна Tk")
+    app = HabitsApp(root, timer)
+    try:
+        root.mainloop()
+    finally:
+        app.executor.close()
 
 if __name__ == "__main__":
     main()
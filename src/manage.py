@@ -0,0 +1,172 @@
+"""Обслуживание базы привычек без графического интерфейса
+
+    python src/manage.py migrate [--check]
+    python src/manage.py check-stars
+    python src/manage.py rebuild-stars
+    python src/manage.py rebuild-stats
+    python src/manage.py cleanup-orphans
+    python src/manage.py import logs.csv [--format jsonl] [--create-habits]
+    python src/manage.py export logs.csv [--what logs|habits|notes] [--from DATE] [--to DATE] [--habit NAME]
+"""
+import argparse
+import sys
+import time
+
+import exporter
+import importer
+import migrations
+from storage import DB_PATH, Storage
+
+
+def migrate(db, args):
+    version = migrations.schema_version(db.conn)
+    todo = db.pending_migrations()
+    print(f'Версия схемы: {version}, ожидают миграции: {len(todo)}')
+    if args.check or not todo:
+        for migration in todo:
+            print(f'  {migration.version}: {migration.description}')
+        return 1 if todo else 0
+
+    def progress(migration, done, total, skipped):
+        if total:
+            note = f', пропущено логов: {skipped}' if skipped else ''
+            print(f'  {done}/{total}{note}', flush=True)
+        else:
+            print(f'{migration.version}: {migration.description}', flush=True)
+
+    started = time.perf_counter()
+    db.init_schema(seed=False, progress=progress)
+    print(f'Схема обновлена до версии {migrations.schema_version(db.conn)} '
+          f'за {time.perf_counter() - started:.1f} с')
+    return 0
+
+
+def check_stars(db, args):
+    stored, computed = db.check_stars()
+    if stored == computed:
+        print(f'Баланс звезд в порядке: {stored}')
+        return 0
+    print(f'Баланс звезд расходится: сохранено {stored}, по логам {computed}')
+    return 1
+
+
+def rebuild_stars(db, args):
+    print(f'Баланс звезд пересчитан: {db.rebuild_stars()}')
+    return 0
+
+
+def rebuild_stats(db, args):
+    print(f'Статистика пересчитана для привычек: {db.rebuild_habit_stats()}')
+    return 0
+
+
+def cleanup_orphans(db, args):
+    if not db.has_table('habit_logs'):
+        print('В базе нет логов')
+        return 0
+    report = db.cleanup_orphans()
+    print(f"Удалено логов без привычки: {report['removed']} ({report['delete_seconds']:.2f} с)")
+    print(f"VACUUM: {report['pages_before']} -> {report['pages_after']} страниц, "
+          f"освобождено {report['bytes_freed'] / 1024 / 1024:.1f} МБ ({report['vacuum_seconds']:.2f} с)")
+    print(f"ANALYZE: {report['analyze_seconds']:.2f} с")
+    return 0
+
+
+def import_logs(db, args):
+    def progress(report):
+        print(f'  {report.imported} строк, {report.rate:.0f} строк/с', flush=True)
+
+    report = importer.import_logs(
+        db, args.path,
+        fmt=args.format,
+        create_habits=args.create_habits,
+        batch_size=args.batch_size,
+        progress=progress
+    )
+    print(report.summary())
+    return 1 if report.rejected else 0
+
+
+def export_data(db, args):
+    fmt = args.format or exporter.detect_format(args.path)
+    if args.what != 'logs' and fmt == 'columnar':
+        print('Колоночный формат поддерживается только для логов')
+        return 2
+    # Неизвестную привычку проверяем до открытия файла, чтобы не оставить пустой
+    if args.what == 'logs' and args.habit:
+        try:
+            exporter.resolve_habits(db, args.habit)
+        except ValueError as error:
+            print(f'Ошибка: {error}', file=sys.stderr)
+            return 2
+
+    # "-" - стандартный вывод, удобно для конвейеров в cron
+    if args.path == '-':
+        file = sys.stdout.buffer if fmt == 'columnar' else sys.stdout
+        close = False
+    else:
+        file = open(args.path, 'wb') if fmt == 'columnar' else open(args.path, 'w', newline='', encoding='utf-8')
+        close = True
+    try:
+        if args.what == 'logs':
+            count = exporter.export_logs(db, file, fmt, args.date_from, args.date_to, args.habit)
+        else:
+            count = exporter.export_table(db, file, fmt, args.what)
+    finally:
+        if close:
+            file.close()
+    print(f'Выгружено строк: {count}', file=sys.stderr)
+    return 0
+
+
+def cli_main(argv=None):
+    parser = argparse.ArgumentParser(description='Обслуживание базы привычек')
+    parser.add_argument('--db', default=DB_PATH, help='путь к базе (по умолчанию habits.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = commands.add_parser('migrate', help='применить миграции схемы заранее, без интерфейса')
+    migrate_parser.add_argument('--check', action='store_true',
+                                help='только показать недостающие миграции (код 1, если они есть)')
+    migrate_parser.set_defaults(func=migrate, init_schema=False)
+
+    commands.add_parser('check-stars', help='сверить баланс звезд с логами').set_defaults(func=check_stars)
+    commands.add_parser('rebuild-stars', help='пересчитать баланс звезд').set_defaults(func=rebuild_stars)
+    commands.add_parser('rebuild-stats', help='пересчитать статистику привычек').set_defaults(func=rebuild_stats)
+
+    # Чистка работает с любой версией схемы и не применяет миграции:
+    # ею можно починить базу, на которой миграция не проходит
+    commands.add_parser('cleanup-orphans', help='удалить логи удаленных привычек и сжать базу').set_defaults(
+        func=cleanup_orphans, init_schema=False)
+
+    import_parser = commands.add_parser('import', help='импортировать логи из CSV или JSON Lines')
+    import_parser.add_argument('path', help='файл с полями habit, date, time')
+    import_parser.add_argument('--format', choices=('csv', 'jsonl'), help='по умолчанию - по расширению файла')
+    import_parser.add_argument('--create-habits', action='store_true',
+                               help='создавать неизвестные привычки (хорошие, 1 звездочка)')
+    import_parser.add_argument('--batch-size', type=int, default=importer.BATCH_SIZE)
+    import_parser.set_defaults(func=import_logs)
+
+    export_parser = commands.add_parser('export', help='выгрузить логи, привычки или заметки')
+    export_parser.add_argument('path', help='файл (.csv, .jsonl, .hlog) или - для стандартного вывода')
+    export_parser.add_argument('--format', choices=exporter.FORMATS, help='по умолчанию - по расширению файла')
+    export_parser.add_argument('--what', choices=('logs', 'habits', 'notes'), default='logs')
+    export_parser.add_argument('--from', dest='date_from', help='начальная дата YYYY-MM-DD')
+    export_parser.add_argument('--to', dest='date_to', help='конечная дата YYYY-MM-DD')
+    export_parser.add_argument('--habit', action='append', help='только эта привычка (можно повторять)')
+    export_parser.set_defaults(func=export_data)
+
+    args = parser.parse_args(argv)
+    db = Storage(args.db)
+    try:
+        # migrate сам применяет миграции и показывает ход работы,
+        # cleanup-orphans работает без них
+        # Тестовые данные - только для интерфейса, не в базу для импорта или выгрузки
+        if getattr(args, 'init_schema', True):
+            db.init_schema(seed=False)
+        return args.func(db, args)
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    sys.exit(cli_main())
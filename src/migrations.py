@@ -0,0 +1,75 @@
+"""Миграции схемы с номером версии в PRAGMA user_version
+
+Каждая миграция - шаг с номером версии, после которого номер записывается
+в user_version. Обычная миграция выполняется одной транзакцией вместе с
+записью номера: она либо применена целиком, либо не применена вовсе.
+Долгие перестройки таблиц (transactional=False) сами делят работу на
+пачки со своими транзакциями и должны продолжаться с места остановки.
+
+Если база уже в текущей версии, run не выполняет ни одной команды DDL.
+Миграции можно применить заранее без интерфейса:
+
+    python src/manage.py migrate
+"""
+import sqlite3
+
+
+class Migration:
+    """Шаг схемы: apply(cursor, progress) переводит базу в версию version"""
+
+    def __init__(self, version, description, apply, transactional=True):
+        self.version = version
+        self.description = description
+        self.apply = apply
+        self.transactional = transactional
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def pending(conn, migrations):
+    """Миграции, которые еще не применены к базе"""
+    version = schema_version(conn)
+    latest = migrations[-1].version if migrations else 0
+    if version > latest:
+        raise sqlite3.DatabaseError(
+            f'схема базы версии {version} новее, чем поддерживает программа ({latest})'
+        )
+    return [m for m in migrations if m.version > version]
+
+
+def run(conn, migrations, progress=None):
+    """Применить недостающие миграции по порядку; возвращает примененные.
+
+    progress(миграция, сделано, всего, пропущено) вызывается в начале каждой
+    миграции и после каждой пачки долгих миграций; пропущено - сколько строк
+    перенос данных не смог перенести (например, логи удаленных привычек).
+    """
+    todo = pending(conn, migrations)
+    if not todo:
+        return []
+
+    conn.commit()
+    cursor = conn.cursor()
+    for migration in todo:
+        def report(done, total, skipped=0, migration=migration):
+            if progress:
+                progress(migration, done, total, skipped)
+
+        report(0, 0)
+        if migration.transactional:
+            cursor.execute('BEGIN')
+            try:
+                migration.apply(cursor, report)
+                cursor.execute(f'PRAGMA user_version = {migration.version:d}')
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+        else:
+            migration.apply(cursor, report)
+            conn.commit()
+            cursor.execute(f'PRAGMA user_version = {migration.version:d}')
+            conn.commit()
+    return todo
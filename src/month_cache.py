@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+
+def shift_month(year, month, delta):
+    """Месяц, отстоящий от данного на delta месяцев"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
+
+
+class MonthCache:
+    """LRU-кэш логов календаря по месяцам.
+
+    Ключ - (год, месяц), значение - готовая группировка по дням.
+    Кэш живет в главном потоке, а месяцы загружает в фоне
+    LogService.month_by_day, поданный в QueryExecutor. Чтобы загруженный
+    до записи месяц не попал в кэш после инвалидации, у каждого ключа
+    есть версия: put с устаревшей версией игнорируется.
+    """
+
+    def __init__(self, capacity=12):
+        self.capacity = capacity
+        self._months = OrderedDict()
+        self._versions = {}
+        # Общая эпоха входит в версию каждого ключа и сбрасывает их все разом
+        self._epoch = 0
+
+    def get(self, year, month):
+        """Месяц из кэша или None"""
+        key = (year, month)
+        if key in self._months:
+            self._months.move_to_end(key)
+            return self._months[key]
+        return None
+
+    def __contains__(self, key):
+        return key in self._months
+
+    def version(self, year, month):
+        return self._epoch, self._versions.get((year, month), 0)
+
+    def put(self, year, month, version, logs_by_day):
+        key = (year, month)
+        if self.version(year, month) != version:
+            return
+        self._months[key] = logs_by_day
+        self._months.move_to_end(key)
+        while len(self._months) > self.capacity:
+            self._months.popitem(last=False)
+
+    def invalidate(self, year, month):
+        key = (year, month)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._months.pop(key, None)
+
+    def invalidate_all(self):
+        self._epoch += 1
+        self._months.clear()
+
+    def invalidate_dates(self, dates):
+        """Сбросить месяцы, в которые попадают даты 'YYYY-MM-DD' или 'YYYY-MM'"""
+        for key in {(int(d[:4]), int(d[5:7])) for d in dates}:
+            self.invalidate(*key)
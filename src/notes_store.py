@@ -0,0 +1,188 @@
+"""Заметки с историей версий
+
+Текущий текст хранится одной строкой в note_document и читается за O(1).
+Каждое сохранение добавляет версию в note_versions: обычно это сжатая
+построчная дельта к предыдущей версии, а каждые CHECKPOINT версий -
+сжатый снимок целиком. Любая версия восстанавливается из ближайшего
+снимка не более чем CHECKPOINT дельтами. Старые версии удаляются по
+политике хранения, поэтому размер базы ограничен.
+"""
+import json
+import zlib
+from difflib import SequenceMatcher
+
+CHECKPOINT = 20
+KEEP_VERSIONS = 200
+
+SNAPSHOT = 0
+DELTA = 1
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS note_document (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        content TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS note_versions (
+        version INTEGER PRIMARY KEY,
+        kind INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        data BLOB NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+)
+
+
+def make_snapshot(content):
+    return zlib.compress(content.encode('utf-8'))
+
+
+def read_snapshot(data):
+    return zlib.decompress(data).decode('utf-8')
+
+
+def make_delta(old, new):
+    """Построчная дельта: диапазоны строк старого текста и вставленный текст"""
+    a = old.splitlines(keepends=True)
+    b = new.splitlines(keepends=True)
+    ops = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(b[j1:j2]))
+    return zlib.compress(json.dumps(ops, ensure_ascii=False).encode('utf-8'))
+
+
+def apply_delta(old, data):
+    a = old.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(data).decode('utf-8')):
+        parts.append(''.join(a[op[0]:op[1]]) if isinstance(op, list) else op)
+    return ''.join(parts)
+
+
+class NotesStore:
+    """Версионированное хранилище заметок поверх соединения sqlite3"""
+
+    def __init__(self, conn, checkpoint=CHECKPOINT, keep_versions=KEEP_VERSIONS):
+        self.conn = conn
+        self.checkpoint = checkpoint
+        self.keep_versions = keep_versions
+
+    def create_schema(self, cursor):
+        for sql in SCHEMA:
+            cursor.execute(sql)
+        cursor.execute("INSERT OR IGNORE INTO note_document (id, content, version) VALUES (1, '', 0)")
+
+    def migrate_legacy(self, cursor):
+        """Перенести полные копии из старой таблицы notes в историю версий"""
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes'").fetchone()
+        if not exists:
+            return
+        for content, created_at in cursor.execute('SELECT content, created_at FROM notes ORDER BY id').fetchall():
+            self._save(cursor, content or '', created_at)
+        cursor.execute('DROP TABLE notes')
+        self._prune(cursor)
+
+    def current(self):
+        """Текущий текст и номер версии"""
+        return self.conn.execute('SELECT content, version FROM note_document WHERE id = 1').fetchone()
+
+    def save(self, content):
+        """Сохранить текст; возвращает номер версии (прежний, если текст не изменился)"""
+        with self.conn:
+            return self._save(self.conn.cursor(), content)
+
+    def _save(self, cursor, content, created_at=None):
+        old, version = cursor.execute('SELECT content, version FROM note_document WHERE id = 1').fetchone()
+        if content == old and version:
+            return version
+
+        version += 1
+        last_snapshot = cursor.execute(
+            'SELECT MAX(version) FROM note_versions WHERE kind = ?', (SNAPSHOT,)
+        ).fetchone()[0]
+        if last_snapshot is None or version - last_snapshot >= self.checkpoint:
+            kind, data = SNAPSHOT, make_snapshot(content)
+        else:
+            kind, data = DELTA, make_delta(old, content)
+
+        cursor.execute(
+            'INSERT INTO note_versions (version, kind, size, data, created_at) '
+            'VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))',
+            (version, kind, len(content), data, created_at)
+        )
+        cursor.execute(
+            'UPDATE note_document SET content = ?, version = ?, updated_at = COALESCE(?, CURRENT_TIMESTAMP) '
+            'WHERE id = 1',
+            (content, version, created_at)
+        )
+        if version % self.checkpoint == 0:
+            self._prune(cursor)
+        return version
+
+    def history(self):
+        """Список версий без содержимого: (версия, дата, длина текста), новые первыми"""
+        return self.conn.execute(
+            'SELECT version, created_at, size FROM note_versions ORDER BY version DESC'
+        ).fetchall()
+
+    def version_content(self, version):
+        """Восстановить текст версии из ближайшего снимка и дельт после него"""
+        return self._version_content(self.conn.cursor(), version)
+
+    def _version_content(self, cursor, version):
+        base = cursor.execute(
+            'SELECT MAX(version) FROM note_versions WHERE kind = ? AND version <= ?', (SNAPSHOT, version)
+        ).fetchone()[0]
+        if base is None:
+            raise KeyError(version)
+        content = None
+        for kind, data in cursor.execute(
+            'SELECT kind, data FROM note_versions WHERE version BETWEEN ? AND ? ORDER BY version',
+            (base, version)
+        ):
+            content = read_snapshot(data) if kind == SNAPSHOT else apply_delta(content, data)
+        return content
+
+    def iter_history(self, batch_size=100):
+        """Все версии по возрастанию: пачки (версия, дата, текст)"""
+        content = None
+        batch = []
+        cursor = self.conn.execute('SELECT version, kind, data, created_at FROM note_versions ORDER BY version')
+        for version, kind, data, created_at in cursor:
+            content = read_snapshot(data) if kind == SNAPSHOT else apply_delta(content, data)
+            batch.append((version, created_at, content))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def prune(self, keep_versions=None):
+        """Оставить только последние keep_versions версий"""
+        with self.conn:
+            return self._prune(self.conn.cursor(), keep_versions)
+
+    def _prune(self, cursor, keep_versions=None):
+        keep_versions = keep_versions or self.keep_versions
+        latest = cursor.execute('SELECT MAX(version) FROM note_versions').fetchone()[0]
+        if latest is None or latest <= keep_versions:
+            return 0
+        cutoff = latest - keep_versions + 1
+
+        # Самая старая оставшаяся версия должна быть снимком, иначе ее не восстановить
+        kind = cursor.execute('SELECT kind FROM note_versions WHERE version = ?', (cutoff,)).fetchone()
+        if kind and kind[0] == DELTA:
+            content = self._version_content(cursor, cutoff)
+            cursor.execute(
+                'UPDATE note_versions SET kind = ?, data = ? WHERE version = ?',
+                (SNAPSHOT, make_snapshot(content), cutoff)
+            )
+        return cursor.execute('DELETE FROM note_versions WHERE version < ?', (cutoff,)).rowcount
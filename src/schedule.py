@@ -0,0 +1,139 @@
+"""Расписания привычек и ленивая развертка их повторений
+
+У привычки может быть одно расписание (таблица habit_schedules):
+
+    daily     - каждый день
+    weekdays  - по дням недели из маски weekdays (бит 0 - понедельник)
+    weekly    - per_week раз за неделю, в любые дни
+    cron      - правило "день_месяца месяц день_недели" как в cron:
+                *, списки 1,15, диапазоны 1-5 и шаг */2; день недели
+                0 или 7 - воскресенье, 1 - понедельник
+
+Повторения нигде не хранятся: occurrences выдает их по одному для любого
+окна дней, поэтому проверка окна стоит O(длины окна), а не всей истории.
+Дни - номера date.toordinal(); ordinal 1 - понедельник.
+"""
+from datetime import date
+from itertools import count
+
+KINDS = ("daily", "weekdays", "weekly", "cron")
+
+# Допустимые значения полей правила cron
+CRON_FIELDS = ((1, 31), (1, 12), (0, 7))
+
+
+def weekday(day):
+    """День недели номера дня: 0 - понедельник"""
+    return (day - 1) % 7
+
+
+def week_start(day):
+    """Понедельник недели, в которую попадает день"""
+    return day - weekday(day)
+
+
+def _parse_field(text, low, high):
+    values = set()
+    for part in text.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            first, last = low, high
+        elif "-" in part:
+            first, last = (int(value) for value in part.split("-", 1))
+        else:
+            first = last = int(part)
+        step = int(step) if step else 1
+        if not low <= first <= last <= high or step < 1:
+            raise ValueError(f"значение вне диапазона {low}-{high}: {part}")
+        values.update(range(first, last + 1, step))
+    return values
+
+
+def parse_rule(rule):
+    """Правило cron -> (дни месяца, месяцы, дни недели с 0 - понедельник, ограничены ли дни).
+
+    ValueError, если правило записано неверно.
+    """
+    fields = rule.split()
+    if len(fields) != 3:
+        raise ValueError("правило должно состоять из трех полей: день_месяца месяц день_недели")
+    try:
+        days, months, cron_weekdays = (_parse_field(text, *bounds) for text, bounds in zip(fields, CRON_FIELDS))
+    except ValueError as error:
+        raise ValueError(f"неверное правило '{rule}': {error}") from None
+    # В cron 0 и 7 - воскресенье
+    weekdays = {(value - 1) % 7 for value in cron_weekdays}
+    return days, months, weekdays, (fields[0] != "*", fields[2] != "*")
+
+
+class Schedule:
+    """Расписание одной привычки.
+
+    minute - время дня, к которому привычку нужно выполнить (или None),
+    start - день, с которого действует расписание: до него пропусков нет.
+    """
+
+    def __init__(self, kind, weekdays=0, per_week=1, rule=None, minute=None, start=None):
+        if kind not in KINDS:
+            raise ValueError(f"неизвестный вид расписания: {kind}")
+        if kind == "weekdays" and not weekdays & 0x7F:
+            raise ValueError("не выбран ни один день недели")
+        if kind == "weekly" and not 1 <= per_week <= 7:
+            raise ValueError("раз в неделю должно быть от 1 до 7")
+        self.kind = kind
+        self.weekdays = weekdays
+        self.per_week = per_week
+        self.rule = rule
+        self.minute = minute
+        self.start = start if start is not None else date.today().toordinal()
+        self._cron = parse_rule(rule) if kind == "cron" else None
+
+    def matches(self, day):
+        """Нужно ли выполнить привычку в этот день (для weekly - в любой день)"""
+        if self.kind in ("daily", "weekly"):
+            return True
+        if self.kind == "weekdays":
+            return bool(self.weekdays >> weekday(day) & 1)
+
+        days, months, weekdays, (days_set, weekdays_set) = self._cron
+        value = date.fromordinal(day)
+        if value.month not in months:
+            return False
+        # Как в cron: если заданы и дни месяца, и дни недели, подходит любой из них
+        if days_set and weekdays_set:
+            return value.day in days or weekday(day) in weekdays
+        return value.day in days and weekday(day) in weekdays
+
+    def occurrences(self, start, end=None):
+        """Повторения с дня start по end включительно (без end - бесконечно).
+
+        Для daily, weekdays и cron - дни, в которые нужно выполнить
+        привычку. Для weekly - понедельники недель, за каждую из которых
+        нужно выполнить ее per_week раз.
+        """
+        start = max(start, self.start)
+        if self.kind == "weekly":
+            first = week_start(start)
+            days = count(first, 7) if end is None else range(first, end + 1, 7)
+            yield from days
+            return
+
+        days = count(start) if end is None else range(start, end + 1)
+        for day in days:
+            if self.matches(day):
+                yield day
+
+    def describe(self):
+        """Расписание словами для интерфейса"""
+        if self.kind == "daily":
+            text = "каждый день"
+        elif self.kind == "weekdays":
+            names = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
+            text = ", ".join(name for i, name in enumerate(names) if self.weekdays >> i & 1)
+        elif self.kind == "weekly":
+            text = f"{self.per_week} раз в неделю"
+        else:
+            text = f"cron {self.rule}"
+        if self.minute is not None:
+            text += f" в {self.minute // 60:02d}:{self.minute % 60:02d}"
+        return text
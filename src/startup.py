@@ -0,0 +1,26 @@
+"""Отчет о холодном старте: сколько занял каждый этап до первой отрисовки
+
+    python src/main.py --startup-report
+"""
+import sys
+import time
+
+
+class StartupTimer:
+    """Отметки этапов запуска; каждая отметка - время с предыдущей"""
+
+    def __init__(self, started=None):
+        self.started = started or time.perf_counter()
+        self.last = self.started
+        self.marks = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.marks.append((name, now - self.last, now - self.started))
+        self.last = now
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        print("Запуск:", file=file)
+        for name, step, total in self.marks:
+            print(f"  {name:<36} {step * 1000:8.1f} мс  (с начала {total * 1000:8.1f} мс)", file=file)
@@ -0,0 +1,878 @@
+import heapq
+import sqlite3
+import time
+from itertools import islice
+
+import migrations
+from journal import UndoJournal
+from migrations import Migration
+from notes_store import NotesStore
+from datetime import date
+
+DB_PATH = 'habits.db'
+
+# Логи хранят дату номером дня (date.toordinal()) и время минутой суток:
+# сравнение, сортировка и выборка по периоду - сравнение целых чисел,
+# а в строки переводится только то, что показывается пользователю
+MINUTES_PER_DAY = 1440
+
+HABIT_LOGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER,
+        day INTEGER NOT NULL,
+        minute INTEGER NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (habit_id) REFERENCES habits (id) ON DELETE CASCADE
+    )
+'''
+
+# Перенос логов из старой схемы (date TEXT 'YYYY-MM-DD', time TEXT 'HH:MM')
+# пачками по диапазону id. julianday('0001-01-01') = 1721425.5, а
+# date.toordinal() этого дня - 1. Строки с неразборчивой датой и логи
+# удаленных привычек пропускаются: у новой таблицы внешний ключ на habits,
+# а старые версии не удаляли логи вместе с привычкой
+SQL_COPY_TYPED_LOGS = '''
+    INSERT INTO habit_logs_typed (id, habit_id, day, minute, created_at)
+    SELECT id, habit_id,
+           CAST(julianday(date) - 1721424.5 AS INTEGER),
+           CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER),
+           created_at
+    FROM habit_logs
+    WHERE id > ? AND id <= ? AND julianday(date) IS NOT NULL
+      AND habit_id IN (SELECT id FROM habits)
+'''
+SQL_COUNT_LOGS_RANGE = 'SELECT COUNT(*) FROM habit_logs WHERE id > ? AND id <= ?'
+LOG_MIGRATION_BATCH = 50000
+
+# Настройки соединения: WAL позволяет читать параллельно с записью,
+# synchronous=NORMAL в режиме WAL безопасен и заметно быстрее FULL.
+# foreign_keys включается на каждом соединении: без него ON DELETE CASCADE
+# в habit_logs не срабатывает и после удаления привычки остаются логи-сироты
+PRAGMAS = (
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-16000',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+)
+
+# Запросы держим в константах: sqlite3 кэширует подготовленные
+# выражения по тексту SQL, поэтому одна строка - одно подготовленное выражение
+SQL_HABITS = 'SELECT * FROM habits ORDER BY name'
+
+SQL_TOTAL_STARS = 'SELECT total FROM stars_balance WHERE id = 1'
+
+# Полный пересчет баланса - только для проверки и восстановления
+SQL_COMPUTE_STARS = '''
+    SELECT COALESCE(SUM(CASE WHEN h.is_good = 1 THEN h.stars ELSE -h.stars END), 0)
+    FROM habit_logs hl
+    JOIN habits h ON hl.habit_id = h.id
+'''
+
+# Для каждой плохой привычки берем LIMIT ее последних логов с конца
+# idx_habit_logs_habit и сортируем только их: работа зависит от числа
+# плохих привычек, а не от всех логов. Обход индекса дат с конца был бы
+# полным сканированием, когда у плохих привычек мало логов. CROSS JOIN
+# фиксирует порядок: внешний цикл - по привычкам, а не по логам
+SQL_RECENT_BAD = '''
+    SELECT h.name, hl.day, hl.minute
+    FROM habits h
+    CROSS JOIN habit_logs hl ON hl.id IN (
+        SELECT id FROM habit_logs
+        WHERE habit_id = h.id
+        ORDER BY day DESC, minute DESC
+        LIMIT ?
+    )
+    WHERE h.is_good = 0
+    ORDER BY hl.day DESC, hl.minute DESC
+    LIMIT ?
+'''
+
+# Время последнего лога хранится в habit_stats: идем по индексу last_done
+# и останавливаемся, как только набрали LIMIT хороших привычек
+SQL_OLDEST_GOOD = '''
+    SELECT h.name, s.last_done
+    FROM habit_stats s
+    CROSS JOIN habits h ON h.id = s.habit_id
+    WHERE h.is_good = 1
+    ORDER BY s.last_done ASC NULLS FIRST
+    LIMIT ?
+'''
+
+SQL_HABIT_STATS = '''
+    SELECT h.id, h.name, h.is_good, s.last_done, s.current_streak, s.longest_streak,
+           s.count_7, s.count_30, s.count_365, s.log_count * (CASE WHEN h.is_good = 1 THEN h.stars ELSE -h.stars END)
+    FROM habit_stats s
+    JOIN habits h ON h.id = s.habit_id
+    ORDER BY h.name
+'''
+
+SQL_MONTH_LOGS = '''
+    SELECT hl.day, hl.minute, h.name, h.is_good
+    FROM habit_logs hl
+    JOIN habits h ON hl.habit_id = h.id
+    WHERE hl.day BETWEEN ? AND ?
+    ORDER BY hl.day, hl.minute DESC
+'''
+
+# История логов от новых к старым. Порядок (day, minute, habit_id, id)
+# совпадает с idx_habit_logs_day (id - rowid в конце индекса), поэтому
+# страницы читаются по индексу без сортировки. Оглавление по дням дает
+# номер первого лога каждого дня; дальше страница берется либо после
+# ключа предыдущей (keyset), либо с начала дня с пропуском внутри него.
+SQL_LOG_DAYS = 'SELECT day, COUNT(*) FROM habit_logs GROUP BY day ORDER BY day DESC'
+
+SQL_LOG_PAGE_AFTER = '''
+    SELECT hl.day, hl.minute, hl.habit_id, hl.id, h.name, h.is_good, h.stars
+    FROM habit_logs hl
+    CROSS JOIN habits h ON h.id = hl.habit_id
+    WHERE (hl.day, hl.minute, hl.habit_id, hl.id) < (?, ?, ?, ?)
+    ORDER BY hl.day DESC, hl.minute DESC, hl.habit_id DESC, hl.id DESC
+    LIMIT ?
+'''
+
+SQL_LOG_PAGE_FROM_DAY = '''
+    SELECT hl.day, hl.minute, hl.habit_id, hl.id, h.name, h.is_good, h.stars
+    FROM habit_logs hl
+    CROSS JOIN habits h ON h.id = hl.habit_id
+    WHERE hl.day <= ?
+    ORDER BY hl.day DESC, hl.minute DESC, hl.habit_id DESC, hl.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_habit_logs_day ON habit_logs (day, minute, habit_id)',
+    'CREATE INDEX IF NOT EXISTS idx_habit_logs_habit ON habit_logs (habit_id, day, minute)',
+)
+
+# Баланс звезд хранится в одной строке и поддерживается триггерами:
+# добавление и удаление лога меняют его за O(1), изменение звездочек
+# и удаление привычки - за O(логов этой привычки) по индексу habit_id.
+# При каскадном удалении логов привычки уже нет, и их триггер добавляет 0:
+# вклад привычки целиком снимает триггер на удаление из habits
+SIGNED_STARS = 'CASE WHEN is_good = 1 THEN stars ELSE -stars END'
+
+STARS_TRIGGERS = (
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_stars_log_insert AFTER INSERT ON habit_logs
+    BEGIN
+        UPDATE stars_balance SET total = total + COALESCE(
+            (SELECT {SIGNED_STARS} FROM habits WHERE id = NEW.habit_id), 0)
+        WHERE id = 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_stars_log_delete AFTER DELETE ON habit_logs
+    BEGIN
+        UPDATE stars_balance SET total = total - COALESCE(
+            (SELECT {SIGNED_STARS} FROM habits WHERE id = OLD.habit_id), 0)
+        WHERE id = 1;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_stars_log_update AFTER UPDATE OF habit_id ON habit_logs
+    BEGIN
+        UPDATE stars_balance SET total = total
+            - COALESCE((SELECT {SIGNED_STARS} FROM habits WHERE id = OLD.habit_id), 0)
+            + COALESCE((SELECT {SIGNED_STARS} FROM habits WHERE id = NEW.habit_id), 0)
+        WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stars_habit_update AFTER UPDATE OF stars, is_good ON habits
+    BEGIN
+        UPDATE stars_balance SET total = total
+            + ((CASE WHEN NEW.is_good = 1 THEN NEW.stars ELSE -NEW.stars END)
+               - (CASE WHEN OLD.is_good = 1 THEN OLD.stars ELSE -OLD.stars END))
+            * (SELECT COUNT(*) FROM habit_logs WHERE habit_id = NEW.id)
+        WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_stars_habit_delete BEFORE DELETE ON habits
+    BEGIN
+        UPDATE stars_balance SET total = total
+            - (CASE WHEN OLD.is_good = 1 THEN OLD.stars ELSE -OLD.stars END)
+            * (SELECT COUNT(*) FROM habit_logs WHERE habit_id = OLD.id)
+        WHERE id = 1;
+    END
+    ''',
+)
+
+# Статистика привычек: количество логов и время последнего (day * 1440 + minute) поддерживаются
+# триггерами за O(1) и поиск по индексу (habit_id, day, minute). Серии и
+# счетчики за 7/30/365 дней зависят от текущей даты, поэтому триггер только
+# помечает строку dirty, а пересчитывает ее refresh_habit_stats при чтении:
+# для измененной привычки - полностью, при смене дня - только окна и текущую серию
+HABIT_STATS_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS habit_stats (
+        habit_id INTEGER PRIMARY KEY REFERENCES habits (id) ON DELETE CASCADE,
+        log_count INTEGER NOT NULL DEFAULT 0,
+        last_done INTEGER,
+        current_streak INTEGER NOT NULL DEFAULT 0,
+        longest_streak INTEGER NOT NULL DEFAULT 0,
+        count_7 INTEGER NOT NULL DEFAULT 0,
+        count_30 INTEGER NOT NULL DEFAULT 0,
+        count_365 INTEGER NOT NULL DEFAULT 0,
+        as_of INTEGER,
+        dirty INTEGER NOT NULL DEFAULT 1
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_habit_stats_last ON habit_stats (last_done)',
+)
+
+SQL_LAST_DONE = f'''
+    (SELECT day * {MINUTES_PER_DAY} + minute FROM habit_logs
+     WHERE habit_id = {{0}}.habit_id
+     ORDER BY day DESC, minute DESC
+     LIMIT 1)
+'''
+
+# Версия логов: растет при любом изменении логов и звезд привычек.
+# Кэши, построенные по логам (колонки аналитики, оглавление истории),
+# сверяются с ней, поэтому их не сбрасывают записи заметок, журнала
+# отмены или статистики
+LOG_VERSION_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS log_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    )
+    ''',
+    'INSERT OR IGNORE INTO log_version (id, version) VALUES (1, 0)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_log_version_insert AFTER INSERT ON habit_logs
+    BEGIN
+        UPDATE log_version SET version = version + 1 WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_log_version_delete AFTER DELETE ON habit_logs
+    BEGIN
+        UPDATE log_version SET version = version + 1 WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_log_version_update AFTER UPDATE ON habit_logs
+    BEGIN
+        UPDATE log_version SET version = version + 1 WHERE id = 1;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_log_version_habit AFTER UPDATE OF stars, is_good ON habits
+    BEGIN
+        UPDATE log_version SET version = version + 1 WHERE id = 1;
+    END
+    ''',
+)
+
+SQL_LOG_VERSION = 'SELECT version FROM log_version WHERE id = 1'
+
+# Расписание привычки (см. schedule.py); повторения не хранятся, а
+# вычисляются для нужного окна дней
+HABIT_SCHEDULES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS habit_schedules (
+        habit_id INTEGER PRIMARY KEY REFERENCES habits (id) ON DELETE CASCADE,
+        kind TEXT NOT NULL,
+        weekdays INTEGER NOT NULL DEFAULT 0,
+        per_week INTEGER NOT NULL DEFAULT 1,
+        rule TEXT,
+        minute INTEGER,
+        start_day INTEGER NOT NULL
+    )
+'''
+
+SQL_SCHEDULES = '''
+    SELECT s.habit_id, h.name, s.kind, s.weekdays, s.per_week, s.rule, s.minute, s.start_day
+    FROM habit_schedules s
+    JOIN habits h ON h.id = s.habit_id
+'''
+
+SQL_SET_SCHEDULE = '''
+    INSERT OR REPLACE INTO habit_schedules (habit_id, kind, weekdays, per_week, rule, minute, start_day)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+SQL_DELETE_SCHEDULE = 'DELETE FROM habit_schedules WHERE habit_id = ?'
+
+# Сколько логов у каждой привычки в каждый день окна: читается только
+# диапазон idx_habit_logs_day, сколько бы ни было истории до окна
+SQL_LOG_DAY_COUNTS = '''
+    SELECT habit_id, day, COUNT(*) FROM habit_logs
+    WHERE day BETWEEN ? AND ?
+    GROUP BY habit_id, day
+'''
+
+HABIT_STATS_TRIGGERS = (
+    '''
+    CREATE TRIGGER IF NOT EXISTS trg_habit_stats_habit_insert AFTER INSERT ON habits
+    BEGIN
+        INSERT OR IGNORE INTO habit_stats (habit_id) VALUES (NEW.id);
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_habit_stats_log_insert AFTER INSERT ON habit_logs
+    BEGIN
+        UPDATE habit_stats SET
+            log_count = log_count + 1,
+            last_done = MAX(COALESCE(last_done, 0), NEW.day * {MINUTES_PER_DAY} + NEW.minute),
+            dirty = 1
+        WHERE habit_id = NEW.habit_id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_habit_stats_log_delete AFTER DELETE ON habit_logs
+    BEGIN
+        UPDATE habit_stats SET
+            log_count = log_count - 1,
+            last_done = {SQL_LAST_DONE.format('OLD')},
+            dirty = 1
+        WHERE habit_id = OLD.habit_id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER IF NOT EXISTS trg_habit_stats_log_update AFTER UPDATE OF habit_id, day, minute ON habit_logs
+    BEGIN
+        UPDATE habit_stats SET
+            log_count = log_count - 1,
+            last_done = {SQL_LAST_DONE.format('OLD')},
+            dirty = 1
+        WHERE habit_id = OLD.habit_id;
+        UPDATE habit_stats SET
+            log_count = log_count + 1,
+            last_done = {SQL_LAST_DONE.format('NEW')},
+            dirty = 1
+        WHERE habit_id = NEW.habit_id;
+    END
+    ''',
+)
+
+# Начальное заполнение и полный пересчет: один проход по индексу habit_id
+SQL_FILL_HABIT_STATS = f'''
+    INSERT OR REPLACE INTO habit_stats (habit_id, log_count, last_done)
+    SELECT h.id, COUNT(hl.id), MAX(hl.day * {MINUTES_PER_DAY} + hl.minute)
+    FROM habits h
+    LEFT JOIN habit_logs hl ON hl.habit_id = h.id
+    GROUP BY h.id
+'''
+
+SQL_STALE_HABIT_STATS = 'SELECT habit_id, dirty FROM habit_stats WHERE dirty = 1 OR as_of IS NOT ?'
+SQL_HABIT_COUNT_BETWEEN = 'SELECT COUNT(*) FROM habit_logs WHERE habit_id = ? AND day BETWEEN ? AND ?'
+SQL_HABIT_DAYS_DESC = 'SELECT DISTINCT day FROM habit_logs WHERE habit_id = ? AND day <= ? ORDER BY day DESC'
+SQL_HABIT_DAYS = 'SELECT DISTINCT day FROM habit_logs WHERE habit_id = ? ORDER BY day'
+
+# Окна счетчиков в днях, включая текущий
+STATS_WINDOWS = (7, 30, 365)
+
+SQL_DELETE_ORPHANS = '''
+    DELETE FROM habit_logs
+    WHERE habit_id IS NULL
+       OR NOT EXISTS (SELECT 1 FROM habits h WHERE h.id = habit_logs.habit_id)
+'''
+
+# Логи для аналитики: (день, минута, привычка, звезды со знаком)
+# Логи одной привычки по порядку времени для экспорта: идем по
+# idx_habit_logs_habit (habit_id, day, minute) без сортировки. Логи
+# нескольких привычек сливаются в iter_logs, а не сортируются в базе -
+# иначе все подходящие строки сначала копятся во временном B-дереве
+SQL_HABIT_LOGS_ORDERED = '''
+    SELECT hl.id, hl.habit_id, h.name, h.is_good, h.stars, hl.day, hl.minute
+    FROM habit_logs hl
+    CROSS JOIN habits h ON h.id = hl.habit_id
+    WHERE hl.habit_id = ? AND hl.day BETWEEN ? AND ?
+    ORDER BY hl.day, hl.minute
+'''
+
+SQL_LOG_COLUMNS = '''
+    SELECT hl.day, hl.minute, hl.habit_id,
+           CASE WHEN h.is_good = 1 THEN h.stars ELSE -h.stars END
+    FROM habit_logs hl
+    JOIN habits h ON hl.habit_id = h.id
+'''
+
+# День в юлианскую дату для strftime - обратный сдвиг к SQL_COPY_TYPED_LOGS
+SQL_HABIT_LOG_MONTHS = '''
+    SELECT DISTINCT strftime('%Y-%m', day + 1721424.5) FROM habit_logs WHERE habit_id = ?
+'''
+
+SQL_ADD_LOG = 'INSERT INTO habit_logs (habit_id, day, minute) VALUES (?, ?, ?)'
+SQL_ADD_HABIT = 'INSERT INTO habits (name, is_good, stars) VALUES (?, ?, ?)'
+SQL_DELETE_HABIT = 'DELETE FROM habits WHERE id = ?'
+SQL_UPDATE_HABIT_STARS = 'UPDATE habits SET stars = ? WHERE id = ?'
+SQL_HABIT_STARS = 'SELECT stars FROM habits WHERE id = ?'
+
+
+def _fetch_batches(cursor, batch_size):
+    """Строки курсора пачками через fetchmany; курсор закрывается в конце"""
+    try:
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        cursor.close()
+
+
+class Storage:
+    """Доступ к базе привычек через одно долгоживущее соединение"""
+
+    def __init__(self, path=DB_PATH):
+        self.conn = sqlite3.connect(path, cached_statements=128)
+        for pragma in PRAGMAS:
+            self.conn.execute(pragma)
+        self.notes = NotesStore(self.conn)
+        self.journal = UndoJournal(self.conn, self.notes)
+
+    def close(self):
+        self.conn.close()
+
+    def migrations(self):
+        """Шаги схемы по порядку версий; номера уже выпущенных шагов не меняются"""
+        return (
+            Migration(1, 'таблицы привычек и логов', self._create_tables),
+            Migration(2, 'числовые дата и время логов', self._migrate_typed_logs, transactional=False),
+            Migration(3, 'индексы логов', self._create_log_indexes),
+            Migration(4, 'баланс звезд', self._create_stars_balance),
+            Migration(5, 'заметки с историей версий', self._create_notes),
+            Migration(6, 'статистика привычек', self._create_habit_stats),
+            Migration(7, 'расписания привычек', self._create_schedules),
+            Migration(8, 'журнал отмены', self._create_undo_log),
+            Migration(9, 'версия логов', self._create_log_version),
+        )
+
+    def has_table(self, name):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+        ).fetchone() is not None
+
+    def pending_migrations(self):
+        return migrations.pending(self.conn, self.migrations())
+
+    def init_schema(self, seed=True, progress=None):
+        """Привести схему к текущей версии; новую базу заполнить тестовыми данными.
+
+        Если база уже в текущей версии, не выполняется ни одной команды DDL.
+        progress(миграция, сделано, всего, пропущено) - см. migrations.run.
+        """
+        created = migrations.schema_version(self.conn) == 0 and not self.has_table('habits')
+        applied = migrations.run(self.conn, self.migrations(), progress)
+
+        # Тестовые данные - только в только что созданной базе
+        if seed and created:
+            with self.conn:
+                self._seed(self.conn.cursor())
+        return applied
+
+    # --- Миграции ---
+    # Базы, созданные до появления user_version, имеют версию 0 и часть
+    # схемы; поэтому шаги написаны так, чтобы повторное выполнение было безопасно
+
+    def _create_tables(self, cursor, progress=None):
+        # Таблица привычек
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS habits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE,
+                is_good INTEGER DEFAULT 1,
+                stars INTEGER DEFAULT 1,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # Таблица логов привычек (выполненные привычки)
+        cursor.execute(HABIT_LOGS_TABLE.format(name='habit_logs'))
+
+    def _create_log_indexes(self, cursor, progress=None):
+        for sql in INDEXES:
+            cursor.execute(sql)
+
+    def _create_stars_balance(self, cursor, progress=None):
+        """Материализованный баланс звезд"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stars_balance (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute(
+            'INSERT OR IGNORE INTO stars_balance (id, total) VALUES (1, (%s))' % SQL_COMPUTE_STARS
+        )
+        for sql in STARS_TRIGGERS:
+            cursor.execute(sql)
+
+    def _create_notes(self, cursor, progress=None):
+        """Заметки с историей версий вместо полной копии на каждое сохранение"""
+        self.notes.create_schema(cursor)
+        self.notes.migrate_legacy(cursor)
+
+    def _create_habit_stats(self, cursor, progress=None):
+        for sql in HABIT_STATS_SCHEMA + HABIT_STATS_TRIGGERS:
+            cursor.execute(sql)
+        cursor.execute(SQL_FILL_HABIT_STATS)
+
+    def _create_schedules(self, cursor, progress=None):
+        cursor.execute(HABIT_SCHEDULES_SCHEMA)
+
+    def _create_undo_log(self, cursor, progress=None):
+        self.journal.create_schema(cursor)
+
+    def _create_log_version(self, cursor, progress=None):
+        for sql in LOG_VERSION_SCHEMA:
+            cursor.execute(sql)
+
+    def _migrate_typed_logs(self, cursor, progress=None, batch_size=LOG_MIGRATION_BATCH):
+        """Перевести логи с текстовых даты и времени на числовые day и minute.
+
+        Логи копируются в новую таблицу пачками по диапазону id, каждая пачка -
+        своя транзакция: прерванная миграция продолжается с места остановки.
+        В конце одной транзакцией старая таблица заменяется новой, а
+        триггеры и производные таблицы создают следующие миграции.
+        """
+        columns = [row[1] for row in cursor.execute('PRAGMA table_info(habit_logs)')]
+        if 'date' not in columns:
+            return
+
+        cursor.execute(HABIT_LOGS_TABLE.format(name='habit_logs_typed'))
+        last_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM habit_logs_typed').fetchone()[0]
+        max_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM habit_logs').fetchone()[0]
+        self.conn.commit()
+
+        skipped = 0
+        while last_id < max_id:
+            upper = min(last_id + batch_size, max_id)
+            total = cursor.execute(SQL_COUNT_LOGS_RANGE, (last_id, upper)).fetchone()[0]
+            skipped += total - cursor.execute(SQL_COPY_TYPED_LOGS, (last_id, upper)).rowcount
+            self.conn.commit()
+            last_id = upper
+            if progress:
+                progress(last_id, max_id, skipped)
+
+        # Триггеры ссылаются на habit_logs и мешают переименованию:
+        # удаляем все, следующие миграции создадут их заново. Производные таблицы
+        # тоже строятся заново: habit_stats хранила время строкой, а в
+        # балансе звезд могли остаться пропущенные при переносе логи
+        cursor.execute('BEGIN')
+        for (name,) in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall():
+            cursor.execute(f'DROP TRIGGER {name}')
+        cursor.execute('DROP TABLE IF EXISTS habit_stats')
+        cursor.execute('DROP TABLE IF EXISTS stars_balance')
+        cursor.execute('DROP TABLE habit_logs')
+        cursor.execute('ALTER TABLE habit_logs_typed RENAME TO habit_logs')
+        self.conn.commit()
+
+    def cleanup_orphans(self):
+        """Удалить логи удаленных привычек, затем VACUUM и ANALYZE.
+
+        Возвращает словарь с количеством удаленных строк, страницами
+        до и после и временем каждого шага в секундах.
+        """
+        page_size = self.conn.execute('PRAGMA page_size').fetchone()[0]
+        pages_before = self.conn.execute('PRAGMA page_count').fetchone()[0]
+
+        started = time.perf_counter()
+        with self.conn:
+            removed = self.conn.execute(SQL_DELETE_ORPHANS).rowcount
+        delete_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.conn.execute('VACUUM')
+        vacuum_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        self.conn.execute('ANALYZE')
+        analyze_seconds = time.perf_counter() - started
+
+        pages_after = self.conn.execute('PRAGMA page_count').fetchone()[0]
+        return {
+            'removed': removed,
+            'pages_before': pages_before,
+            'pages_after': pages_after,
+            'bytes_freed': (pages_before - pages_after) * page_size,
+            'delete_seconds': delete_seconds,
+            'vacuum_seconds': vacuum_seconds,
+            'analyze_seconds': analyze_seconds,
+        }
+
+    def _seed(self, cursor):
+        test_habits = [
+            ('Утренняя зарядка', 1, 2),
+            ('Чтение книги', 1, 1),
+            ('Медитация', 1, 1),
+            ('Курение', 0, 3),
+            ('Поздний отход ко сну', 0, 2),
+            ('Пить воду 2л', 1, 1)
+        ]
+        cursor.executemany(SQL_ADD_HABIT, test_habits)
+
+        # Добавляем тестовые логи с временем
+        today = date.today()
+
+        # (привычка, дней назад, время)
+        test_logs = [
+            (1, 0, '08:30'),
+            (2, 0, '20:00'),
+            (3, 1, '09:15'),
+            (4, 2, '14:30'),
+            (6, 3, '12:00'),
+            (1, 4, '07:45'),
+            (2, 5, '19:30'),
+            (3, 6, '21:00'),
+            (4, 7, '11:00'),
+            (5, 8, '01:30'),
+            (6, 9, '15:00')
+        ]
+        cursor.executemany(SQL_ADD_LOG, (
+            (habit_id, today.toordinal() - days_ago, int(time_str[:2]) * 60 + int(time_str[3:]))
+            for habit_id, days_ago, time_str in test_logs
+        ))
+
+        # Добавляем тестовую заметку, если заметок еще нет
+        if cursor.execute('SELECT version FROM note_document WHERE id = 1').fetchone()[0] == 0:
+            self.notes._save(cursor, 'Первая заметка. Стараюсь вести здоровый образ жизни.')
+
+    # --- Чтение ---
+
+    def load_habits(self):
+        return self.conn.execute(SQL_HABITS).fetchall()
+
+    def habit_ids_by_name(self):
+        return dict(self.conn.execute('SELECT name, id FROM habits'))
+
+    def total_stars(self):
+        result = self.conn.execute(SQL_TOTAL_STARS).fetchone()
+        return result[0] if result else 0
+
+    def check_stars(self):
+        """Сравнить сохраненный баланс с полным пересчетом: (сохранено, пересчитано)"""
+        stored = self.total_stars()
+        computed = self.conn.execute(SQL_COMPUTE_STARS).fetchone()[0]
+        return stored, computed
+
+    def rebuild_stars(self):
+        """Пересчитать баланс звезд по всем логам"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO stars_balance (id, total) VALUES (1, (%s))' % SQL_COMPUTE_STARS
+            )
+        return self.total_stars()
+
+    def rebuild_habit_stats(self):
+        """Пересчитать статистику всех привычек по логам"""
+        with self.conn:
+            self.conn.execute(SQL_FILL_HABIT_STATS)
+        return self.refresh_habit_stats()
+
+    def habit_stats(self, today=None):
+        """Статистика привычек: (id, название, is_good, последний раз, серия,
+        лучшая серия, за 7, 30 и 365 дней, звезды)"""
+        self.refresh_habit_stats(today)
+        return self.conn.execute(SQL_HABIT_STATS).fetchall()
+
+    def refresh_habit_stats(self, today=None):
+        """Пересчитать устаревшие строки habit_stats; возвращает их количество"""
+        today = (today or date.today()).toordinal()
+        stale = self.conn.execute(SQL_STALE_HABIT_STATS, (today,)).fetchall()
+        if not stale:
+            return 0
+
+        with self.conn:
+            for habit_id, dirty in stale:
+                counts = [
+                    self.conn.execute(SQL_HABIT_COUNT_BETWEEN, (habit_id, today - days + 1, today)).fetchone()[0]
+                    for days in STATS_WINDOWS
+                ]
+                current = self._current_streak(habit_id, today)
+                if dirty:
+                    longest = max(self._longest_streak(habit_id), current)
+                    self.conn.execute(
+                        'UPDATE habit_stats SET current_streak = ?, longest_streak = ?, '
+                        'count_7 = ?, count_30 = ?, count_365 = ?, as_of = ?, dirty = 0 '
+                        'WHERE habit_id = ?',
+                        (current, longest, *counts, today, habit_id)
+                    )
+                else:
+                    # Новые логи не появлялись: лучшая серия прежняя
+                    self.conn.execute(
+                        'UPDATE habit_stats SET current_streak = ?, '
+                        'count_7 = ?, count_30 = ?, count_365 = ?, as_of = ? '
+                        'WHERE habit_id = ?',
+                        (current, *counts, today, habit_id)
+                    )
+        return len(stale)
+
+    def _current_streak(self, habit_id, today):
+        """Дни подряд до сегодня (или до вчера, если сегодня еще не отмечено)"""
+        streak = 0
+        expected = None
+        cursor = self.conn.execute(SQL_HABIT_DAYS_DESC, (habit_id, today))
+        try:
+            for (day,) in cursor:
+                if expected is None:
+                    if day < today - 1:
+                        break
+                elif day != expected:
+                    break
+                streak += 1
+                expected = day - 1
+        finally:
+            cursor.close()
+        return streak
+
+    def _longest_streak(self, habit_id):
+        longest = run = 0
+        previous = None
+        for (day,) in self.conn.execute(SQL_HABIT_DAYS, (habit_id,)):
+            run = run + 1 if previous == day - 1 else 1
+            longest = max(longest, run)
+            previous = day
+        return longest
+
+    def recent_bad_logs(self, limit=10):
+        """Последние плохие привычки (сортировка по дате и времени)"""
+        return self.conn.execute(SQL_RECENT_BAD, (limit, limit)).fetchall()
+
+    def oldest_good_habits(self, limit=10):
+        """Хорошие привычки, которые дольше всего не выполнялись"""
+        return self.conn.execute(SQL_OLDEST_GOOD, (limit,)).fetchall()
+
+    def month_logs(self, start_day, end_day):
+        """Логи за период: (день, минута, название, is_good); дни - ordinal, границы включены"""
+        return self.conn.execute(SQL_MONTH_LOGS, (start_day, end_day)).fetchall()
+
+    def log_day_counts(self):
+        """Количество логов по дням: пары (день, логов), от новых дней к старым"""
+        return self.conn.execute(SQL_LOG_DAYS).fetchall()
+
+    def log_page_after(self, key, limit):
+        """limit логов истории после ключа (day, minute, habit_id, id)"""
+        return self.conn.execute(SQL_LOG_PAGE_AFTER, (*key, limit)).fetchall()
+
+    def log_page_from_day(self, day, skip, limit):
+        """limit логов истории начиная с дня day, пропустив первые skip логов этого дня"""
+        return self.conn.execute(SQL_LOG_PAGE_FROM_DAY, (day, limit, skip)).fetchall()
+
+    def habit_log_months(self, habit_id):
+        """Месяцы ('YYYY-MM'), в которых есть логи привычки"""
+        return [row[0] for row in self.conn.execute(SQL_HABIT_LOG_MONTHS, (habit_id,))]
+
+    def iter_logs(self, start=None, end=None, habit_ids=None, batch_size=5000):
+        """Логи с данными привычек пачками по batch_size строк.
+
+        start и end - даты 'YYYY-MM-DD'. Строки: (id, habit_id, name, is_good,
+        stars, day, minute) по порядку дня и минуты. Курсоры читаются по
+        строке, поэтому в памяти только одна пачка.
+        """
+        first = date.fromisoformat(start).toordinal() if start else 1
+        last = date.fromisoformat(end).toordinal() if end else date.max.toordinal()
+        if habit_ids is None:
+            cursor = self.conn.execute(f'''
+                SELECT hl.id, hl.habit_id, h.name, h.is_good, h.stars, hl.day, hl.minute
+                FROM habit_logs hl
+                JOIN habits h ON hl.habit_id = h.id
+                WHERE hl.day BETWEEN ? AND ?
+                ORDER BY hl.day, hl.minute
+            ''', (first, last))
+            return _fetch_batches(cursor, batch_size)
+
+        # Каждая привычка читается по своему индексу уже по порядку,
+        # heapq.merge держит в памяти по одной строке на привычку
+        streams = [self.conn.execute(SQL_HABIT_LOGS_ORDERED, (habit_id, first, last))
+                   for habit_id in habit_ids]
+        rows = heapq.merge(*streams, key=lambda row: (row[5], row[6]))
+        return iter(lambda: list(islice(rows, batch_size)), [])
+
+    def iter_log_columns(self, batch_size=50000):
+        """Все логи пачками строк (день ordinal, минута дня, habit_id, звезды со знаком)"""
+        return _fetch_batches(self.conn.execute(SQL_LOG_COLUMNS), batch_size)
+
+    def log_version(self):
+        """Версия логов: меняется после любого изменения логов или звезд, в том числе из другого процесса"""
+        return self.conn.execute(SQL_LOG_VERSION).fetchone()[0]
+
+    def iter_table(self, table, fields, batch_size=5000):
+        """Строки таблицы habits пачками"""
+        if table != 'habits':
+            raise ValueError(f'unknown table: {table}')
+        cursor = self.conn.execute(f'SELECT {", ".join(fields)} FROM {table} ORDER BY id')
+        return _fetch_batches(cursor, batch_size)
+
+    # --- Запись ---
+
+    def add_log(self, habit_id, day, minute):
+        with self.conn:
+            log_id = self.conn.execute(SQL_ADD_LOG, (habit_id, day, minute)).lastrowid
+            self.journal.record(self.conn.cursor(), 'Добавление лога', ['delete_logs', [[log_id, log_id]]])
+
+    def add_logs(self, rows, label=None):
+        """Добавить пачку логов (habit_id, день, минута) одной транзакцией.
+
+        С label пачка записывается в журнал отмены одним действием.
+        """
+        with self.conn:
+            cursor = self.conn.cursor()
+            if label is None:
+                cursor.executemany(SQL_ADD_LOG, rows)
+                return
+            rows = list(rows)
+            cursor.executemany(SQL_ADD_LOG, rows)
+            if rows:
+                # Транзакция держит блокировку записи с первой вставки, поэтому
+                # логи пачки получили id подряд и заканчиваются последним вставленным;
+                # lastrowid после executemany не задан, берем его у соединения
+                last = cursor.execute('SELECT last_insert_rowid()').fetchone()[0]
+                self.journal.record(cursor, label, ['delete_logs', [[last - len(rows) + 1, last]]])
+
+    def create_habit(self, name, is_good, stars):
+        """Создать привычку и вернуть ее id; sqlite3.IntegrityError, если имя занято"""
+        with self.conn:
+            cursor = self.conn.cursor()
+            habit_id = cursor.execute(SQL_ADD_HABIT, (name, is_good, stars)).lastrowid
+            self.journal.record(cursor, f"Создание привычки «{name}»", ['delete_habit', habit_id])
+            return habit_id
+
+    def schedules(self):
+        """Расписания: (habit_id, название, kind, weekdays, per_week, rule, minute, start_day)"""
+        return self.conn.execute(SQL_SCHEDULES).fetchall()
+
+    def set_schedule(self, habit_id, kind, weekdays, per_week, rule, minute, start_day):
+        with self.conn:
+            self.conn.execute(SQL_SET_SCHEDULE, (habit_id, kind, weekdays, per_week, rule, minute, start_day))
+
+    def delete_schedule(self, habit_id):
+        with self.conn:
+            self.conn.execute(SQL_DELETE_SCHEDULE, (habit_id,))
+
+    def log_day_counts_between(self, start_day, end_day):
+        """Логов каждой привычки по дням окна: (habit_id, день, логов)"""
+        return self.conn.execute(SQL_LOG_DAY_COUNTS, (start_day, end_day)).fetchall()
+
+    def update_habit_stars(self, habit_id, stars):
+        with self.conn:
+            cursor = self.conn.cursor()
+            old = cursor.execute(SQL_HABIT_STARS, (habit_id,)).fetchone()
+            cursor.execute(SQL_UPDATE_HABIT_STARS, (stars, habit_id))
+            if old is not None and old[0] != stars:
+                self.journal.record(cursor, 'Изменение звездочек', ['set_stars', habit_id, old[0]])
+
+    def delete_habit(self, habit_id):
+        with self.conn:
+            cursor = self.conn.cursor()
+            # Снимок для отмены снимается до удаления, в той же транзакции
+            op = self.journal.habit_snapshot(cursor, habit_id)
+            cursor.execute(SQL_DELETE_HABIT, (habit_id,))
+            if op is not None:
+                self.journal.record(cursor, f"Удаление привычки «{op[1][1]}»", op)
+
+    def save_notes(self, content):
+        """Сохранить заметки вместе с записью в журнал отмены; возвращает номер версии"""
+        with self.conn:
+            cursor = self.conn.cursor()
+            before = cursor.execute('SELECT version FROM note_document WHERE id = 1').fetchone()[0]
+            version = self.notes._save(cursor, content)
+            if version != before:
+                self.journal.record(cursor, 'Правка заметок', ['set_notes', before], merge=True)
+            return version
@@ -0,0 +1,188 @@
+import tkinter as tk
+from tkinter import ttk
+from collections import OrderedDict
+
+HEADER_HEIGHT = 25  # Примерная высота заголовков Treeview
+FETCH_DELAY_MS = 40  # Пауза после прокрутки, после которой подгружаются страницы
+MAX_PAGES = 50  # Сколько загруженных страниц держать в памяти
+
+
+class VirtualTable:
+    """Таблица с виртуальной прокруткой на ttk.Treeview.
+
+    В Treeview всегда только те строки, что помещаются на экране: полоса
+    прокрутки двигает номер первой строки, а элементы Treeview остаются
+    теми же, меняются только их значения. Строки берутся либо из списка
+    в памяти (show_rows), либо страницами через fetch_page (show_paged):
+    загруженные страницы хранятся в LRU из MAX_PAGES, поэтому память не
+    зависит от количества строк. Пока страница грузится, строки пустые.
+
+    key(values) - ключ строки для выделения: выделенная строка остается
+    выделенной при прокрутке. Без key выделение сбрасывается.
+    """
+
+    def __init__(self, parent, columns, key=None, **tree_options):
+        self.key = key
+        self.frame = tk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", **tree_options)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.count = 0
+        self.top = 0
+        self.visible = int(tree_options.get("height", 10))
+        self.rows = []
+        self.fetch_page = None
+        self.page_size = 1
+        self.pages = OrderedDict()
+        self.pending = set()
+        self.fetch_job = None
+        # Поколение данных: страницы, загруженные до show_paged, отбрасываются
+        self.generation = 0
+
+        # Элементы Treeview по порядку на экране и их текущие значения
+        self.items = []
+        self.shown = []
+        self.selected_key = None
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self._wheel(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self._wheel(-1))
+        self.tree.bind("<Button-5>", lambda e: self._wheel(1))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def show_rows(self, rows):
+        """Показать строки из списка в памяти"""
+        self.fetch_page = None
+        self.pages.clear()
+        self.rows = rows
+        self._set_count(len(rows))
+
+    def show_paged(self, count, fetch_page, page_size):
+        """Показать count строк, которые грузятся страницами.
+
+        fetch_page(номер, callback) должна вызвать callback(строки страницы),
+        в том числе позже, из цикла событий Tk.
+        """
+        self.generation += 1
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.pages.clear()
+        self.pending.clear()
+        self.rows = []
+        self._set_count(count)
+
+    def selected(self):
+        """Значения выделенной строки или None"""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.items:
+            return None
+        index = self.items.index(selection[0])
+        return self.shown[index] if index < len(self.shown) else None
+
+    def yview(self, *args):
+        """Команда полосы прокрутки"""
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * self.count))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self._scroll_to(self.top + int(args[1]) * step)
+
+    def _wheel(self, direction):
+        self._scroll_to(self.top + direction * 3)
+        return "break"
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, self.count - self.visible))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _set_count(self, count):
+        self.count = count
+        self.top = max(0, min(self.top, count - self.visible))
+        self._render()
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - HEADER_HEIGHT) // rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self._set_count(self.count)
+
+    def _on_select(self, event):
+        values = self.selected()
+        if values is not None and self.key:
+            self.selected_key = self.key(values)
+
+    def _row(self, index):
+        if self.fetch_page is None:
+            return self.rows[index]
+        page = self.pages.get(index // self.page_size)
+        if page is None:
+            return None
+        offset = index % self.page_size
+        return page[offset] if offset < len(page) else None
+
+    def _render(self):
+        """Привести элементы Treeview к строкам top..top+visible"""
+        end = min(self.count, self.top + self.visible)
+        missing = False
+        values = []
+        for index in range(self.top, end):
+            row = self._row(index)
+            missing = missing or row is None
+            values.append(row if row is not None else ())
+
+        # Элементы создаются и удаляются только при изменении высоты
+        while len(self.items) < len(values):
+            self.items.append(self.tree.insert("", tk.END))
+            self.shown.append(None)
+        while len(self.items) > len(values):
+            self.tree.delete(self.items.pop())
+            self.shown.pop()
+
+        selected = []
+        for i, row in enumerate(values):
+            if self.shown[i] != row:
+                self.tree.item(self.items[i], values=row)
+                self.shown[i] = row
+            if self.key and row and self.key(row) == self.selected_key:
+                selected.append(self.items[i])
+        if tuple(selected) != self.tree.selection():
+            self.tree.selection_set(selected)
+
+        if self.count:
+            self.scrollbar.set(self.top / self.count, end / self.count)
+        else:
+            self.scrollbar.set(0, 1)
+
+        if missing and self.fetch_job is None:
+            self.fetch_job = self.tree.after(FETCH_DELAY_MS, self._fetch_visible)
+
+    def _fetch_visible(self):
+        """Запросить страницы, видимые сейчас; страницы, мимо которых прокрутили, не грузятся"""
+        self.fetch_job = None
+        if self.fetch_page is None or not self.count:
+            return
+        last = min(self.count, self.top + self.visible) - 1
+        for number in range(self.top // self.page_size, last // self.page_size + 1):
+            if number in self.pages:
+                self.pages.move_to_end(number)
+            elif number not in self.pending:
+                self.pending.add(number)
+                self.fetch_page(number, lambda rows, number=number, generation=self.generation:
+                                self._page_loaded(number, generation, rows))
+
+    def _page_loaded(self, number, generation, rows):
+        if generation != self.generation:
+            return
+        self.pending.discard(number)
+        self.pages[number] = [tuple(row) for row in rows]
+        while len(self.pages) > MAX_PAGES:
+            self.pages.popitem(last=False)
+        self._render()